@@ -14,6 +14,11 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate the database the application uses (DATABASE_URL), not the .ini placeholder;
+# configparser treats "%" as interpolation, so escape it
+from backend.app.core.config import settings
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 from sqlmodel import SQLModel
@@ -0,0 +1,35 @@
+"""Add full-text product search index
+
+Revision ID: 3b9e7c41d2a8
+Revises: f1fd511018b3
+Create Date: 2026-10-17 10:12:03.418551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.db.search import FTS_TABLE, PG_TABLE, backfill_search_index, create_search_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e7c41d2a8'
+down_revision: Union[str, Sequence[str], None] = 'f1fd511018b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    create_search_index(conn)
+    backfill_search_index(conn)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_table(PG_TABLE)
+    else:
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
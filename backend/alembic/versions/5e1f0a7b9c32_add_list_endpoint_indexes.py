@@ -0,0 +1,46 @@
+"""Add composite indexes for list endpoints
+
+Revision ID: 5e1f0a7b9c32
+Revises: 8c4d2e6f1a90
+Create Date: 2026-10-17 12:40:19.552371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1f0a7b9c32'
+down_revision: Union[str, Sequence[str], None] = '8c4d2e6f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_products_is_active_id', 'products', ['is_active', 'id']),
+    ('ix_posts_post_type_id', 'posts', ['post_type', 'id']),
+    ('ix_posts_status_id', 'posts', ['status', 'id']),
+    ('ix_posts_post_type_status_id', 'posts', ['post_type', 'status', 'id']),
+    ('ix_assets_created_at_id', 'assets', ['created_at', 'id']),
+    ('ix_assets_file_type_created_at_id', 'assets', ['file_type', 'created_at', 'id']),
+    ('ix_menu_items_order', 'menu_items', ['order']),
+    ('ix_menu_items_is_active_order', 'menu_items', ['is_active', 'order']),
+    ('ix_page_sections_page_order', 'page_sections', ['page', 'order']),
+    ('ix_page_sections_order', 'page_sections', ['order']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CMS tables may still be created by SQLModel.metadata.create_all at startup
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, columns in INDEXES:
+        if table in existing:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,33 @@
+"""Add table_versions counters for ETags
+
+Revision ID: 8c4d2e6f1a90
+Revises: 3b9e7c41d2a8
+Create Date: 2026-10-17 11:02:47.130285
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2e6f1a90'
+down_revision: Union[str, Sequence[str], None] = '3b9e7c41d2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_versions',
+    sa.Column('table_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('table_versions')
@@ -0,0 +1,28 @@
+"""Add products updated_at index for catalog export
+
+Revision ID: a4d7c2e9f015
+Revises: 5e1f0a7b9c32
+Create Date: 2026-10-17 22:10:42.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7c2e9f015'
+down_revision: Union[str, Sequence[str], None] = '5e1f0a7b9c32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_updated_at_id', 'products', ['updated_at', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_updated_at_id', table_name='products', if_exists=True)
@@ -0,0 +1,48 @@
+"""Add image dimensions and placeholders to assets
+
+Revision ID: a7e3b5d9c248
+Revises: f4a8d2c6e391
+Create Date: 2026-10-18 02:18:45.630219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3b5d9c248'
+down_revision: Union[str, Sequence[str], None] = 'f4a8d2c6e391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('dominant_color', sqlmodel.sql.sqltypes.AutoString(length=7), nullable=True),
+    sa.Column('placeholder', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # assets may still be created by SQLModel.metadata.create_all at startup
+    inspector = sa.inspect(op.get_bind())
+    if 'assets' not in inspector.get_table_names():
+        return
+    existing = {column['name'] for column in inspector.get_columns('assets')}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column('assets', column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'assets' not in inspector.get_table_names():
+        return
+    with op.batch_alter_table('assets') as batch_op:
+        for column in reversed(COLUMNS):
+            batch_op.drop_column(column.name)
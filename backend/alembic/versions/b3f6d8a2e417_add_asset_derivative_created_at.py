@@ -0,0 +1,41 @@
+"""Add created_at to asset_derivatives
+
+Revision ID: b3f6d8a2e417
+Revises: a7e3b5d9c248
+Create Date: 2026-10-18 03:05:27.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6d8a2e417'
+down_revision: Union[str, Sequence[str], None] = 'a7e3b5d9c248'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # asset_derivatives may still be created by SQLModel.metadata.create_all at startup
+    inspector = sa.inspect(op.get_bind())
+    if 'asset_derivatives' not in inspector.get_table_names():
+        return
+    if 'created_at' not in {column['name'] for column in inspector.get_columns('asset_derivatives')}:
+        # Existing rows get the migration time, so the upload GC's grace period applies to them once
+        op.add_column(
+            'asset_derivatives',
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'asset_derivatives' not in inspector.get_table_names():
+        return
+    with op.batch_alter_table('asset_derivatives') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,43 @@
+"""Add stored sanitized HTML to posts
+
+Revision ID: b81e5f3a6c27
+Revises: a4d7c2e9f015
+Create Date: 2026-10-17 22:31:05.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e5f3a6c27'
+down_revision: Union[str, Sequence[str], None] = 'a4d7c2e9f015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # posts may still be created by SQLModel.metadata.create_all at startup
+    inspector = sa.inspect(op.get_bind())
+    if 'posts' not in inspector.get_table_names():
+        return
+    columns = {column['name'] for column in inspector.get_columns('posts')}
+    # Existing rows keep NULL and are sanitized lazily on first render
+    if 'content_html' not in columns:
+        op.add_column('posts', sa.Column('content_html', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    if 'sanitizer_version' not in columns:
+        op.add_column('posts', sa.Column('sanitizer_version', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'posts' not in inspector.get_table_names():
+        return
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_column('sanitizer_version')
+        batch_op.drop_column('content_html')
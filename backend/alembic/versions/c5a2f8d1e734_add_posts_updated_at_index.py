@@ -0,0 +1,30 @@
+"""Add posts updated_at index for sitemap and feed regeneration
+
+Revision ID: c5a2f8d1e734
+Revises: b81e5f3a6c27
+Create Date: 2026-10-17 23:02:51.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a2f8d1e734'
+down_revision: Union[str, Sequence[str], None] = 'b81e5f3a6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # posts may still be created by SQLModel.metadata.create_all at startup
+    if 'posts' in sa.inspect(op.get_bind()).get_table_names():
+        op.create_index('ix_posts_updated_at_id', 'posts', ['updated_at', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_updated_at_id', table_name='posts', if_exists=True)
@@ -0,0 +1,40 @@
+"""Add SHA-256 checksum to assets
+
+Revision ID: d9b3e6a4f152
+Revises: c5a2f8d1e734
+Create Date: 2026-10-17 23:40:18.205641
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b3e6a4f152'
+down_revision: Union[str, Sequence[str], None] = 'c5a2f8d1e734'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # assets may still be created by SQLModel.metadata.create_all at startup
+    inspector = sa.inspect(op.get_bind())
+    if 'assets' not in inspector.get_table_names():
+        return
+    if 'checksum' not in {column['name'] for column in inspector.get_columns('assets')}:
+        op.add_column('assets', sa.Column('checksum', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.create_index(op.f('ix_assets_checksum'), 'assets', ['checksum'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'assets' not in inspector.get_table_names():
+        return
+    op.drop_index(op.f('ix_assets_checksum'), table_name='assets', if_exists=True)
+    with op.batch_alter_table('assets') as batch_op:
+        batch_op.drop_column('checksum')
@@ -0,0 +1,59 @@
+"""Add content-addressed asset_blobs; asset file paths may be shared
+
+Revision ID: e2c7a9f4b610
+Revises: d9b3e6a4f152
+Create Date: 2026-10-18 00:52:37.418093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7a9f4b610'
+down_revision: Union[str, Sequence[str], None] = 'd9b3e6a4f152'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite reflects the inline UNIQUE (file_path) without a name
+NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('asset_blobs',
+    sa.Column('checksum', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('file_path', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('mime_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('checksum'),
+    sa.UniqueConstraint('file_path'),
+    if_not_exists=True,
+    )
+
+    # assets may still be created by SQLModel.metadata.create_all at startup
+    inspector = sa.inspect(op.get_bind())
+    if 'assets' not in inspector.get_table_names():
+        return
+    # Assets with identical content now share one file
+    for constraint in inspector.get_unique_constraints('assets'):
+        if constraint['column_names'] == ['file_path']:
+            with op.batch_alter_table('assets', naming_convention=NAMING_CONVENTION) as batch_op:
+                batch_op.drop_constraint(constraint['name'] or 'uq_assets_file_path', type_='unique')
+    op.create_index(op.f('ix_assets_file_path'), 'assets', ['file_path'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'assets' in inspector.get_table_names():
+        # Fails if assets already share a file
+        op.drop_index(op.f('ix_assets_file_path'), table_name='assets', if_exists=True)
+        with op.batch_alter_table('assets') as batch_op:
+            batch_op.create_unique_constraint('uq_assets_file_path', ['file_path'])
+    op.drop_table('asset_blobs', if_exists=True)
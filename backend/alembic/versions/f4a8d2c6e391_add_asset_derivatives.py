@@ -0,0 +1,44 @@
+"""Add asset_derivatives for responsive image sizes
+
+Revision ID: f4a8d2c6e391
+Revises: e2c7a9f4b610
+Create Date: 2026-10-18 01:34:12.906427
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8d2c6e391'
+down_revision: Union[str, Sequence[str], None] = 'e2c7a9f4b610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('asset_derivatives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checksum', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('format', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+    sa.Column('mime_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('file_path', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checksum', 'width', 'format', name='uq_asset_derivatives_checksum_width_format'),
+    sa.UniqueConstraint('file_path'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_asset_derivatives_checksum'), 'asset_derivatives', ['checksum'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_asset_derivatives_checksum'), table_name='asset_derivatives', if_exists=True)
+    op.drop_table('asset_derivatives', if_exists=True)
@@ -1,21 +1,44 @@
 """
 API endpoints for Asset management and file uploads.
 """
-from datetime import datetime
+import asyncio
+import hashlib
+import logging
+import os
 from pathlib import Path
-import uuid
 import mimetypes
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+import zipfile
+from typing import BinaryIO, Iterator, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
+from backend.app.core import images
+from backend.app.core.cache import DiskLRUCache, SingleFlight
+from backend.app.core.config import settings
+from backend.app.core.etag import conditional_get
+from backend.app.core.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
+from backend.app.core.static import IMMUTABLE_CACHE_CONTROL
+from backend.app.core.storage import (
+    AsyncReadable, UploadTooLarge, ZipMemberUpload, discard, hash_upload, read_head, sniff_mime_type, stage_upload
+)
+from backend.app.db import blobs
 from backend.app.db.session import get_session
 from backend.app.models.asset import Asset
+from backend.app.models.asset_blob import AssetBlob
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 # Configuration
-UPLOAD_DIR = Path("backend/static/uploads")
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_RESIZE_DIMENSION = 4096
+# Chunk size when streaming a cached resize
+RESIZE_STREAM_CHUNK = 64 * 1024
+MAX_BATCH_FILES = 500
+# Files of a batch processed at the same time
+UPLOAD_CONCURRENCY = 4
 ALLOWED_IMAGE_TYPES = {
     "image/jpeg",
     "image/png",
@@ -37,37 +60,178 @@ def get_file_category(mime_type: str) -> str:
         return "other"
 
 
-@router.get("/")
+def _asset_responses(session: Session, assets: list[Asset]) -> list[dict]:
+    """
+    Serialize assets with their URL and responsive sources.
+
+    `srcset` lists the WebP derivatives for `<img srcset>`; `sources` has one
+    entry per format (AVIF first, when available) for `<picture>`. Both are
+    empty until the derivatives have been rendered.
+    """
+    derivatives = blobs.derivatives_for(session, (asset.checksum for asset in assets))
+    responses = []
+    for asset in assets:
+        srcsets: dict[str, list[str]] = {}
+        for derivative in derivatives.get(asset.checksum, []):
+            srcsets.setdefault(derivative.format, []).append(f"{derivative.url} {derivative.width}w")
+        sources = [
+            {"type": images.FORMATS[fmt][1], "srcset": ", ".join(srcsets[fmt])}
+            for fmt in images.FORMATS
+            if fmt in srcsets
+        ]
+        responses.append({
+            **asset.model_dump(),
+            "url": asset.url,
+            "srcset": ", ".join(srcsets.get("webp", [])) or None,
+            "sources": sources,
+        })
+    return responses
+
+
+@router.get("/", dependencies=[Depends(conditional_get("assets", "asset_derivatives"))])
 def list_assets(
+    response: Response,
     file_type: Optional[str] = Query(None, description="Filter by file type"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
     session: Session = Depends(get_session)
 ):
     """
     List all assets with pagination.
 
-    Returns most recent uploads first.
+    Returns most recent uploads first. Supports offset or keyset (`cursor`)
+    pagination. When more rows may follow, the cursor for the next page is
+    sent in the X-Next-Cursor header.
     """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either offset or cursor, not both")
+
+    keyset = (Asset.created_at, Asset.id)
     query = select(Asset)
 
     if file_type:
         query = query.where(Asset.file_type == file_type)
 
-    query = query.order_by(Asset.created_at.desc()).offset(offset).limit(limit)
+    query = apply_keyset(query, keyset, cursor, descending=True).offset(offset).limit(limit)
     assets = session.exec(query).all()
 
-    # Add URL to each asset
-    assets_with_urls = [
-        {**asset.model_dump(), "url": asset.url}
-        for asset in assets
-    ]
+    # Add URL and responsive sources to each asset
+    assets_with_urls = _asset_responses(session, assets)
+
+    next_page = next_cursor(assets, keyset, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return {
+        "assets": assets_with_urls,
+        "count": len(assets_with_urls),
+    }
+
+
+def _image_metadata(session: Session, file_path: str, checksum: str, mime_type: str) -> dict:
+    """Dimensions, dominant colour and placeholder of an image, reused from an asset with the same content."""
+    if not mime_type.startswith("image/") or mime_type == "image/svg+xml":
+        return {}
+    known = session.exec(
+        select(Asset.width, Asset.height, Asset.dominant_color, Asset.placeholder)
+        .where(Asset.checksum == checksum, Asset.width.is_not(None))
+        .limit(1)
+    ).first()
+    if known:
+        return known._asdict()
+    return images.extract_metadata(str(blobs.STATIC_ROOT / file_path)) or {}
+
+
+class UploadRejected(Exception):
+    """A file that cannot become an asset, with the HTTP status explaining why."""
 
-    return {"assets": assets_with_urls, "count": len(assets_with_urls)}
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _in_session(bind, fn, *args):
+    """Run `fn(session, *args)` in a short session of its own, so files can be processed concurrently."""
+    with Session(bind) as session:
+        return fn(session, *args)
+
+
+async def _ingest(upload: AsyncReadable, filename: str, alt_text: Optional[str], bind) -> Asset:
+    """
+    Validate and store one file, returning its Asset (not yet saved).
+
+    The returned asset holds a reference on its blob: save it, or release
+    the reference with `blobs.release`.
+    """
+    # Trust the file's leading bytes, not the client's Content-Type or extension
+    mime_type = sniff_mime_type(await read_head(upload))
+    if mime_type not in ALLOWED_IMAGE_TYPES:
+        raise UploadRejected(
+            415, f"Unsupported file type. Allowed types: {', '.join(sorted(ALLOWED_IMAGE_TYPES))}"
+        )
+
+    # Hash first: known content is referenced without writing anything
+    try:
+        checksum, file_size = await hash_upload(upload, MAX_FILE_SIZE)
+    except UploadTooLarge:
+        raise UploadRejected(413, f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB")
+
+    # Database and rename work is blocking; keep it off the event loop
+    blob = await run_in_threadpool(_in_session, bind, blobs.acquire, checksum)
+    if blob is None:
+        # New content: stream to a temp file in the store, then move it into place
+        staged = await stage_upload(upload, blobs.staging_dir(), MAX_FILE_SIZE)
+        extension = mimetypes.guess_extension(mime_type) or Path(filename).suffix.lower()
+        try:
+            blob = await run_in_threadpool(_in_session, bind, blobs.store, staged, extension, mime_type)
+        except Exception:
+            await discard(staged.temp_path)
+            raise
+
+    try:
+        metadata = await run_in_threadpool(_in_session, bind, _image_metadata, blob.file_path, checksum, mime_type)
+    except Exception:
+        await run_in_threadpool(_in_session, bind, blobs.release, checksum)
+        raise
+
+    return Asset(
+        filename=filename,
+        file_path=blob.file_path,
+        file_type=get_file_category(mime_type),
+        mime_type=mime_type,
+        file_size=file_size,
+        checksum=checksum,
+        alt_text=alt_text,
+        **metadata
+    )
+
+
+def _save_assets(session: Session, assets: list[Asset]) -> None:
+    """Insert assets in one transaction, then reload them in one query."""
+    session.add_all(assets)
+    session.commit()
+    ids = [asset.id for asset in assets]
+    session.exec(select(Asset).where(Asset.id.in_(ids))).all()
+
+
+async def _save_or_release(session: Session, assets: list[Asset], background_tasks: BackgroundTasks) -> None:
+    """Save ingested assets, schedule their derivatives, or give their blob references back."""
+    try:
+        await run_in_threadpool(_save_assets, session, assets)
+    except Exception:
+        session.rollback()
+        for asset in assets:
+            await run_in_threadpool(_in_session, session.get_bind(), blobs.release, asset.checksum)
+        raise
+
+    for checksum in {asset.checksum for asset in assets if asset.mime_type in images.RASTER_TYPES}:
+        background_tasks.add_task(blobs.generate_derivatives, checksum)
 
 
 @router.post("/upload", status_code=201)
 async def upload_asset(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     alt_text: Optional[str] = None,
     session: Session = Depends(get_session)
@@ -75,65 +239,117 @@ async def upload_asset(
     """
     Upload a file and create an Asset record.
 
-    - Validates file type (images only for MVP)
-    - Validates file size (< 10MB)
-    - Generates unique filename with UUID
-    - Saves to backend/static/uploads/YYYY/MM/
-    - Returns asset record with public URL
+    - Validates file type from its magic bytes (images only for MVP)
+    - Hashes the file in chunks, rejecting it as soon as it exceeds 10MB
+    - Content already stored is shared: nothing is written to disk
+    - New content is saved once to backend/static/uploads/cas/ab/cd/<sha256><ext>
+    - Reads width, height, dominant colour and a tiny placeholder (off the event loop)
+    - Resized WebP/AVIF derivatives are rendered in the background
+    - Returns asset record with public URL and srcset (once derivatives exist)
     """
-    # Read file content
-    content = await file.read()
-    file_size = len(content)
+    try:
+        asset = await _ingest(file, file.filename, alt_text, session.get_bind())
+    except UploadRejected as error:
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
 
-    # Validate file size
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
-
-    # Determine MIME type
-    mime_type = file.content_type or mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
-
-    # Validate file type (images only for MVP)
-    if mime_type not in ALLOWED_IMAGE_TYPES:
-        raise HTTPException(
-            status_code=415,
-            detail=f"Unsupported file type. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES)}"
-        )
-
-    # Generate unique filename
-    file_extension = Path(file.filename).suffix or ".jpg"
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
+    await _save_or_release(session, [asset], background_tasks)
+    return (await run_in_threadpool(_asset_responses, session, [asset]))[0]
 
-    # Create dated directory structure (YYYY/MM)
-    now = datetime.utcnow()
-    year_month_dir = UPLOAD_DIR / str(now.year) / f"{now.month:02d}"
-    year_month_dir.mkdir(parents=True, exist_ok=True)
 
-    # Full file path
-    file_path = year_month_dir / unique_filename
-    relative_path = f"uploads/{now.year}/{now.month:02d}/{unique_filename}"
+async def _upload_many(
+    uploads: list[tuple[AsyncReadable, str]],
+    session: Session,
+    background_tasks: BackgroundTasks,
+) -> dict:
+    """
+    Ingest files concurrently (at most UPLOAD_CONCURRENCY at a time), save
+    every accepted asset in a single transaction and report per file.
+    """
+    bind = session.get_bind()
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def ingest(upload: AsyncReadable, filename: str):
+        async with semaphore:
+            try:
+                return await _ingest(upload, filename, None, bind)
+            except UploadRejected as error:
+                return error
+            except Exception:
+                logger.exception("Storing uploaded file %s failed", filename)
+                return UploadRejected(500, "Could not store file")
+
+    outcomes = await asyncio.gather(*(ingest(upload, filename) for upload, filename in uploads))
+    assets = [outcome for outcome in outcomes if isinstance(outcome, Asset)]
+    if assets:
+        await _save_or_release(session, assets, background_tasks)
+    responses = iter(await run_in_threadpool(_asset_responses, session, assets))
+
+    results = []
+    for (_, filename), outcome in zip(uploads, outcomes):
+        if isinstance(outcome, Asset):
+            results.append({"filename": filename, "status_code": 201, "asset": next(responses)})
+        else:
+            results.append({"filename": filename, "status_code": outcome.status_code, "detail": outcome.detail})
+    return {"results": results, "created": len(assets), "rejected": len(uploads) - len(assets)}
+
+
+@router.post("/upload/batch")
+async def upload_assets_batch(
+    background_tasks: BackgroundTasks,
+    files: list[UploadFile] = File(...),
+    session: Session = Depends(get_session)
+):
+    """
+    Upload many files at once.
 
-    # Save file to disk
-    with open(file_path, "wb") as f:
-        f.write(content)
+    Each file goes through the same checks and storage as /upload, several
+    at a time; all accepted assets are created in one transaction. Rejected
+    files do not fail the request: `results` has one entry per file, in
+    order, with its own status code.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per request")
+    return await _upload_many([(file, file.filename) for file in files], session, background_tasks)
+
+
+def _zip_members(archive: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """Regular files of an archive, skipping folders and OS metadata (__MACOSX, dotfiles)."""
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and not Path(info.filename).name.startswith(".")
+    ]
 
-    # Create Asset record
-    asset = Asset(
-        filename=file.filename,
-        file_path=relative_path,
-        file_type=get_file_category(mime_type),
-        mime_type=mime_type,
-        file_size=file_size,
-        alt_text=alt_text
-    )
 
-    session.add(asset)
-    session.commit()
-    session.refresh(asset)
+@router.post("/upload/zip")
+async def upload_assets_zip(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Zip archive of images"),
+    session: Session = Depends(get_session)
+):
+    """
+    Upload every image in a zip archive.
 
-    return {**asset.model_dump(), "url": asset.url}
+    Members are decompressed one chunk at a time straight into the store
+    (nothing is extracted to a temp folder) and processed like /upload/batch.
+    """
+    if not (await read_head(file)).startswith(b"PK\x03\x04"):
+        raise HTTPException(status_code=415, detail="Not a zip archive")
+    try:
+        archive = await run_in_threadpool(zipfile.ZipFile, file.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Corrupt zip archive")
+
+    with archive:
+        members = [ZipMemberUpload(archive, info) for info in _zip_members(archive)]
+        if len(members) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per archive")
+        try:
+            return await _upload_many([(member, member.filename) for member in members], session, background_tasks)
+        finally:
+            for member in members:
+                await member.close()
 
 
 @router.get("/{asset_id}")
@@ -146,7 +362,104 @@ def get_asset(
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    return {**asset.model_dump(), "url": asset.url}
+    return _asset_responses(session, [asset])[0]
+
+
+_resize_flights = SingleFlight()
+_image_cache: Optional[DiskLRUCache] = None
+
+
+def _resize_cache() -> DiskLRUCache:
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = DiskLRUCache(settings.image_cache_dir, settings.image_cache_max_bytes)
+    return _image_cache
+
+
+async def _render_resize(cache: DiskLRUCache, key: str, source: Path, w, h, fit: str, fmt: str) -> Path:
+    """Render one resize in the image pool and publish it to the cache."""
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    temp = cache.temp_path(key)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(images.get_pool(), images.render_resized, str(source), str(temp), w, h, fit, fmt)
+    return cache.put(key, temp)
+
+
+def _open_or_none(path: Path) -> Optional[BinaryIO]:
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+
+def _stream_file(file: BinaryIO) -> Iterator[bytes]:
+    with file:
+        while chunk := file.read(RESIZE_STREAM_CHUNK):
+            yield chunk
+
+
+@router.get("/{asset_id}/image")
+async def resize_asset_image(
+    asset_id: int,
+    w: Optional[int] = Query(None, ge=1, le=MAX_RESIZE_DIMENSION, description="Maximum width in pixels (IMAGE_RESIZE_SIZES)"),
+    h: Optional[int] = Query(None, ge=1, le=MAX_RESIZE_DIMENSION, description="Maximum height in pixels (IMAGE_RESIZE_SIZES)"),
+    fit: Literal["contain", "cover"] = Query("contain", description="cover crops to exactly w x h"),
+    format: Literal["webp", "avif", "jpeg", "png"] = Query("webp"),
+    session: Session = Depends(get_session)
+):
+    """
+    Serve an image asset resized on demand (never upscaled).
+
+    Only the sizes in `IMAGE_RESIZE_SIZES` are accepted, which bounds the
+    variants of each asset. Results are cached on disk under a size-bounded
+    LRU; concurrent requests for the same variant wait for a single render.
+    The URL fully determines the bytes, so responses may be cached for a year.
+    """
+    allowed = settings.image_resize_sizes
+    if any(size is not None and size not in allowed for size in (w, h)):
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported size. Allowed sizes: {', '.join(map(str, sorted(allowed)))}"
+        )
+    asset = await run_in_threadpool(session.get, Asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if asset.mime_type not in images.RASTER_TYPES:
+        raise HTTPException(status_code=415, detail="Only raster images can be resized")
+    if not images.can_encode(format):
+        raise HTTPException(status_code=400, detail=f"Format '{format}' is not supported on this server")
+    source = blobs.STATIC_ROOT / asset.file_path
+    if not source.is_file():
+        raise HTTPException(status_code=404, detail="Asset file not found")
+
+    if not (w and h):
+        fit = "contain"
+    # Keyed by content, so identical uploads share cached variants
+    content_key = asset.checksum or hashlib.sha256(asset.file_path.encode()).hexdigest()
+    key = f"{content_key}-{w or 0}x{h or 0}-{fit}.{format}"
+    cache = _resize_cache()
+    # Open before serving: a concurrent put may evict the file, and an open
+    # file survives the unlink. If it went first, render it again.
+    for _ in range(3):
+        path = cache.get(key) or await _resize_flights.do(
+            key, lambda: _render_resize(cache, key, source, w, h, fit, format)
+        )
+        file = await run_in_threadpool(_open_or_none, path)
+        if file is not None:
+            break
+    else:
+        raise HTTPException(status_code=503, detail="Image cache is too busy, try again")
+
+    return StreamingResponse(
+        _stream_file(file),
+        media_type=images.OUTPUT_FORMATS[format][1],
+        headers={
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "Content-Length": str(os.fstat(file.fileno()).st_size),
+            "ETag": f'"{key}"',
+        },
+    )
 
 
 @router.delete("/{asset_id}", status_code=204)
@@ -158,19 +471,24 @@ def delete_asset(
     """
     Delete an asset record.
 
-    If delete_file=True (default), also removes the file from disk.
+    If delete_file=True (default), also removes the file from disk once no
+    other asset shares it.
     """
     asset = session.get(Asset, asset_id)
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    # Delete file from disk if requested
-    if delete_file:
-        file_path = Path("backend/static") / asset.file_path
-        if file_path.exists():
-            file_path.unlink()
-
+    checksum, file_path = asset.checksum, asset.file_path
     session.delete(asset)
     session.commit()
 
+    # Release the shared blob; its file goes with the last reference
+    if checksum and session.get(AssetBlob, checksum):
+        blobs.release(session, checksum, delete_file=delete_file)
+    elif delete_file:
+        # Uploads from before content addressing own their file
+        still_used = session.exec(select(Asset.id).where(Asset.file_path == file_path).limit(1)).first()
+        if still_used is None:
+            (blobs.STATIC_ROOT / file_path).unlink(missing_ok=True)
+
     return None
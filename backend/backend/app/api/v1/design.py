@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlmodel import Session, select
 from typing import List
+from backend.app.core.etag import conditional_get
 from backend.app.db import get_session
 from backend.app.models import SiteDesign
 from pydantic import BaseModel
@@ -35,7 +36,7 @@ def list_designs(session: Session = Depends(get_session)):
     return [design.model_dump() for design in designs]
 
 
-@router.get("/active", response_model=dict)
+@router.get("/active", response_model=dict, dependencies=[Depends(conditional_get("site_designs"))])
 def get_active_design(session: Session = Depends(get_session)):
     """Get the currently active design."""
     design = session.exec(select(SiteDesign).where(SiteDesign.is_active == True)).first()
@@ -0,0 +1,53 @@
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Path as PathParam, Request, Response
+from fastapi.responses import FileResponse
+
+from backend.app.db import sitemaps
+
+router = APIRouter()
+
+# Crawlers may reuse a file for a while; Last-Modified lets them revalidate cheaply
+CACHE_CONTROL = "public, max-age=300"
+
+
+def _serve(request: Request, name: str, media_type: str) -> Response:
+    """Serve a generated file with Last-Modified, answering If-Modified-Since with 304."""
+    path: Path = sitemaps.file_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    stat = path.stat()
+    response = FileResponse(path, media_type=media_type, stat_result=stat, headers={"Cache-Control": CACHE_CONTROL})
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            not_modified = int(stat.st_mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+        if not_modified:
+            headers = {key: response.headers[key] for key in ("last-modified", "etag", "cache-control")}
+            return Response(status_code=304, headers=headers)
+    return response
+
+
+@router.get("/sitemap.xml", include_in_schema=False)
+def sitemap_index(request: Request):
+    """Sitemap index listing every shard."""
+    return _serve(request, sitemaps.SITEMAP_INDEX, "application/xml")
+
+
+@router.get("/sitemaps/{name}", include_in_schema=False)
+def sitemap_shard(
+    request: Request,
+    name: str = PathParam(..., pattern=r"^sitemap-(products|posts)-\d+\.xml$"),
+):
+    """One sitemap shard of up to 50,000 URLs."""
+    return _serve(request, name, "application/xml")
+
+
+@router.get("/feed.xml", include_in_schema=False)
+def atom_feed(request: Request):
+    """Atom feed of the latest published blog posts."""
+    return _serve(request, sitemaps.FEED, "application/atom+xml")
@@ -5,13 +5,15 @@ from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
+from backend.app.core.etag import conditional_get
 from backend.app.db.session import get_session
 from backend.app.models.menu_item import MenuItem
 
 router = APIRouter()
+menu_items_etag = Depends(conditional_get("menu_items"))
 
 
-@router.get("/")
+@router.get("/", dependencies=[menu_items_etag])
 def list_menu_items(
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     session: Session = Depends(get_session)
@@ -45,7 +47,7 @@ def create_menu_item(
     return item
 
 
-@router.get("/{item_id}")
+@router.get("/{item_id}", dependencies=[menu_items_etag])
 def get_menu_item(
     item_id: int,
     session: Session = Depends(get_session)
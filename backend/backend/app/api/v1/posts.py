@@ -1,37 +1,103 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, Response
 from sqlmodel import Session, select
-from typing import List
-from backend.app.db import get_session
+from datetime import datetime
+from typing import List, Optional
+from backend.app.core.etag import CACHE_CONTROL, compute_etag, conditional_get
+from backend.app.core.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
+from backend.app.core.sanitize import POLICY_VERSION, clean_post_html
+from backend.app.db import engine, get_session
+from backend.app.db.resanitize import resanitize_job
+from backend.app.db.versioning import get_table_versions
 from backend.app.models import Post
-from backend.app.schemas.post import PostResponse, PostCreate, PostUpdate
+from backend.app.schemas.post import PostResponse, PostCreate, PostUpdate, PostResanitizeStatus
 from fastapi.responses import HTMLResponse
-import bleach
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def store_sanitized_html(post: Post) -> bool:
+    """
+    Sanitize `post.content` and store the result with the policy version.
+
+    If sanitizing fails, both are cleared instead, so the render path and the
+    resanitize job retry the post. Returns whether sanitized HTML was stored.
+    """
+    content_html = clean_post_html(post.content)
+    if content_html is None:
+        post.content_html = None
+        post.sanitizer_version = None
+        return False
+    post.content_html = content_html
+    post.sanitizer_version = POLICY_VERSION
+
+    # Auditoría ligera: detectar sanitizaciones agresivas
+    if post.content and len(post.content_html) < (len(post.content) // 2):
+        logger.info("Sanitización intensa: contenido reducido para post_id=%s", post.id)
+    return True
+
+
 @router.get("/", response_model=List[PostResponse])
 def list_posts(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
     post_type: str = Query(None),
     status: str = Query(None),
     session: Session = Depends(get_session)
 ):
-    """List all posts with optional filtering."""
-    statement = select(Post).offset(skip).limit(limit)
+    """
+    List all posts with optional filtering.
+
+    Supports offset (`skip`) or keyset (`cursor`) pagination. When more rows
+    may follow, the cursor for the next page is sent in the X-Next-Cursor header.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+
+    keyset = (Post.id,)
+    statement = select(Post)
 
     if post_type:
         statement = statement.where(Post.post_type == post_type)
     if status:
         statement = statement.where(Post.status == status)
 
+    statement = apply_keyset(statement, keyset, cursor).offset(skip).limit(limit)
     posts = session.exec(statement).all()
+
+    next_page = next_cursor(posts, keyset, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
     return posts
 
 
+@router.post("/resanitize", response_model=PostResanitizeStatus, status_code=202)
+def start_resanitize(
+    background_tasks: BackgroundTasks,
+    workers: Optional[int] = Query(None, ge=1, le=32, description="Worker processes (default: CPU count)"),
+    chunk_size: int = Query(100, ge=1, le=1000),
+):
+    """
+    Re-sanitize all posts stored under an outdated sanitizer policy.
+
+    Runs in the background across a process pool; poll
+    `GET /resanitize` for progress.
+    """
+    if not resanitize_job.start():
+        raise HTTPException(status_code=409, detail="Re-sanitization already running")
+    background_tasks.add_task(resanitize_job.run, engine, workers=workers, chunk_size=chunk_size)
+    return resanitize_job.status
+
+
+@router.get("/resanitize", response_model=PostResanitizeStatus)
+def resanitize_status():
+    """Progress of the current or last re-sanitization run."""
+    return resanitize_job.status
+
+
 @router.get("/{post_id}", response_model=PostResponse)
 def get_post(post_id: int, session: Session = Depends(get_session)):
     """Get a single post by ID."""
@@ -60,6 +126,7 @@ def create_post(post: PostCreate, session: Session = Depends(get_session)):
         raise HTTPException(status_code=400, detail="Slug already exists")
 
     db_post = Post(**post.model_dump())
+    store_sanitized_html(db_post)
     session.add(db_post)
     session.commit()
     session.refresh(db_post)
@@ -80,6 +147,9 @@ def update_post(
     update_data = post_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_post, key, value)
+    if "content" in update_data:
+        store_sanitized_html(db_post)
+    db_post.updated_at = datetime.utcnow()
 
     session.add(db_post)
     session.commit()
@@ -99,44 +169,6 @@ def delete_post(post_id: int, session: Session = Depends(get_session)):
     return None
 
 
-# --- sanitización segura para contenido HTML de posts (mejorada) ---
-ALLOWED_TAGS = set(bleach.sanitizer.ALLOWED_TAGS) | {
-    "img", "figure", "figcaption", "details", "summary",
-    "table", "thead", "tbody", "tr", "th", "td", "caption",
-    "pre", "code", "meter", "progress", "blockquote", "caption"
-}
-
-ALLOWED_ATTRIBUTES = {
-    **bleach.sanitizer.ALLOWED_ATTRIBUTES,
-    "img": ["src", "alt", "width", "height", "loading"],
-    "a": ["href", "title", "target", "rel"],
-    "*": ["class", "id"]
-}
-
-# Protocols: esquemas válidos. No incluir "/" (no es necesario para rutas relativas).
-ALLOWED_PROTOCOLS = ["http", "https", "mailto", "tel"]
-
-
-def sanitize_post_html(html: str) -> str:
-    """
-    Limpia y normaliza HTML de posts para reducir riesgo XSS.
-    strip=True elimina etiquetas no permitidas.
-    En caso de error devuelve una cadena vacía segura.
-    """
-    try:
-        cleaned = bleach.clean(
-            html or "",
-            tags=list(ALLOWED_TAGS),
-            attributes=ALLOWED_ATTRIBUTES,
-            protocols=ALLOWED_PROTOCOLS,
-            strip=True
-        )
-        return cleaned
-    except Exception:
-        logger.exception("Error sanitizando HTML del post; devolviendo contenido vacío.")
-        return ""
-
-
 # Cabecera CSP por defecto (ajústala según tus necesidades)
 DEFAULT_CSP = (
     "default-src 'self'; "
@@ -149,24 +181,47 @@ DEFAULT_CSP = (
 
 
 @router.get("/{post_id}/render", response_class=HTMLResponse)
-def render_post(post_id: int, session: Session = Depends(get_session)):
+def render_post(
+    post_id: int,
+    request: Request,
+    etag: str = Depends(conditional_get("posts")),
+    session: Session = Depends(get_session)
+):
     """
     Devuelve el campo `content` del post COMO HTML (Content-Type: text/html).
     La salida se sanitiza para mitigar XSS y se devuelve con una CSP básica.
+
+    The sanitized HTML stored at write time is served as is; only rows
+    sanitized under an older policy (or never) are cleaned again, once.
     """
-    post = session.get(Post, post_id)
-    if not post:
+    stored = session.exec(
+        select(Post.content_html, Post.sanitizer_version).where(Post.id == post_id)
+    ).first()
+    if not stored:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    safe_html = sanitize_post_html(post.content)
-
-    # Auditoría ligera: detectar sanitizaciones agresivas
-    if post.content and len(safe_html) < (len(post.content) // 2):
-        logger.info("Sanitización intensa: contenido reducido para post_id=%s", post_id)
+    safe_html, version = stored
+    sanitized = True
+    if safe_html is None or version != POLICY_VERSION:
+        post = session.get(Post, post_id)
+        sanitized = store_sanitized_html(post)
+        if sanitized:
+            session.add(post)
+            session.commit()
+            # The write bumped the posts version: tag the body with the new one,
+            # which the next conditional request will compute too
+            etag = compute_etag(request, get_table_versions(session, ["posts"]))
+        # On failure nothing is stored and the next request retries; this one gets nothing unsafe
+        safe_html = post.content_html or ""
 
     headers = {
         "Content-Security-Policy": DEFAULT_CSP,
         "X-Frame-Options": "DENY",
     }
+    if sanitized:
+        headers.update({"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    else:
+        # Must not be revalidated as fresh: the table version did not move
+        headers["Cache-Control"] = "no-store"
 
     return HTMLResponse(content=safe_html, status_code=200, headers=headers)
@@ -1,42 +1,287 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlmodel import Session, select
-from typing import List
-from backend.app.db import get_session
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select as sa_select
+from sqlmodel import Session, false, select
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Literal, Optional
+import io
+import json
+from backend.app.core.cache import CacheBackend, MemoryCache
+from backend.app.core.config import settings
+from backend.app.core.etag import conditional_get
+from backend.app.core.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
+from backend.app.db import engine, get_session, search
+from backend.app.db.bulk_update import bulk_update_products
+from backend.app.db.export_products import MEDIA_TYPES, ExportCursor, export_products, json_default
+from backend.app.db.facets import get_facet_counts
+from backend.app.db.import_products import detect_format, import_products, iter_records
 from backend.app.models import Product
-from backend.app.schemas.product import ProductResponse, ProductCreate, ProductUpdate
+from backend.app.schemas.product import (
+    ProductResponse, ProductCreate, ProductUpdate, ProductImportReport,
+    ProductStockUpdate, ProductBulkUpdateReport, ProductFilters
+)
 
 router = APIRouter()
+products_etag = Depends(conditional_get("products"))
 
+# Named field sets for `GET /products/?view=`; None selects full objects
+PRODUCT_VIEWS: dict[str, Optional[list[str]]] = {
+    "card": ["id", "title", "slug", "price", "currency", "image"],
+    "full": None,
+}
 
-@router.get("/", response_model=List[ProductResponse])
+# Read-through cache for single-product lookups, keyed by id and by slug.
+# Replace with a shared CacheBackend to share entries between workers.
+product_cache: CacheBackend = MemoryCache(
+    max_size=settings.product_cache_max_size,
+    ttl=settings.product_cache_ttl_seconds,
+)
+
+
+def _cache_product(product: Product, epoch: int) -> dict:
+    """Serialize a product and cache it under both its id and slug keys."""
+    data = ProductResponse.model_validate(product).model_dump(mode="json")
+    product_cache.set(f"product:id:{product.id}", data, epoch=epoch)
+    product_cache.set(f"product:slug:{product.slug}", data, epoch=epoch)
+    return data
+
+
+def _invalidate_product(product_id: int, *slugs: str) -> None:
+    """Drop cached entries for a product under its id and every given slug."""
+    product_cache.delete(f"product:id:{product_id}", *(f"product:slug:{slug}" for slug in slugs))
+
+
+def _invalidate_products(products: list[tuple[int, str]]) -> None:
+    """Drop cached entries for a batch of (id, slug) pairs."""
+    for product_id, slug in products:
+        _invalidate_product(product_id, slug)
+
+
+def product_filters(
+    price_min: Optional[Decimal] = Query(None, ge=0, description="Minimum price (inclusive)"),
+    price_max: Optional[Decimal] = Query(None, ge=0, description="Maximum price (inclusive)"),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    in_stock: Optional[bool] = Query(None, description="Only products with stock > 0 (or = 0 if false)"),
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="Free-text filter"),
+) -> ProductFilters:
+    """Collect the listing filters from the query string."""
+    return ProductFilters(price_min=price_min, price_max=price_max, currency=currency, in_stock=in_stock, q=q)
+
+
+def _product_conditions(session: Session, filters: ProductFilters) -> list:
+    """WHERE clauses for active products matching the listing filters."""
+    conditions = [Product.is_active == True]
+
+    if filters.price_min is not None:
+        conditions.append(Product.price >= filters.price_min)
+    if filters.price_max is not None:
+        conditions.append(Product.price <= filters.price_max)
+    if filters.currency:
+        conditions.append(Product.currency == filters.currency.upper())
+    if filters.in_stock is not None:
+        conditions.append(Product.stock > 0 if filters.in_stock else Product.stock == 0)
+    if filters.q:
+        matches = search.matching_ids(session, filters.q)
+        conditions.append(Product.id.in_(matches) if matches is not None else false())
+
+    return conditions
+
+
+def _product_page(
+    session: Session,
+    filters: ProductFilters,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    columns: Optional[list[str]] = None,
+) -> tuple[list, Optional[str]]:
+    """
+    Fetch one page of filtered products and the cursor for the next page.
+
+    With `columns`, only those columns are selected and plain rows are
+    returned instead of `Product` objects.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+
+    if columns is None:
+        statement = select(Product)
+    else:
+        statement = sa_select(*(getattr(Product, name) for name in columns))
+    statement = statement.where(*_product_conditions(session, filters))
+
+    keyset = (Product.id,)
+    statement = apply_keyset(statement, keyset, cursor)
+    products = session.exec(statement.offset(skip).limit(limit)).all()
+    return products, next_cursor(products, keyset, limit)
+
+
+def _projected_columns(fields: Optional[str], view: Optional[str]) -> Optional[list[str]]:
+    """Resolve `fields`/`view` to the columns to select, or None for full objects."""
+    if fields and view:
+        raise HTTPException(status_code=400, detail="Use either fields or view, not both")
+    if view:
+        return PRODUCT_VIEWS[view]
+    if not fields:
+        return None
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(ProductResponse.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned; keyset pagination needs it
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+
+def _projection_response(rows: list, response: Response) -> Response:
+    """Serialize projected rows directly, keeping headers set by dependencies."""
+    body = json.dumps([row._asdict() for row in rows], default=json_default, separators=(",", ":"))
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/", response_model=List[ProductResponse], dependencies=[products_etag])
 def list_products(
+    response: Response,
+    filters: ProductFilters = Depends(product_filters),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,price"),
+    view: Optional[Literal["card", "full"]] = Query(None, description="Named field set"),
     session: Session = Depends(get_session)
 ):
-    """List all products with pagination."""
-    statement = select(Product).where(Product.is_active == True).offset(skip).limit(limit)
-    products = session.exec(statement).all()
+    """
+    List all products with pagination and optional filters.
+
+    Supports offset (`skip`) or keyset (`cursor`) pagination. When more rows
+    may follow, the cursor for the next page is sent in the X-Next-Cursor header.
+
+    `fields` or `view=card` return only the chosen fields (plus `id`); those
+    columns alone are selected and rows are serialized without building
+    `Product` objects.
+    """
+    columns = _projected_columns(fields, view)
+    products, next_page = _product_page(session, filters, skip, limit, cursor, columns)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if columns is not None:
+        return _projection_response(products, response)
     return products
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
+@router.get("/catalog", dependencies=[products_etag])
+def browse_catalog(
+    response: Response,
+    filters: ProductFilters = Depends(product_filters),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(24, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    session: Session = Depends(get_session)
+):
+    """
+    Filtered product listing with facet counts for category pages.
+
+    Facet counts (price buckets, stock availability, currency) follow the
+    currency, price and stock filters; each facet ignores its own filter.
+    They are derived from a precomputed cube, not aggregated per request;
+    see `backend.app.db.facets` for the price granularity and `q`.
+
+    As on the list endpoint, the next page cursor is sent in X-Next-Cursor.
+    """
+    products, next_page = _product_page(session, filters, skip, limit, cursor)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    facets, fresh = get_facet_counts(session, filters)
+    if not fresh:
+        # Counts lag the ETag's version until the background refresh lands
+        del response.headers["etag"]
+        response.headers["cache-control"] = "no-store"
+    return {
+        "products": [ProductResponse.model_validate(product) for product in products],
+        "count": len(products),
+        "facets": facets,
+    }
+
+
+@router.get("/search", response_model=List[ProductResponse], dependencies=[products_etag])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session)
+):
+    """
+    Full-text search over product title and description.
+
+    Matching is accent-insensitive and every term is treated as a prefix;
+    results are ranked by relevance, title matches first.
+    """
+    return search.search_products(session, q, skip=skip, limit=limit)
+
+
+@router.get("/export")
+def export_catalog(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    updated_since: Optional[datetime] = Query(None, description="Only products updated after this time"),
+    after_id: Optional[int] = Query(
+        None, description="With updated_since: resume after this product (same updated_at, higher id, come next)"
+    ),
+    include_inactive: bool = Query(False, description="Also export inactive products (e.g. to sync removals)"),
+):
+    """
+    Stream the whole catalog as NDJSON or CSV.
+
+    Rows are read from a server-side cursor and streamed in `updated_at`
+    order, so memory use is independent of catalog size. Pass the
+    `updated_at` and `id` of the last row received as `updated_since` and
+    `after_id` to fetch only later changes, or to resume an interrupted
+    download; bulk writes give many rows the same `updated_at`.
+    """
+    if after_id is not None and updated_since is None:
+        raise HTTPException(status_code=400, detail="after_id requires updated_since")
+    filename = f"products.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        export_products(engine, format, gzip, ExportCursor(updated_since, after_id), include_inactive=include_inactive),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
+@router.get("/{product_id}", response_model=ProductResponse, dependencies=[products_etag])
 def get_product(product_id: int, session: Session = Depends(get_session)):
     """Get a single product by ID."""
+    cached = product_cache.get(f"product:id:{product_id}")
+    if cached is not None:
+        return cached
+
+    epoch = product_cache.current_epoch()
     product = session.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return _cache_product(product, epoch)
 
 
-@router.get("/slug/{slug}", response_model=ProductResponse)
+@router.get("/slug/{slug}", response_model=ProductResponse, dependencies=[products_etag])
 def get_product_by_slug(slug: str, session: Session = Depends(get_session)):
     """Get a single product by slug."""
+    cached = product_cache.get(f"product:slug:{slug}")
+    if cached is not None:
+        return cached
+
+    epoch = product_cache.current_epoch()
     statement = select(Product).where(Product.slug == slug)
     product = session.exec(statement).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return _cache_product(product, epoch)
 
 
 @router.post("/", response_model=ProductResponse, status_code=201)
@@ -44,11 +289,59 @@ def create_product(product: ProductCreate, session: Session = Depends(get_sessio
     """Create a new product."""
     db_product = Product(**product.model_dump())
     session.add(db_product)
+    session.flush()
+    search.index_product(session, db_product)
     session.commit()
     session.refresh(db_product)
     return db_product
 
 
+@router.post("/import", response_model=ProductImportReport)
+def import_products_feed(
+    file: UploadFile = File(..., description="NDJSON or CSV product feed"),
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Defaults to detection by filename"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+):
+    """
+    Bulk import products, upserting by slug.
+
+    The feed is streamed and written in batched transactions. Invalid rows
+    are skipped and listed in the report with their line number.
+    """
+    fmt = format or detect_format(file.filename, file.content_type)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_products(
+            iter_records(stream, fmt),
+            engine,
+            batch_size=batch_size,
+            on_batch=_invalidate_products,
+        )
+    finally:
+        stream.detach()
+
+
+@router.patch("/bulk", response_model=ProductBulkUpdateReport)
+def bulk_update_stock(
+    items: List[ProductStockUpdate],
+    session: Session = Depends(get_session)
+):
+    """
+    Update stock, price and/or is_active for many products at once.
+
+    Items are identified by `id` or `slug`. All items are applied in a single
+    transaction using set-based UPDATEs; unknown products are reported as
+    `not_found` without failing the batch.
+    """
+    if len(items) > 10000:
+        raise HTTPException(status_code=413, detail="Maximum 10000 items per request")
+
+    report, updated = bulk_update_products(session.connection(), items)
+    session.commit()
+    _invalidate_products(updated)
+    return report
+
+
 @router.patch("/{product_id}", response_model=ProductResponse)
 def update_product(
     product_id: int,
@@ -60,12 +353,18 @@ def update_product(
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    old_slug = db_product.slug
     update_data = product_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_product, key, value)
+    db_product.updated_at = datetime.utcnow()
 
     session.add(db_product)
+    if update_data.keys() & {"title", "description", "is_active"}:
+        session.flush()
+        search.index_product(session, db_product)
     session.commit()
+    _invalidate_product(product_id, old_slug, db_product.slug)
     session.refresh(db_product)
     return db_product
 
@@ -78,6 +377,9 @@ def delete_product(product_id: int, session: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Product not found")
 
     db_product.is_active = False
+    db_product.updated_at = datetime.utcnow()
     session.add(db_product)
+    search.remove_product(session, product_id)
     session.commit()
+    _invalidate_product(product_id, db_product.slug)
     return None
@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Optional, Literal
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
+from backend.app.core.etag import conditional_get
 from backend.app.db.session import get_session
 from backend.app.models.page_section import (
     PageSection,
@@ -14,9 +15,10 @@ from backend.app.models.page_section import (
 )
 
 router = APIRouter()
+sections_etag = Depends(conditional_get("page_sections"))
 
 
-@router.get("/")
+@router.get("/", dependencies=[sections_etag])
 def list_sections(
     page: Optional[str] = Query(None, description="Filter by page"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
@@ -67,7 +69,7 @@ def create_section(
     return section
 
 
-@router.get("/{section_id}")
+@router.get("/{section_id}", dependencies=[sections_etag])
 def get_section(
     section_id: int,
     session: Session = Depends(get_session)
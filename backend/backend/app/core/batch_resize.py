@@ -0,0 +1,256 @@
+"""
+Batch image resizer.
+
+Walks an image tree recursively and writes every image at one or more
+sizes (longest side, never upscaled) and formats, using a process pool
+across all cores. Outputs go to `<output>/<size>/<relative path>.<format>`,
+keeping the source extension so `a.png` and `a.jpg` do not collide
+("original" keeps the source path and format).
+
+A manifest in the output directory records each source's mtime, size and
+SHA-256 together with the sizes and formats it was rendered with. Files
+whose mtime and size are unchanged are skipped without being read; files
+that were only touched (same hash) are skipped after hashing in a worker.
+
+Usage (from the backend/ directory):
+    python -m backend.app.core.batch_resize
+    python -m backend.app.core.batch_resize backend/static/uploads --size 256 --size 1024 --format webp --format original
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from PIL import Image, ImageOps
+
+from backend.app.core.images import OUTPUT_FORMATS, can_encode
+from backend.app.core.storage import PUBLIC_FILE_MODE
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+ORIGINAL = "original"
+MANIFEST = ".manifest.json"
+
+# Source extension -> OUTPUT_FORMATS key when re-encoding in the original format
+EXTENSION_FORMATS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp"}
+
+Output = tuple[str, int, Optional[str]]  # (target path, size, format key or None for Pillow's default)
+
+
+@dataclass
+class ResizeStats:
+    scanned: int = 0
+    skipped: int = 0
+    resized: int = 0
+    failed: int = 0
+    outputs: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    elapsed_seconds: float = 0.0
+
+    def summary(self, workers: int) -> str:
+        rate = self.resized / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        mib_in = self.bytes_in / 1024 / 1024
+        throughput = mib_in / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        return (
+            f"{self.scanned} images: {self.resized} resized, {self.skipped} unchanged, {self.failed} failed; "
+            f"{self.outputs} files written ({self.bytes_out / 1024 / 1024:.1f} MiB from {mib_in:.1f} MiB) "
+            f"in {self.elapsed_seconds:.2f}s with {workers} workers - {rate:.1f} images/s, {throughput:.1f} MiB/s"
+        )
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resize_file(source: str, outputs: list[Output], known_sha256: Optional[str]) -> tuple[str, Optional[int]]:
+    """
+    Render `source` to every output, opening it once. Runs in a worker process.
+
+    Returns (sha256, bytes written); bytes is None when the content matches
+    `known_sha256` and every output already exists.
+    """
+    sha256 = file_sha256(source)
+    if sha256 == known_sha256 and all(os.path.exists(target) for target, _, _ in outputs):
+        return sha256, None
+
+    written = 0
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    for target, size, fmt in sorted(outputs, key=lambda output: -output[1]):
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if fmt is None:
+            pil_format, options = original.format, {"optimize": True} if original.format in ("PNG", "JPEG") else {}
+        else:
+            pil_format, _, options = OUTPUT_FORMATS[fmt]
+        if pil_format == "JPEG" and resized.mode not in ("RGB", "L"):
+            resized = resized.convert("RGB")
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".resize-")
+        os.fchmod(fd, PUBLIC_FILE_MODE)
+        os.close(fd)
+        try:
+            resized.save(temp, format=pil_format, **options)
+            os.replace(temp, target)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+        written += os.path.getsize(target)
+    return sha256, written
+
+
+def iter_images(directory: Path, skip: Optional[Path] = None) -> Iterator[os.DirEntry]:
+    """Image files below `directory` (recursively, hidden entries and `skip` excluded)."""
+    with os.scandir(directory) as scan:
+        entries = sorted(scan, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if skip is None or Path(entry.path).resolve() != skip:
+                yield from iter_images(Path(entry.path), skip)
+        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+            yield entry
+
+
+def _outputs(relative: str, output_dir: Path, sizes: list[int], formats: list[str]) -> list[Output]:
+    extension = os.path.splitext(relative)[1]
+    outputs = []
+    for size in sizes:
+        for fmt in formats:
+            if fmt == ORIGINAL:
+                outputs.append((str(output_dir / str(size) / relative), size, EXTENSION_FORMATS.get(extension.lower())))
+            else:
+                # a.png -> a.png.webp: sources differing only in extension get distinct targets
+                outputs.append((str(output_dir / str(size) / f"{relative}.{fmt}"), size, fmt))
+    return outputs
+
+
+def _load_manifest(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(path: Path, manifest: dict) -> None:
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=".manifest-")
+    with os.fdopen(fd, "w", encoding="utf-8") as out:
+        json.dump(manifest, out)
+    os.replace(temp, path)
+
+
+def resize_tree(
+    source_dir: Path,
+    output_dir: Path,
+    sizes: list[int],
+    formats: list[str],
+    workers: Optional[int] = None,
+    force: bool = False,
+    on_error=None,
+) -> ResizeStats:
+    """Resize every changed image under `source_dir`; see the module docstring."""
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST
+    manifest = {} if force else _load_manifest(manifest_path)
+    config = {"sizes": sorted(sizes), "formats": sorted(formats)}
+    stats = ResizeStats()
+    # Rebuilt from the files seen, so deleted sources drop out
+    seen: dict[str, dict] = {}
+    completed = False
+
+    def finish(relative: str, stat: os.stat_result, future: Future, outputs: list[Output]) -> None:
+        try:
+            sha256, written = future.result()
+        except Exception as error:
+            stats.failed += 1
+            if on_error:
+                on_error(relative, error)
+            return
+        if written is None:
+            stats.skipped += 1
+        else:
+            stats.resized += 1
+            stats.outputs += len(outputs)
+            stats.bytes_in += stat.st_size
+            stats.bytes_out += written
+        seen[relative] = {
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256, **config,
+        }
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for entry in iter_images(source_dir, skip=output_dir.resolve()):
+                stats.scanned += 1
+                relative = os.path.relpath(entry.path, source_dir).replace(os.sep, "/")
+                stat = entry.stat()
+                outputs = _outputs(relative, output_dir, sizes, formats)
+                known = manifest.get(relative, {})
+                if (
+                    known.get("mtime_ns") == stat.st_mtime_ns
+                    and known.get("size") == stat.st_size
+                    and all(known.get(key) == value for key, value in config.items())
+                    and all(os.path.exists(target) for target, _, _ in outputs)
+                ):
+                    stats.skipped += 1
+                    seen[relative] = known
+                    continue
+                same_config = all(known.get(key) == value for key, value in config.items())
+                future = pool.submit(resize_file, entry.path, outputs, known.get("sha256") if same_config else None)
+                pending.append((relative, stat, future, outputs))
+                # Bound the queued work so huge trees do not pile up futures
+                if len(pending) >= workers * 4:
+                    finish(*pending.popleft())
+            while pending:
+                finish(*pending.popleft())
+        completed = True
+    finally:
+        # An interrupted run keeps what it has not revisited yet
+        _save_manifest(manifest_path, seen if completed else {**manifest, **seen})
+        stats.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resize an image tree to several sizes and formats, in parallel.")
+    parser.add_argument("source", type=Path, nargs="?", default=Path("backend/static/uploads"))
+    parser.add_argument("--output", type=Path, default=Path("backend/static/resized"))
+    parser.add_argument("--size", type=int, action="append", help="Longest side in pixels (repeatable; default 256)")
+    parser.add_argument(
+        "--format", action="append", choices=[*OUTPUT_FORMATS, ORIGINAL],
+        help="Output format (repeatable; default webp). 'original' keeps the source format",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and resize everything")
+    args = parser.parse_args()
+
+    formats = args.format or ["webp"]
+    unsupported = [fmt for fmt in formats if fmt != ORIGINAL and not can_encode(fmt)]
+    if unsupported:
+        parser.error(f"this Pillow build cannot encode: {', '.join(unsupported)}")
+
+    workers = args.workers or os.cpu_count() or 1
+    stats = resize_tree(
+        args.source, args.output, args.size or [256], formats, workers, args.force,
+        on_error=lambda relative, error: print(f"Failed: {relative}: {error}"),
+    )
+    print(stats.summary(workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+In-process caching primitives.
+
+`CacheBackend` defines the small interface the application relies on, so the
+in-memory `MemoryCache` can later be swapped for a shared store (Redis,
+memcached) without touching the callers. Cached values must be plain
+JSON-compatible data so any backend can hold them.
+
+`BytesLRUCache` is a separate in-process LRU for raw bytes (compressed
+response bodies), bounded by entries and total size. `DiskLRUCache` holds generated files (resized images) under a byte budget,
+and `SingleFlight` collapses concurrent identical computations into one.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CacheBackend(ABC):
+    """Interface for key/value caches with TTLs and explicit invalidation."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, epoch: Optional[int] = None) -> None:
+        """
+        Store a value.
+
+        If `epoch` is given and any invalidation happened since it was read
+        with `current_epoch()`, the value may be stale and is not stored.
+        """
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        """Invalidate keys and advance the invalidation epoch."""
+
+    @abstractmethod
+    def current_epoch(self) -> int:
+        """Return the invalidation epoch; read it before loading a value to cache."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and current size."""
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe, size-bounded LRU cache with per-entry TTLs.
+
+    Entries are evicted least-recently-used first once `max_size` is reached;
+    expired entries are dropped lazily when read.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, epoch: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def current_epoch(self) -> int:
+        with self._lock:
+            return self._epoch
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class BytesLRUCache:
+    """
+    Thread-safe in-process LRU of byte strings, bounded by entry count and
+    total bytes. Not a `CacheBackend`: values are raw bytes, which shared
+    backends would need to encode.
+    """
+
+    def __init__(self, max_size: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[key] = value
+            self.total_bytes += len(value)
+            while len(self._entries) > self.max_size or self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class DiskLRUCache:
+    """
+    Thread-safe LRU of files in a directory, bounded by total size in bytes.
+
+    A file is produced at `temp_path(key)` and published with `put`, which
+    renames it into place and evicts least-recently-used files until the
+    cache fits `max_bytes` again. The index is rebuilt from the directory on
+    start (oldest modification first), and hits touch the file's mtime, so
+    recency survives restarts.
+    """
+
+    def __init__(self, directory: "str | os.PathLike[str]", max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.rglob("*"):
+            if not path.is_file():
+                continue
+            if path.name.startswith("."):
+                # Leftover from an interrupted write
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def temp_path(self, key: str) -> Path:
+        """A unique temporary path on the cache's filesystem to render `key` into."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f".{key}.{uuid.uuid4().hex}.part")
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of the cached file, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Removed behind our back
+            with self._lock:
+                self.total_bytes -= self._entries.pop(key, 0)
+            return None
+        return path
+
+    def put(self, key: str, temp_path: Path) -> Path:
+        """Move a rendered file into the cache and evict down to the byte budget."""
+        path = self.path(key)
+        os.replace(temp_path, path)
+        size = path.stat().st_size
+        evicted = []
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            self.path(old_key).unlink(missing_ok=True)
+        return path
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time (asyncio).
+
+    Callers arriving while a call for the same key is in flight await its
+    result instead of starting another. The shared call is shielded, so one
+    caller going away does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
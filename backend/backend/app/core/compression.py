@@ -0,0 +1,233 @@
+"""
+gzip / Brotli response compression.
+
+`CompressionMiddleware` negotiates an encoding from Accept-Encoding
+(Brotli preferred when the optional `brotli` package is installed) and
+compresses text-like responses above a minimum size. Complete bodies that
+carry an ETag are compressed once and kept in a bounded cache keyed by
+path, ETag and encoding, so repeat hits on unchanged resources skip the
+compression CPU. Streaming responses are compressed chunk by chunk and not
+cached. Partial (Range) responses are sent as is.
+
+Compressed responses get a weak ETag (`W/"..."`): the bytes differ per
+encoding, while If-None-Match revalidation keeps working because ETags are
+compared weakly (see `backend.app.core.etag`).
+"""
+import gzip
+import zlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.core.cache import BytesLRUCache
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/atom+xml",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def _supported_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def accepted_encodings(accept_encoding: str, encodings: Iterable[str]) -> list[str]:
+    """
+    Filter `encodings` (in order of preference) to those the client accepts,
+    highest q-value first.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    def weight(encoding: str) -> float:
+        return weights.get(encoding, weights.get("*", 0.0))
+
+    return sorted((encoding for encoding in encodings if weight(encoding) > 0), key=weight, reverse=True)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding allowed by an Accept-Encoding header."""
+    accepted = accepted_encodings(accept_encoding, _supported_encodings())
+    return accepted[0] if accepted else None
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def add_vary(headers: MutableHeaders, token: str) -> None:
+    """Add `token` to Vary unless it is already listed."""
+    existing = headers.get("vary", "")
+    names = {name.strip().lower() for name in existing.split(",")}
+    if token.lower() not in names and "*" not in names:
+        headers["Vary"] = f"{existing}, {token}" if existing else token
+
+
+def weak_etag(etag: str) -> str:
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class _StreamCompressor:
+    """Incremental compressor for one encoding."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._flush = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress, self._flush = self._compressor.compress, self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with gzip or Brotli."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        cache: Optional[BytesLRUCache] = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _CompressionResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+class _CompressionResponder:
+    """Per-request `send` wrapper holding back the start message until the body is seen."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: Optional[str], send: Send):
+        self.middleware = middleware
+        self.path = scope["path"]
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.started = False
+        self.compressor: Optional[_StreamCompressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            # e.g. http.response.pathsend: the server sends the file itself
+            if not self.started:
+                self.passthrough = True
+                await self._send_start()
+            await self.downstream(message)
+            return
+
+        if self.passthrough:
+            await self.downstream(message)
+        elif self.compressor:
+            await self._send_chunk(message)
+        else:
+            await self._send_first(message)
+
+    async def _send_first(self, message: Message) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        # Ranges describe identity bytes: compressing a 206 (or a 416) would break them
+        eligible = (
+            self.start["status"] not in (204, 206, 304, 416)
+            and "content-range" not in headers
+            and "content-encoding" not in headers
+            and is_compressible(headers.get("content-type", ""))
+        )
+        if eligible:
+            add_vary(headers, "Accept-Encoding")
+        if not eligible or not self.encoding or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self._send_start()
+            await self.downstream(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag:
+            headers["ETag"] = weak_etag(etag)
+
+        if more_body:
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            await self._send_start()
+            await self._send_chunk(message)
+            return
+
+        compressed = self._compress_body(body, etag)
+        headers["Content-Length"] = str(len(compressed))
+        await self._send_start()
+        await self.downstream({"type": "http.response.body", "body": compressed})
+
+    async def _send_start(self) -> None:
+        self.started = True
+        await self.downstream(self.start)
+
+    def _compress_body(self, body: bytes, etag: Optional[str]) -> bytes:
+        cache = self.middleware.cache
+        if cache is None or not etag:
+            return self.middleware.compress(body, self.encoding)
+
+        key = f"{self.encoding}:{self.path}:{etag}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = self.middleware.compress(body, self.encoding)
+            cache.set(key, compressed)
+        return compressed
+
+    async def _send_chunk(self, message: Message) -> None:
+        more_body = message.get("more_body", False)
+        data = self.compressor.compress(message.get("body", b""))
+        if not more_body:
+            data += self.compressor.finish()
+        if data or not more_body:
+            await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,69 @@
+"""
+Conditional GET support (ETag / If-None-Match).
+
+ETags are derived from the per-table version counters of the tables a
+response is built from, plus the request path and query string. Comparing
+them only needs a primary-key lookup on `table_versions`, so a matching
+If-None-Match is answered with 304 before any row is loaded or serialized.
+"""
+import hashlib
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlmodel import Session
+
+from backend.app.db import get_session
+from backend.app.db.versioning import get_table_versions
+
+# Bump when response serialization changes, so clients drop cached bodies
+ETAG_FORMAT_VERSION = "1"
+
+# Clients may store the body but must revalidate it before reuse
+CACHE_CONTROL = "no-cache"
+
+
+def compute_etag(request: Request, versions: dict[str, int]) -> str:
+    """Build a strong ETag for this request given the table versions."""
+    query = "&".join(sorted(str(request.query_params).split("&")))
+    state = ",".join(f"{name}={version}" for name, version in sorted(versions.items()))
+    digest = hashlib.sha1(
+        f"{ETAG_FORMAT_VERSION}|{request.url.path}?{query}|{state}".encode("utf-8")
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_get(*tables: str) -> Callable[..., str]:
+    """
+    Dependency factory adding ETag validation to a GET endpoint.
+
+    `tables` are the tables the response is built from. When the client's
+    If-None-Match matches, the request ends with 304 Not Modified before the
+    endpoint body runs; otherwise the ETag is attached to the response and
+    returned so endpoints building their own Response can copy it.
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        session: Session = Depends(get_session),
+    ) -> str:
+        etag = compute_etag(request, get_table_versions(session, tables))
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+    return dependency
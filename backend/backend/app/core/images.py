@@ -0,0 +1,243 @@
+"""
+Responsive image derivatives.
+
+Every stored raster image is re-encoded at several widths as WebP, plus AVIF
+when Pillow was built with an AVIF encoder. The EXIF orientation is applied
+first and then all metadata (EXIF, ICC, XMP) is dropped, which also keeps
+camera and location data off the public site. `render_resized` produces the
+arbitrary sizes requested through the on-demand resize endpoint. Encoding is
+CPU-bound, so it runs in a process pool, never on the event loop or the
+request threadpool.
+
+`extract_metadata` reads the dimensions, dominant colour and a tiny inline
+placeholder stored on each asset; it works on a reduced decode and is cheap
+enough for the request threadpool.
+"""
+import base64
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, TypedDict
+
+from PIL import Image, ImageFilter, ImageOps
+
+from backend.app.core.config import settings
+
+DERIVATIVE_WIDTHS = (320, 640, 1024, 1600)
+
+# name -> (Pillow format, MIME type, save options), best compression first
+FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 55, "speed": 6}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+}
+
+# Formats for on-demand resizes: the derivative formats plus the classics
+OUTPUT_FORMATS = {
+    **FORMATS,
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+
+# Vector or animated content is served as uploaded
+RASTER_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+# Longest side of the inline placeholder image, in pixels
+PLACEHOLDER_SIZE = 16
+
+ORIENTATION_TAG = 0x0112
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+class Derivative(TypedDict):
+    width: int
+    height: int
+    format: str
+    mime_type: str
+    file_path: str
+    file_size: int
+
+
+class ImageMetadata(TypedDict):
+    width: int
+    height: int
+    dominant_color: str
+    placeholder: str
+
+
+def derivative_formats() -> list[str]:
+    """The derivative formats this Pillow build can encode."""
+    return [name for name in FORMATS if can_encode(name)]
+
+
+def can_encode(fmt: str) -> bool:
+    Image.init()
+    return fmt in OUTPUT_FORMATS and OUTPUT_FORMATS[fmt][0] in Image.SAVE
+
+
+def derivative_path(stem: str, width: int, fmt: str) -> str:
+    return f"{stem}-{width}w.{fmt}"
+
+
+def target_widths(width: int, widths: tuple[int, ...] = DERIVATIVE_WIDTHS) -> list[int]:
+    """Widths below the original; an image narrower than all of them is only re-encoded."""
+    return [w for w in widths if w < width] or [width]
+
+
+def render_derivatives(
+    static_root: str,
+    source: str,
+    stem: str,
+    widths: tuple[int, ...] = DERIVATIVE_WIDTHS,
+    formats: Optional[list[str]] = None,
+) -> list[Derivative]:
+    """
+    Write the derivatives of `source` next to `stem` (both relative to
+    `static_root`) and describe them. Runs in a worker process.
+    """
+    formats = formats if formats is not None else derivative_formats()
+    root = Path(static_root)
+    results: list[Derivative] = []
+
+    with Image.open(root / source) as original:
+        if getattr(original, "is_animated", False):
+            return results
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    for width in target_widths(image.width, widths):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        for fmt in formats:
+            pil_format, mime_type, options = FORMATS[fmt]
+            relative = derivative_path(stem, width, fmt)
+            target = root / relative
+            temp = target.with_name(f".{target.name}.{os.getpid()}.part")
+            try:
+                # No exif/icc_profile arguments: the derivative carries no metadata
+                resized.save(temp, format=pil_format, **options)
+                os.replace(temp, target)
+            except BaseException:
+                temp.unlink(missing_ok=True)
+                raise
+            results.append(Derivative(
+                width=width,
+                height=height,
+                format=fmt,
+                mime_type=mime_type,
+                file_path=relative,
+                file_size=target.stat().st_size,
+            ))
+    return results
+
+
+def render_resized(
+    source: str,
+    target: str,
+    width: Optional[int],
+    height: Optional[int],
+    fit: str = "contain",
+    fmt: str = "webp",
+) -> None:
+    """
+    Write `source` resized to `target`, never upscaling. Runs in a worker process.
+
+    "contain" fits the image inside the box keeping its aspect ratio;
+    "cover" (both dimensions given) fills the box and crops the overflow,
+    centred. A missing dimension leaves that side unconstrained.
+    """
+    pil_format, _, options = OUTPUT_FORMATS[fmt]
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha and fmt != "jpeg" else "RGB")
+
+    if fit == "cover" and width and height:
+        # Shrink the box, keeping its aspect ratio, until it fits the original
+        scale = min(1.0, image.width / width, image.height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    else:
+        image.thumbnail((width or image.width, height or image.height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    try:
+        # No exif/icc_profile arguments: the output carries no metadata
+        image.save(target, format=pil_format, **options)
+    except BaseException:
+        Path(target).unlink(missing_ok=True)
+        raise
+
+
+def extract_metadata(source: str) -> Optional[ImageMetadata]:
+    """
+    Display size (EXIF orientation applied), dominant colour and a tiny
+    blurred WebP data URI (LQIP) of an image; None if it cannot be read.
+
+    JPEGs are decoded at a reduced scale, so this stays cheap for large photos.
+    """
+    try:
+        with Image.open(source) as original:
+            width, height = original.size
+            if original.getexif().get(ORIENTATION_TAG) in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            original.draft("RGB", (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))
+            image = ImageOps.exif_transpose(original)
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.LANCZOS)
+
+    # Most frequent colour of a small palette, ignoring transparent pixels
+    opaque = image.convert("RGB")
+    palette = opaque.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    counts = palette.getcolors() or [(1, 0)]
+    if has_alpha:
+        alpha = image.getchannel("A").getdata()
+        weights: dict[int, int] = {}
+        for index, a in zip(palette.getdata(), alpha):
+            weights[index] = weights.get(index, 0) + a
+        counts = [(weight, index) for index, weight in weights.items()] or counts
+    _, index = max(counts)
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+
+    buffer = io.BytesIO()
+    image.filter(ImageFilter.GaussianBlur(0.6)).save(buffer, format="WEBP", quality=40)
+    return ImageMetadata(
+        width=width,
+        height=height,
+        dominant_color=f"#{r:02x}{g:02x}{b:02x}",
+        placeholder="data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    )
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared image worker pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API server process runs threads
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.image_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,78 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination makes the database walk and discard every row before the
+requested page. Keyset pagination instead remembers the sort key of the last
+row returned and seeks straight past it, so every page costs the same.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the sort key
+values of the last row on the previous page.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort key values into an opaque cursor string."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> list[Any]:
+    """
+    Decode a cursor back into sort key values for the given columns.
+
+    Raises a 400 error if the cursor is malformed or does not match the
+    columns of the listing it is used with.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_keyset(statement, columns: Sequence[Any], cursor: Optional[str], descending: bool = False):
+    """
+    Order a statement by the keyset columns and seek past the cursor.
+
+    The columns must form a unique sort key (ending with the primary key)
+    and should be backed by an index so the seek is a range lookup.
+    """
+    if descending:
+        statement = statement.order_by(*(column.desc() for column in columns))
+    else:
+        statement = statement.order_by(*columns)
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key, bound = tuple_(*columns), tuple_(*values)
+        statement = statement.where(key < bound if descending else key > bound)
+
+    return statement
+
+
+def next_cursor(rows: Sequence[Any], columns: Sequence[Any], limit: int) -> Optional[str]:
+    """Build the cursor for the page after `rows`, or None on the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor([getattr(last, column.key) for column in columns])
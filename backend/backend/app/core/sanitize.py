@@ -0,0 +1,76 @@
+"""
+HTML sanitization policy for post content.
+
+Post HTML is sanitized once at write time and stored next to the raw
+content together with `POLICY_VERSION`, a fingerprint of the allow-lists
+and the bleach release. Changing the policy (or upgrading bleach) changes
+the fingerprint, which marks every stored copy as stale. A copy is never
+stored when sanitizing fails, so the post stays stale and is retried.
+"""
+import hashlib
+import json
+import logging
+from typing import Optional
+
+import bleach
+
+logger = logging.getLogger(__name__)
+
+# --- sanitización segura para contenido HTML de posts (mejorada) ---
+ALLOWED_TAGS = set(bleach.sanitizer.ALLOWED_TAGS) | {
+    "img", "figure", "figcaption", "details", "summary",
+    "table", "thead", "tbody", "tr", "th", "td", "caption",
+    "pre", "code", "meter", "progress", "blockquote", "caption"
+}
+
+ALLOWED_ATTRIBUTES = {
+    **bleach.sanitizer.ALLOWED_ATTRIBUTES,
+    "img": ["src", "alt", "width", "height", "loading"],
+    "a": ["href", "title", "target", "rel"],
+    "*": ["class", "id"]
+}
+
+# Protocols: esquemas válidos. No incluir "/" (no es necesario para rutas relativas).
+ALLOWED_PROTOCOLS = ["http", "https", "mailto", "tel"]
+
+
+def policy_fingerprint() -> str:
+    """Short hash identifying the current sanitizer policy."""
+    policy = {
+        "bleach": bleach.__version__,
+        "tags": sorted(ALLOWED_TAGS),
+        "attributes": {tag: sorted(attrs) for tag, attrs in ALLOWED_ATTRIBUTES.items()},
+        "protocols": sorted(ALLOWED_PROTOCOLS),
+    }
+    return hashlib.sha1(json.dumps(policy, sort_keys=True).encode()).hexdigest()[:16]
+
+
+POLICY_VERSION = policy_fingerprint()
+
+
+def clean_post_html(html: str) -> Optional[str]:
+    """
+    Limpia y normaliza HTML de posts para reducir riesgo XSS.
+    strip=True elimina etiquetas no permitidas.
+    Devuelve None si la sanitización falla, para no guardar el resultado.
+    """
+    try:
+        return bleach.clean(
+            html or "",
+            tags=list(ALLOWED_TAGS),
+            attributes=ALLOWED_ATTRIBUTES,
+            protocols=ALLOWED_PROTOCOLS,
+            strip=True
+        )
+    except Exception:
+        logger.exception("Error sanitizando HTML del post.")
+        return None
+
+
+def sanitize_post_html(html: str) -> str:
+    """
+    Como `clean_post_html`, pero en caso de error devuelve una cadena vacía
+    segura. Solo para mostrar: nunca se debe guardar como resultado válido.
+    """
+    cleaned = clean_post_html(html)
+    return cleaned if cleaned is not None else ""
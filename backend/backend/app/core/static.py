@@ -0,0 +1,160 @@
+"""
+Static file serving for /static.
+
+`CachedStaticFiles` extends Starlette's StaticFiles (which already handles
+byte ranges, ETag/Last-Modified revalidation and the ASGI pathsend
+extension) with:
+
+- `immutable` long-lived caching for content-named files (UUID or hash in
+  the filename, as given to every upload), a short max-age for the rest;
+- precompressed `.br` / `.gz` siblings, served with Content-Encoding when the
+  client accepts them and the sibling is not older than the original;
+- optional zero-copy offload to the reverse proxy (`X-Accel-Redirect` for
+  nginx, `X-Sendfile` for Apache/lighttpd), so file bytes never pass through
+  the Python worker.
+
+Precompressed siblings are produced with:
+    python -m backend.app.core.static backend/static
+"""
+import argparse
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from backend.app.core.compression import accepted_encodings, brotli, is_compressible
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+# A UUID or a 32-64 character hex digest as a filename component
+CONTENT_NAMED = re.compile(
+    r"(?:^|[._-])(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32,64})(?=[._-]|$)",
+    re.IGNORECASE,
+)
+
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def cache_control_for(path: str) -> str:
+    """Immutable caching for content-named files, a short max-age otherwise."""
+    return IMMUTABLE_CACHE_CONTROL if CONTENT_NAMED.search(os.path.basename(path)) else DEFAULT_CACHE_CONTROL
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with cache headers, precompressed variants and sendfile offload."""
+
+    def __init__(
+        self,
+        *args,
+        sendfile_header: Optional[str] = None,
+        sendfile_prefix: str = "/internal-static/",
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.sendfile_header = sendfile_header
+        self.sendfile_prefix = sendfile_prefix.rstrip("/") + "/"
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str] | str",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        headers = {"Cache-Control": cache_control_for(full_path)}
+
+        encoding = None
+        if is_compressible(media_type):
+            headers["Vary"] = "Accept-Encoding"
+            for candidate in accepted_encodings(request_headers.get("accept-encoding", ""), PRECOMPRESSED_SUFFIXES):
+                sibling = full_path + PRECOMPRESSED_SUFFIXES[candidate]
+                try:
+                    sibling_stat = os.stat(sibling)
+                except OSError:
+                    continue
+                if sibling_stat.st_mtime >= stat_result.st_mtime:
+                    full_path, stat_result, encoding = sibling, sibling_stat, candidate
+                    headers["Content-Encoding"] = candidate
+                    break
+
+        if self.sendfile_header and self.directory is not None:
+            return self._offload(full_path, stat_result, media_type, headers, request_headers, status_code)
+
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, media_type=media_type, headers=headers
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _offload(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        media_type: str,
+        headers: dict,
+        request_headers: Headers,
+        status_code: int,
+    ) -> Response:
+        """Hand the file to the proxy: empty body plus the sendfile header."""
+        # Reuse FileResponse for Last-Modified/ETag so validators stay identical
+        validators = FileResponse(full_path, stat_result=stat_result, media_type=media_type, headers=headers).headers
+        if self.is_not_modified(validators, request_headers):
+            return NotModifiedResponse(validators)
+
+        relative = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+        target = self.sendfile_prefix + relative if self.sendfile_header.lower() == "x-accel-redirect" else full_path
+        offload_headers = {
+            key: validators[key]
+            for key in ("cache-control", "vary", "content-encoding", "etag", "last-modified")
+            if key in validators
+        }
+        offload_headers[self.sendfile_header] = target
+        return Response(status_code=status_code, media_type=media_type, headers=offload_headers)
+
+
+def precompress(directory: Path, minimum_size: int = 500) -> int:
+    """Write .gz (and .br if available) siblings for compressible files; return files written."""
+    written = 0
+    encodings = ["gzip"] + (["br"] if brotli else [])
+    for path in directory.rglob("*"):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+        media_type = mimetypes.guess_type(path.name)[0] or ""
+        if not is_compressible(media_type) or path.stat().st_size < minimum_size:
+            continue
+        data = None
+        for encoding in encodings:
+            sibling = path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding])
+            if sibling.exists() and sibling.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            data = data if data is not None else path.read_bytes()
+            compressed = brotli.compress(data, quality=11) if encoding == "br" else gzip.compress(data, 9, mtime=0)
+            sibling.write_bytes(compressed)
+            written += 1
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompress static text assets (.gz, plus .br if brotli is installed).")
+    parser.add_argument("directory", type=Path, nargs="?", default=Path("backend/static"))
+    parser.add_argument("--minimum-size", type=int, default=500)
+    args = parser.parse_args()
+
+    written = precompress(args.directory, args.minimum_size)
+    print(f"Wrote {written} precompressed files under {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Streaming storage for uploaded files.
+
+Uploads are read in fixed-size chunks with non-blocking file I/O, hashed
+(SHA-256) on the fly and aborted as soon as they exceed the size limit.
+`hash_upload` only digests the upload, so known content can be recognised
+before anything is written; `stage_upload` copies it to a temporary file
+next to its final location, to be moved into place with an atomic rename
+so a partially written file is never visible under its public path.
+
+File types are identified from their leading bytes (`sniff_mime_type`),
+never from the client-supplied Content-Type or filename. Members of a zip
+archive are read through `ZipMemberUpload`, which offers the same async
+interface as an UploadFile.
+
+Files written through `tempfile.mkstemp` start out as 0600; anything
+published under the static root gets `PUBLIC_FILE_MODE` before its rename,
+so a proxy serving /static as another user can read it.
+"""
+import hashlib
+import os
+import uuid
+import zipfile
+from pathlib import Path
+from typing import NamedTuple, Optional, Protocol
+
+import aiofiles
+import aiofiles.os
+from starlette.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 64 * 1024
+
+# What open() would create: 0666 minus the umask (read once, at import, before any threads)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+PUBLIC_FILE_MODE = 0o666 & ~_UMASK
+
+# Bytes needed to recognise every supported type
+SNIFF_SIZE = 512
+
+MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+class AsyncReadable(Protocol):
+    """What the storage helpers need from an upload (UploadFile satisfies it)."""
+
+    async def read(self, size: int = -1) -> bytes: ...
+
+    async def seek(self, offset: int) -> None: ...
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """MIME type of a file from its first SNIFF_SIZE bytes; None if unrecognised."""
+    for magic, mime_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith((b"<svg", b"<?xml", b"<!doctype svg")) and b"<svg" in text:
+        return "image/svg+xml"
+    return None
+
+
+async def read_head(upload: AsyncReadable) -> bytes:
+    """The first SNIFF_SIZE bytes of an upload, rewinding it afterwards."""
+    head = await upload.read(SNIFF_SIZE)
+    await upload.seek(0)
+    return head
+
+
+class ZipMemberUpload:
+    """One member of an open zip archive, read in the threadpool like a spooled UploadFile."""
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+        self.archive = archive
+        self.info = info
+        self.filename = Path(info.filename).name
+        self._file = None
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._file is None:
+            self._file = await run_in_threadpool(self.archive.open, self.info)
+        return await run_in_threadpool(self._file.read, size)
+
+    async def seek(self, offset: int) -> None:
+        if self._file is not None:
+            await run_in_threadpool(self._file.seek, offset)
+
+    async def close(self) -> None:
+        if self._file is not None:
+            await run_in_threadpool(self._file.close)
+            self._file = None
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the size limit; nothing was kept on disk."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Upload exceeds {max_size} bytes")
+        self.max_size = max_size
+
+
+class StagedUpload(NamedTuple):
+    """An upload written to a temporary file, not yet in its final place."""
+    temp_path: Path
+    size: int
+    sha256: str
+
+
+async def hash_upload(upload: AsyncReadable, max_size: int) -> tuple[str, int]:
+    """
+    Return the (SHA-256, size) of `upload` without writing it anywhere, then
+    rewind it so it can still be staged.
+
+    Raises UploadTooLarge once more than `max_size` bytes have been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await upload.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise UploadTooLarge(max_size)
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest(), size
+
+
+async def stage_upload(upload: AsyncReadable, directory: Path, max_size: int) -> StagedUpload:
+    """
+    Copy `upload` into a temporary file in `directory`, hashing as it goes.
+
+    Raises UploadTooLarge (after removing the partial file) once more than
+    `max_size` bytes have been read.
+    """
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    temp_path = directory / f".upload-{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        await discard(temp_path)
+        raise
+    return StagedUpload(temp_path, size, digest.hexdigest())
+
+
+async def discard(path: Path) -> None:
+    """Remove a file if it exists."""
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -2,5 +2,6 @@
 Database configuration and session management.
 """
 from .session import engine, create_db_and_tables, get_session
+from . import versioning  # registers the table version flush hook
 
 __all__ = ["engine", "create_db_and_tables", "get_session"]
@@ -0,0 +1,279 @@
+"""
+Content-addressed, reference-counted storage for uploaded files.
+
+Each distinct file is stored once, under its SHA-256 digest
+(`uploads/cas/ab/cd/<digest><ext>` below the static root), and tracked by
+an AssetBlob row counting the assets that use it. Uploading content that is
+already stored only bumps the count; the file is unlinked when the last
+reference is released.
+
+References are taken before an asset row is written and released after it
+is deleted, so a crash in between leaves a count that is too high (the
+file is kept) rather than too low. Counts only change through atomic
+UPDATEs, and a blob is deleted only while its count is still zero, so
+workers in other processes cannot resurrect or unlink a blob under each
+other. Files are removed only after the deletion commits; since the same
+content may be stored again at the same path meanwhile, both sides check
+the file once their own commit is done and put it back if needed.
+
+Raster blobs also get responsive derivatives (see `backend.app.core.images`),
+rendered in the image process pool after the upload has been answered and
+removed together with the blob.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core import images
+from backend.app.core.storage import StagedUpload
+from backend.app.db.session import engine as default_engine
+from backend.app.db.versioning import bump_table_versions
+from backend.app.models import AssetBlob, AssetDerivative
+
+STATIC_ROOT = Path("backend/static")
+CAS_DIR = "uploads/cas"
+
+_lock = threading.RLock()
+
+logger = logging.getLogger(__name__)
+
+
+def blob_path(checksum: str, extension: str) -> str:
+    """Relative path (from the static root) of the file for a digest."""
+    return f"{CAS_DIR}/{checksum[:2]}/{checksum[2:4]}/{checksum}{extension}"
+
+
+def staging_dir() -> Path:
+    """Where uploads are staged: inside the store, so commits are a rename."""
+    return STATIC_ROOT / CAS_DIR
+
+
+def acquire(session: Session, checksum: str) -> Optional[AssetBlob]:
+    """Add a reference to a stored blob; None if the content is not stored yet."""
+    with _lock:
+        # One atomic UPDATE: never a read-then-write another worker can interleave with
+        result = session.execute(
+            update(AssetBlob).where(AssetBlob.checksum == checksum).values(ref_count=AssetBlob.ref_count + 1)
+        )
+        if result.rowcount != 1:
+            session.rollback()
+            return None
+        bump_table_versions(session.connection(), [AssetBlob.__tablename__])
+        session.commit()
+        return session.get(AssetBlob, checksum, populate_existing=True)
+
+
+def store(session: Session, staged: StagedUpload, extension: str, mime_type: str) -> AssetBlob:
+    """
+    Move a staged upload into the store as a blob with one reference.
+
+    If the same content was stored meanwhile, the staged file is dropped and
+    the existing blob gains the reference instead.
+    """
+    with _lock:
+        while True:
+            blob = acquire(session, staged.sha256)
+            if blob is not None:
+                # Same bytes: replacing also repairs a file lost to a concurrent release
+                full_path = STATIC_ROOT / blob.file_path
+                full_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(staged.temp_path, full_path)
+                return blob
+
+            relative_path = blob_path(staged.sha256, extension)
+            blob = AssetBlob(
+                checksum=staged.sha256,
+                file_path=relative_path,
+                file_size=staged.size,
+                mime_type=mime_type,
+                ref_count=1,
+            )
+            try:
+                # The uncommitted row holds the key: a concurrent release of the
+                # same content has finished unlinking before this flush returns
+                session.add(blob)
+                session.flush()
+            except IntegrityError:
+                # Another worker stored it first; reference theirs
+                session.rollback()
+                continue
+            break
+
+        full_path = STATIC_ROOT / relative_path
+        try:
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            # Publish a copy and keep the staged file until the row is committed
+            _place_copy(staged.temp_path, full_path)
+            session.commit()
+        except Exception:
+            session.rollback()
+            full_path.unlink(missing_ok=True)
+            raise
+        # A release of the same content that committed just before this store
+        # may have moved the published copy aside; the staged file replaces it
+        if full_path.exists():
+            staged.temp_path.unlink(missing_ok=True)
+        else:
+            os.replace(staged.temp_path, full_path)
+        session.refresh(blob)
+        return blob
+
+
+def _place_copy(source: Path, target: Path) -> None:
+    """Atomically put a copy of `source` at `target` (a hard link when possible)."""
+    temp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copyfile(source, temp)
+    os.replace(temp, target)
+
+
+def _remove_files(session: Session, paths: list[str]) -> None:
+    """
+    Remove the files of rows whose deletion has been committed.
+
+    The content may have been stored again since that commit. Files are
+    moved aside first and put back if a committed row claims their path
+    again; a store that committed before the move re-checks its own file.
+    """
+    moved = {}
+    for path in paths:
+        full_path = STATIC_ROOT / path
+        aside = full_path.with_name(f".{full_path.name}.{uuid.uuid4().hex}.deleted")
+        try:
+            os.replace(full_path, aside)
+        except FileNotFoundError:
+            continue
+        moved[path] = aside
+    if not moved:
+        return
+    claimed = set(session.exec(select(AssetBlob.file_path).where(AssetBlob.file_path.in_(moved))).all())
+    claimed.update(session.exec(select(AssetDerivative.file_path).where(AssetDerivative.file_path.in_(moved))).all())
+    session.rollback()
+    for path, aside in moved.items():
+        if path in claimed:
+            # Content-addressed: the bytes are the ones the new row expects
+            os.replace(aside, STATIC_ROOT / path)
+        else:
+            aside.unlink(missing_ok=True)
+
+
+def release(session: Session, checksum: str, delete_file: bool = True) -> bool:
+    """
+    Drop one reference to a blob. When it was the last one and `delete_file`
+    is set, remove the blob and its file. Returns True if the file was removed.
+    """
+    with _lock:
+        result = session.execute(
+            update(AssetBlob)
+            .where(AssetBlob.checksum == checksum, AssetBlob.ref_count > 0)
+            .values(ref_count=AssetBlob.ref_count - 1)
+        )
+        if result.rowcount != 1:
+            session.rollback()
+            return False
+        bump_table_versions(session.connection(), [AssetBlob.__tablename__])
+        session.commit()
+        if not delete_file:
+            return False
+
+        # Only an unreferenced row is deleted: an acquire since the decrement keeps it
+        unreferenced = (AssetBlob.checksum == checksum, AssetBlob.ref_count == 0)
+        file_path = session.exec(select(AssetBlob.file_path).where(*unreferenced)).first()
+        if file_path is None or session.execute(delete(AssetBlob).where(*unreferenced)).rowcount != 1:
+            session.rollback()
+            return False
+        derivative_paths = session.exec(
+            select(AssetDerivative.file_path).where(AssetDerivative.checksum == checksum)
+        ).all()
+        session.execute(delete(AssetDerivative).where(AssetDerivative.checksum == checksum))
+        bump_table_versions(session.connection(), [AssetBlob.__tablename__, AssetDerivative.__tablename__])
+        # Commit first: if it fails, the rolled-back row still has its file
+        session.commit()
+        _remove_files(session, [file_path, *derivative_paths])
+        return True
+
+
+def derivatives_for(session: Session, checksums: Iterable[Optional[str]]) -> dict[str, list[AssetDerivative]]:
+    """Derivatives of several blobs in one query, narrowest first."""
+    checksums = {checksum for checksum in checksums if checksum}
+    found: dict[str, list[AssetDerivative]] = {}
+    if not checksums:
+        return found
+    rows = session.exec(
+        select(AssetDerivative)
+        .where(AssetDerivative.checksum.in_(checksums))
+        .order_by(AssetDerivative.width)
+    )
+    for derivative in rows:
+        found.setdefault(derivative.checksum, []).append(derivative)
+    return found
+
+
+def _pending_render(checksum: str) -> Optional[tuple[str, str]]:
+    """(source, stem) of a raster blob without derivatives yet, else None."""
+    with Session(default_engine) as session:
+        blob = session.get(AssetBlob, checksum)
+        if blob is None or blob.mime_type not in images.RASTER_TYPES:
+            return None
+        if session.exec(select(AssetDerivative.id).where(AssetDerivative.checksum == checksum).limit(1)).first():
+            return None
+        return blob.file_path, os.path.splitext(blob.file_path)[0]
+
+
+def _record_derivatives(checksum: str, rendered: list[images.Derivative]) -> None:
+    """Save rendered derivatives, or drop their files if the blob is gone by now."""
+    with _lock, Session(default_engine) as session:
+        if session.get(AssetBlob, checksum) is not None:
+            session.add_all(AssetDerivative(checksum=checksum, **derivative) for derivative in rendered)
+            try:
+                session.commit()
+                return
+            except IntegrityError:
+                # Another process recorded the same files first
+                session.rollback()
+                return
+    for derivative in rendered:
+        (STATIC_ROOT / derivative["file_path"]).unlink(missing_ok=True)
+
+
+_rendering: set[str] = set()
+
+
+async def generate_derivatives(checksum: str) -> int:
+    """
+    Render and record the derivatives of a blob, unless it already has them
+    or is not a raster image. Returns the number of derivatives written.
+    """
+    if checksum in _rendering:
+        return 0
+    _rendering.add(checksum)
+    try:
+        pending = await run_in_threadpool(_pending_render, checksum)
+        if pending is None:
+            return 0
+        source, stem = pending
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(
+                images.get_pool(), images.render_derivatives, str(STATIC_ROOT), source, stem
+            )
+        except Exception:
+            # The original is still served; derivatives can be retried later
+            logger.exception("Rendering derivatives failed for blob %s", checksum)
+            return 0
+        await run_in_threadpool(_record_derivatives, checksum, rendered)
+        return len(rendered)
+    finally:
+        _rendering.discard(checksum)
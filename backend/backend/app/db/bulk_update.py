@@ -0,0 +1,119 @@
+"""
+Set-based bulk updates of product stock, price and visibility.
+
+Each chunk of items is applied with one statement joining the products table
+against an inline VALUES list:
+
+    WITH v(key, stock, price, is_active) AS (VALUES (...), (...))
+    UPDATE products SET ... FROM v WHERE products.id = v.key
+    RETURNING products.id, products.slug
+
+Items addressed by slug are resolved to ids first, so a product named by
+both its id and its slug is updated once. Fields left out of an item keep
+their current value. Requires SQLite 3.35+ (UPDATE ... FROM with RETURNING)
+or PostgreSQL.
+"""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import Integer, String, bindparam, select, text
+from sqlalchemy.engine import Connection
+
+from backend.app.db.search import index_rows
+from backend.app.db.versioning import bump_table_versions
+from backend.app.models import Product
+from backend.app.schemas.product import ProductBulkUpdateReport, ProductStockResult, ProductStockUpdate
+
+CHUNK_SIZE = 500
+
+_columns = Product.__table__.c
+
+
+def _update_chunk(conn: Connection, key: str, items: list[ProductStockUpdate], now: datetime) -> list[tuple[int, str]]:
+    """Apply one chunk keyed by `key` ("id" or "slug"); return matched (id, slug) pairs."""
+    key_sql = "INTEGER" if key == "id" else "VARCHAR(255)"
+    values, params = [], []
+    for n, item in enumerate(items):
+        values.append(
+            f"(CAST(:k{n} AS {key_sql}), CAST(:s{n} AS INTEGER),"
+            f" CAST(:p{n} AS NUMERIC(10, 2)), CAST(:a{n} AS BOOLEAN))"
+        )
+        params += [
+            bindparam(f"k{n}", getattr(item, key), type_=Integer() if key == "id" else String()),
+            bindparam(f"s{n}", item.stock, type_=_columns.stock.type),
+            bindparam(f"p{n}", item.price, type_=_columns.price.type),
+            bindparam(f"a{n}", item.is_active, type_=_columns.is_active.type),
+        ]
+
+    statement = text(
+        f"WITH v(key, stock, price, is_active) AS (VALUES {', '.join(values)})"
+        " UPDATE products SET"
+        " stock = COALESCE(v.stock, products.stock),"
+        " price = COALESCE(v.price, products.price),"
+        " is_active = COALESCE(v.is_active, products.is_active),"
+        " updated_at = :now"
+        f" FROM v WHERE products.{key} = v.key"
+        " RETURNING products.id, products.slug"
+    ).bindparams(*params, bindparam("now", now, type_=_columns.updated_at.type))
+    return [(row.id, row.slug) for row in conn.execute(statement)]
+
+
+def bulk_update_products(
+    conn: Connection,
+    items: Iterable[ProductStockUpdate],
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple[ProductBulkUpdateReport, list[tuple[int, str]]]:
+    """
+    Apply stock/price/is_active deltas within the caller's transaction.
+
+    Returns the per-item report and the (id, slug) pairs that were updated,
+    for cache invalidation once the transaction commits. When the same
+    product appears more than once (by id or by slug), the last item wins
+    and it is reported once.
+    """
+    items = list(items)
+    slugs = list({item.slug for item in items if item.id is None})
+    slug_ids: dict[str, int] = {}
+    for start in range(0, len(slugs), chunk_size):
+        rows = conn.execute(select(_columns.slug, _columns.id).where(_columns.slug.in_(slugs[start:start + chunk_size])))
+        slug_ids.update({row.slug: row.id for row in rows})
+
+    # One entry per product, last item wins; results follow first appearance
+    pending: dict[int, ProductStockUpdate] = {}
+    order: dict[tuple[str, object], None] = {}
+    for item in items:
+        product_id = item.id if item.id is not None else slug_ids.get(item.slug)
+        if product_id is None:
+            entry = ("slug", item.slug)
+        else:
+            entry = ("id", product_id)
+            pending[product_id] = item.model_copy(update={"id": product_id, "slug": None})
+        order.setdefault(entry)
+
+    now = datetime.utcnow()
+    matched: dict[int, tuple[int, str]] = {}
+    chunk_items = list(pending.values())
+    for start in range(0, len(chunk_items), chunk_size):
+        for product_id, slug in _update_chunk(conn, "id", chunk_items[start:start + chunk_size], now):
+            matched[product_id] = (product_id, slug)
+
+    if matched:
+        bump_table_versions(conn, ["products"])
+        # Reactivated products were dropped from the search index on delete
+        reactivated = [product_id for product_id in matched if pending[product_id].is_active]
+        if reactivated:
+            rows = conn.execute(
+                select(_columns.id, _columns.title, _columns.description).where(_columns.id.in_(reactivated))
+            )
+            index_rows(conn, [row._asdict() for row in rows])
+
+    report = ProductBulkUpdateReport()
+    for key, value in order:
+        pair = matched.get(value) if key == "id" else None
+        if pair:
+            report.updated += 1
+            report.results.append(ProductStockResult(id=pair[0], slug=pair[1], status="updated"))
+        else:
+            report.not_found += 1
+            report.results.append(ProductStockResult(**{key: value}, status="not_found"))
+    return report, sorted(matched.values())
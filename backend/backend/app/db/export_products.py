@@ -0,0 +1,189 @@
+"""
+Streaming full-catalog product export.
+
+Rows are read through a server-side cursor in `updated_at, id` order and
+written out one line at a time as NDJSON or CSV, optionally gzip-compressed,
+so memory stays constant regardless of catalog size. The `(updated_at, id)`
+of the last exported row is the cursor for the next incremental export:
+bulk updates and imports stamp many rows with the same `updated_at`, so the
+id is needed to resume inside such a group without skipping the rest of it.
+
+Usage (from the backend/ directory):
+    python -m backend.app.db.export_products catalog.ndjson
+    python -m backend.app.db.export_products catalog.csv.gz --updated-since 2025-10-01T00:00:00
+    python -m backend.app.db.export_products changes.ndjson --updated-since 2025-10-01T00:00:00 --after-id 1234
+"""
+import argparse
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Engine
+
+from backend.app.db import engine as default_engine
+from backend.app.models import Product
+
+EXPORT_COLUMNS = (
+    "id", "slug", "title", "description", "price", "currency", "image",
+    "stock", "is_active", "created_at", "updated_at",
+)
+# Rows fetched from the database cursor at a time
+YIELD_PER = 1000
+# Approximate size of each chunk handed to the response/file
+CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+_products = Product.__table__
+
+
+def json_default(value):
+    """`json.dumps` fallback matching the API encoding of decimals and datetimes."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+@dataclass
+class ExportCursor:
+    """
+    Keyset position in the `(updated_at, id)` export order.
+
+    Rows after `(updated_at, id)` come next; without an id, rows updated
+    strictly after `updated_at`. Empty, the export starts from the beginning.
+    """
+    updated_at: Optional[datetime] = None
+    id: Optional[int] = None
+
+
+def iter_product_rows(
+    engine: Engine,
+    cursor: Optional[ExportCursor] = None,
+    include_inactive: bool = False,
+) -> Iterator[dict]:
+    """
+    Yield products as dicts from a server-side cursor, oldest update first.
+
+    `cursor` is advanced past each row as it is yielded, so after a complete
+    or interrupted export it is the position to resume from.
+    """
+    updated_at, id_ = _products.c.updated_at, _products.c.id
+    statement = (
+        select(*(_products.c[column] for column in EXPORT_COLUMNS))
+        .order_by(updated_at, id_)
+    )
+    if cursor is not None and cursor.updated_at is not None:
+        if cursor.id is None:
+            statement = statement.where(updated_at > cursor.updated_at)
+        else:
+            statement = statement.where(tuple_(updated_at, id_) > tuple_(cursor.updated_at, cursor.id))
+    if not include_inactive:
+        statement = statement.where(_products.c.is_active == True)
+
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=YIELD_PER).execute(statement)
+        for row in result.mappings():
+            if cursor is not None:
+                cursor.updated_at, cursor.id = row["updated_at"], row["id"]
+            yield dict(row)
+
+
+def iter_ndjson(rows: Iterator[dict]) -> Iterator[str]:
+    """Render rows as NDJSON lines."""
+    for row in rows:
+        yield json.dumps(row, default=json_default, ensure_ascii=False) + "\n"
+
+
+def iter_csv(rows: Iterator[dict]) -> Iterator[str]:
+    """Render rows as CSV (header first) compatible with the product importer."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        row["is_active"] = "true" if row["is_active"] else "false"
+        row["created_at"] = row["created_at"].isoformat()
+        row["updated_at"] = row["updated_at"].isoformat()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_chunks(lines: Iterator[str], compress: bool = False) -> Iterator[bytes]:
+    """Join lines into ~CHUNK_SIZE byte chunks, gzip-compressing them if asked."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    pending: list[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            chunk = b"".join(pending)
+            pending.clear()
+            size = 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    tail = b"".join(pending)
+    if compressor:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
+
+
+def export_products(
+    engine: Engine,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    cursor: Optional[ExportCursor] = None,
+    include_inactive: bool = False,
+) -> Iterator[bytes]:
+    """Stream the catalog as encoded (and optionally gzipped) byte chunks; `cursor` advances as rows are read."""
+    rows = iter_product_rows(engine, cursor=cursor, include_inactive=include_inactive)
+    lines = iter_csv(rows) if fmt == "csv" else iter_ndjson(rows)
+    return iter_chunks(lines, compress=compress)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the product catalog as NDJSON or CSV.")
+    parser.add_argument("path", type=Path, help="Output file (.ndjson/.csv, add .gz to compress)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Override format detection")
+    parser.add_argument("--updated-since", type=datetime.fromisoformat, help="Only rows updated after this time")
+    parser.add_argument(
+        "--after-id", type=int,
+        help="With --updated-since: resume after this row (rows at exactly that time with a higher id are included)",
+    )
+    parser.add_argument("--include-inactive", action="store_true", help="Also export inactive products")
+    args = parser.parse_args()
+    if args.after_id is not None and args.updated_since is None:
+        parser.error("--after-id needs --updated-since")
+
+    suffixes = [suffix.lower() for suffix in args.path.suffixes]
+    compress = suffixes[-1:] == [".gz"]
+    fmt = args.format or ("csv" if ".csv" in suffixes else "ndjson")
+
+    cursor = ExportCursor(args.updated_since, args.after_id)
+    with open(args.path, "wb") as out:
+        for chunk in export_products(default_engine, fmt, compress, cursor=cursor, include_inactive=args.include_inactive):
+            out.write(chunk)
+    print(f"Exported products to {args.path}")
+    if cursor.updated_at is not None:
+        print(f"Next export: --updated-since {cursor.updated_at.isoformat()} --after-id {cursor.id}")
+
+
+if __name__ == "__main__":
+    main()
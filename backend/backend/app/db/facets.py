@@ -0,0 +1,173 @@
+"""
+Precomputed catalog facet counts.
+
+Active products are counted per (currency, price bucket, in stock) cell in
+one aggregate query. That cube is small (currencies x buckets x 2), and the
+facet counts for any combination of the currency, price and stock filters
+are derived from its cells in Python, so a filtered category page never
+runs an aggregate of its own.
+
+The cube is tagged with the products table version it was computed at.
+When a write moves the version, readers keep getting the last cube (marked
+stale) while a background thread recomputes it; only the very first read
+computes it inline.
+
+Limitations:
+
+- Price filters are applied at bucket granularity: a bucket counts in full
+  when it overlaps `price_min`..`price_max`.
+- The cube cannot answer a text query, so with `q` the cells are
+  aggregated over the matching products only, for that request.
+"""
+import logging
+import threading
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from backend.app.db import search
+from backend.app.db.versioning import get_table_versions
+from backend.app.models import Product
+from backend.app.schemas.product import ProductFilters
+
+# Lower bounds of the price buckets; the last bucket is open-ended
+PRICE_BUCKETS = (Decimal("0"), Decimal("10"), Decimal("25"), Decimal("50"), Decimal("100"), Decimal("250"))
+
+Cell = tuple[str, int, bool]  # (currency, price bucket index, in stock)
+Cube = dict[Cell, int]
+
+# Last cube per database: url -> (products version, cube)
+_cubes: dict[str, tuple[int, Cube]] = {}
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def price_bucket_expression():
+    """SQL expression mapping a product price to its bucket index."""
+    return case(
+        *((Product.price < upper, index) for index, upper in enumerate(PRICE_BUCKETS[1:])),
+        else_=len(PRICE_BUCKETS) - 1,
+    )
+
+
+def _bucket_bounds(index: int) -> tuple[Decimal, Optional[Decimal]]:
+    upper = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+    return PRICE_BUCKETS[index], upper
+
+
+def compute_cube(session: Session, *conditions) -> Cube:
+    """Count active products (matching `conditions`) per cell in one pass."""
+    bucket = price_bucket_expression().label("bucket")
+    in_stock = (Product.stock > 0).label("in_stock")
+    rows = session.exec(
+        select(Product.currency, bucket, in_stock, func.count())
+        .where(Product.is_active == True, *conditions)
+        .group_by(Product.currency, bucket, in_stock)
+    ).all()
+    return {(currency, bucket_index, bool(available)): count for currency, bucket_index, available, count in rows}
+
+
+def refresh(engine: Engine) -> Cube:
+    """Recompute the cube of `engine` and store it with the products version."""
+    with Session(engine) as session:
+        # Version first: a write landing during the query only makes the cube look older
+        version = get_table_versions(session, ["products"])["products"]
+        cube = compute_cube(session)
+    key = str(engine.url)
+    current = _cubes.get(key)
+    if current is None or current[0] <= version:
+        _cubes[key] = (version, cube)
+    return cube
+
+
+def _refresh_logged(engine: Engine) -> None:
+    try:
+        refresh(engine)
+    except Exception:
+        logger.exception("Facet refresh failed")
+
+
+def refresh_in_background(engine: Engine) -> bool:
+    """Start `refresh` in a daemon thread unless one is already running; True if started."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return False
+        _worker = threading.Thread(target=_refresh_logged, args=(engine,), name="facets-refresh", daemon=True)
+        _worker.start()
+        return True
+
+
+def get_cube(session: Session) -> tuple[Cube, bool]:
+    """
+    Return the catalog cube and whether it is current.
+
+    A cube behind the products version is returned as is (stale) and a
+    background refresh is started.
+    """
+    engine = session.get_bind()
+    version = get_table_versions(session, ["products"])["products"]
+    stored = _cubes.get(str(engine.url))
+    if stored is None:
+        return refresh(engine), True
+    if stored[0] != version:
+        refresh_in_background(engine)
+        return stored[1], False
+    return stored[1], True
+
+
+def _bucket_matches(index: int, filters: ProductFilters) -> bool:
+    low, high = _bucket_bounds(index)
+    if filters.price_max is not None and low > filters.price_max:
+        return False
+    if filters.price_min is not None and high is not None and high <= filters.price_min:
+        return False
+    return True
+
+
+def facet_counts(cube: Cube, filters: ProductFilters) -> dict:
+    """
+    Derive facet counts from the cube's cells.
+
+    Each facet applies every filter except its own, so a page filtered to
+    one currency still shows how many products the other currencies have.
+    """
+    currency_filter = filters.currency.upper() if filters.currency else None
+    prices = [0] * len(PRICE_BUCKETS)
+    stock = {"in_stock": 0, "out_of_stock": 0}
+    currencies: dict[str, int] = {}
+    for (currency, bucket_index, available), count in cube.items():
+        currency_ok = currency_filter is None or currency == currency_filter
+        price_ok = _bucket_matches(bucket_index, filters)
+        stock_ok = filters.in_stock is None or available == filters.in_stock
+        if currency_ok and stock_ok:
+            prices[bucket_index] += count
+        if currency_ok and price_ok:
+            stock["in_stock" if available else "out_of_stock"] += count
+        if price_ok and stock_ok:
+            currencies[currency] = currencies.get(currency, 0) + count
+
+    return {
+        "price": [
+            {"min": str(low), "max": str(high) if high is not None else None, "count": prices[index]}
+            for index, (low, high) in enumerate(map(_bucket_bounds, range(len(PRICE_BUCKETS))))
+        ],
+        "stock": stock,
+        "currency": dict(sorted(currencies.items())),
+    }
+
+
+def get_facet_counts(session: Session, filters: Optional[ProductFilters] = None) -> tuple[dict, bool]:
+    """Return facet counts for `filters` and whether they reflect the latest writes."""
+    filters = filters or ProductFilters()
+    if filters.q:
+        matches = search.matching_ids(session, filters.q)
+        cube = compute_cube(session, Product.id.in_(matches)) if matches is not None else {}
+        return facet_counts(cube, filters), True
+    cube, fresh = get_cube(session)
+    return facet_counts(cube, filters), fresh
@@ -0,0 +1,291 @@
+"""
+Garbage collection for the uploads tree.
+
+Finds, in one pass, both kinds of drift between `static/uploads` and the
+database:
+
+- orphan files: on disk but not referenced by any asset, blob or derivative
+  row, nor by a `/static/uploads/...` URL in content (product images, post
+  HTML, page sections, designs, menus);
+- dangling records: asset, blob or derivative rows whose file is missing.
+
+The tree is walked with `os.scandir`, each directory's entries sorted so the
+walk yields paths in plain string order; the file paths of the three
+tables are streamed from the database in the same order and merged. Neither
+side is ever loaded whole, so memory stays flat over millions of files. URLs
+found in content are the only set kept in memory.
+
+Files and rows younger than the grace period are never touched: they may
+belong to an upload or a derivative render still in progress. Before a
+dangling row is deleted its file is checked again, and the row must still
+have the path and creation time seen in the scan, so content re-stored
+meanwhile survives. A blob that assets still reference is never deleted
+when its file is missing; it is reported as a missing live blob instead.
+
+Usage (from the backend/ directory):
+    python -m backend.app.db.gc_uploads              # report only
+    python -m backend.app.db.gc_uploads --delete     # remove orphans and dangling rows
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import unquote
+
+from sqlalchemy import delete, false, select, tuple_
+from sqlalchemy.engine import Connection, Engine
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.config import settings
+from backend.app.db import create_db_and_tables, engine as default_engine
+from backend.app.db.blobs import STATIC_ROOT
+from backend.app.db.versioning import bump_table_versions
+from backend.app.models import Asset, AssetBlob, AssetDerivative, MenuItem, PageSection, Post, Product, SiteDesign
+
+logger = logging.getLogger(__name__)
+
+UPLOADS = "uploads"
+DELETE_BATCH = 500
+
+# Tables owning files, with the key used to delete a dangling row
+MANAGED = [
+    (Asset.__table__, Asset.__table__.c.id),
+    (AssetBlob.__table__, AssetBlob.__table__.c.checksum),
+    (AssetDerivative.__table__, AssetDerivative.__table__.c.id),
+]
+
+# Columns whose text may link to uploaded files
+CONTENT_COLUMNS = [
+    Product.__table__.c.image,
+    Post.__table__.c.featured_image,
+    Post.__table__.c.content,
+    PageSection.__table__.c.content,
+    SiteDesign.__table__.c.components,
+    SiteDesign.__table__.c.layout,
+    MenuItem.__table__.c.url,
+]
+
+UPLOAD_URL = re.compile(r"/static/(uploads/[^\s\"'()<>?#\\]+)")
+
+
+@dataclass
+class GCReport:
+    scanned_files: int = 0
+    referenced_files: int = 0
+    orphan_files: int = 0
+    orphan_bytes: int = 0
+    recent_files: int = 0
+    recent_records: int = 0
+    dangling_records: dict[str, int] = field(default_factory=dict)
+    # Blobs with references whose file is gone: restore the file, never delete the row
+    missing_live_blobs: list[str] = field(default_factory=list)
+    deleted: bool = False
+    elapsed_seconds: float = 0.0
+    orphans: list[str] = field(default_factory=list)
+
+
+def _walk(directory: Path, prefix: str) -> Iterator[tuple[str, os.DirEntry]]:
+    """
+    Files under `directory` as (relative path, entry), in string order of the path.
+
+    Directories sort as "name/" so that e.g. "a.b" comes before "a/x",
+    exactly as the database orders the same strings.
+    """
+    try:
+        with os.scandir(directory) as scan:
+            entries = sorted(scan, key=lambda entry: entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        path = f"{prefix}/{entry.name}"
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(Path(entry.path), path)
+        elif entry.is_file(follow_symlinks=False):
+            yield path, entry
+
+
+# (file_path, table name, key, created_at, still referenced)
+Record = tuple[str, str, object, datetime, bool]
+
+
+def _live(table):
+    """Whether a row is still referenced; only blobs count references."""
+    return table.c.ref_count > 0 if "ref_count" in table.c else false()
+
+
+def _table_paths(conn: Connection, table, key) -> Iterator[Record]:
+    column = table.c.file_path
+    # The merge relies on byte order; PostgreSQL would otherwise sort by locale
+    order = column.collate("C") if conn.dialect.name == "postgresql" else column
+    rows = conn.execution_options(stream_results=True, yield_per=1000).execute(
+        select(column, key, table.c.created_at, _live(table)).where(column.startswith(f"{UPLOADS}/")).order_by(order)
+    )
+    for path, row_key, created_at, live in rows:
+        yield path, table.name, row_key, created_at, bool(live)
+
+
+def _managed_paths(conn: Connection) -> Iterator[Record]:
+    """Every managed row under uploads/, in string order of file_path."""
+    return heapq.merge(*(_table_paths(conn, table, key) for table, key in MANAGED), key=lambda item: item[0])
+
+
+def _content_references(conn: Connection) -> set[str]:
+    """Upload paths linked from content columns."""
+    found = set()
+    for column in CONTENT_COLUMNS:
+        rows = conn.execution_options(stream_results=True, yield_per=1000).execute(
+            select(column).where(column.is_not(None))
+        )
+        for (value,) in rows:
+            text = value if isinstance(value, str) else json.dumps(value)
+            found.update(unquote(match) for match in UPLOAD_URL.findall(text))
+    return found
+
+
+def _delete_dangling(engine: Engine, dangling: dict[str, list], cutoff: datetime) -> None:
+    """
+    Delete dangling rows in batches, plus the derivative rows of deleted
+    blobs (their files become orphans for the next run). Bulk statements
+    bump the table versions themselves.
+
+    Each batch is re-checked just before its delete: rows whose file has
+    appeared since the scan are kept, and the delete only matches rows still
+    at the scanned path, older than the grace period and, for blobs,
+    without references.
+    """
+    keys = {table.name: (table, key) for table, key in MANAGED}
+    derivatives = AssetDerivative.__table__
+    with engine.begin() as conn:
+        for name, rows in dangling.items():
+            table, key = keys[name]
+            for start in range(0, len(rows), DELETE_BATCH):
+                batch = [
+                    (row_key, path) for row_key, path in rows[start:start + DELETE_BATCH]
+                    if not os.path.exists(STATIC_ROOT / path)
+                ]
+                if not batch:
+                    continue
+                statement = delete(table).where(
+                    tuple_(key, table.c.file_path).in_(batch),
+                    table.c.created_at <= cutoff,
+                    ~_live(table),
+                )
+                deleted = conn.execute(statement.returning(key)).scalars().all()
+                if table is AssetBlob.__table__ and deleted:
+                    conn.execute(delete(derivatives).where(derivatives.c.checksum.in_(deleted)))
+        bump_table_versions(conn, [name for name, rows in dangling.items() if rows] + [derivatives.name])
+
+
+def collect(
+    engine: Engine = default_engine,
+    delete_files: bool = False,
+    grace_seconds: float = 3600,
+    list_orphans: bool = False,
+) -> GCReport:
+    """Compare the uploads tree with the database; optionally delete both kinds of orphans."""
+    started = time.perf_counter()
+    report = GCReport(deleted=delete_files)
+    cutoff = time.time() - grace_seconds
+    # Row timestamps are naive UTC
+    cutoff_at = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    # table name -> [(key, file_path)]
+    dangling: dict[str, list] = {table.name: [] for table, _ in MANAGED}
+
+    with engine.connect() as conn:
+        linked = _content_references(conn)
+        files = _walk(STATIC_ROOT / UPLOADS, UPLOADS)
+        records = _managed_paths(conn)
+        file = next(files, None)
+        record = next(records, None)
+
+        while file is not None or record is not None:
+            if record is None or (file is not None and file[0] < record[0]):
+                path, entry = file
+                report.scanned_files += 1
+                if path in linked:
+                    report.referenced_files += 1
+                else:
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_mtime > cutoff:
+                        report.recent_files += 1
+                    else:
+                        report.orphan_files += 1
+                        report.orphan_bytes += stat.st_size
+                        if list_orphans:
+                            report.orphans.append(path)
+                        if delete_files:
+                            Path(entry.path).unlink(missing_ok=True)
+                file = next(files, None)
+            elif file is None or record[0] < file[0]:
+                path, name, row_key, created_at, live = record
+                if created_at > cutoff_at:
+                    report.recent_records += 1
+                elif live:
+                    report.missing_live_blobs.append(path)
+                else:
+                    dangling[name].append((row_key, path))
+                record = next(records, None)
+            else:
+                # Present on both sides; several rows may share the path
+                report.scanned_files += 1
+                report.referenced_files += 1
+                path = file[0]
+                while record is not None and record[0] == path:
+                    record = next(records, None)
+                file = next(files, None)
+
+    report.dangling_records = {name: len(rows) for name, rows in dangling.items()}
+    if report.missing_live_blobs:
+        logger.warning("Upload GC: %d referenced blobs have no file", len(report.missing_live_blobs))
+    if delete_files and any(dangling.values()):
+        _delete_dangling(engine, dangling, cutoff_at)
+    report.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+async def run_periodically(interval_seconds: float, delete_files: bool, grace_seconds: float) -> None:
+    """Run the collector forever, every `interval_seconds`, in the threadpool."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            report = await run_in_threadpool(collect, default_engine, delete_files, grace_seconds)
+            logger.info("Upload GC: %s", asdict(report))
+        except Exception:
+            logger.exception("Upload GC failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find (and optionally delete) orphan upload files and dangling asset rows.")
+    parser.add_argument("--delete", action="store_true", help="Delete orphan files and dangling rows (default: report only)")
+    parser.add_argument(
+        "--grace-hours", type=float, default=settings.upload_gc_grace_hours,
+        help="Leave files modified within this many hours alone"
+    )
+    parser.add_argument("--list", action="store_true", help="Print every orphan file path")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    report = collect(default_engine, args.delete, args.grace_hours * 3600, args.list)
+    for path in report.orphans:
+        print(path)
+    action = "Deleted" if args.delete else "Found"
+    print(
+        f"Scanned {report.scanned_files} files in {report.elapsed_seconds}s: "
+        f"{action} {report.orphan_files} orphan files ({report.orphan_bytes / 1024 / 1024:.1f} MiB), "
+        f"dangling rows {report.dangling_records}; {report.recent_files} recent files and "
+        f"{report.recent_records} recent rows skipped"
+    )
+    for path in report.missing_live_blobs:
+        print(f"Referenced blob without file (restore it): {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+Synthetic dataset generator for load testing.
+
+Generates products, posts, page sections and assets at any scale and
+either writes them straight into the database in batches, streams them as
+NDJSON (one file per kind), or both. Records are produced lazily, so memory
+stays flat whether the dataset has a thousand rows or ten million.
+
+Everything is derived from `--seed`: each kind draws from its own seeded
+Faker instance, so the same seed and counts give the same dataset, and
+changing one count leaves the other kinds unchanged. Benchmarks can thus be
+rerun against identical data.
+
+Images come from a small shared pool (`--images`, default 64) rendered in a
+process pool and stored as content-addressed blobs, like uploads. Products,
+posts, sections and assets all point at pool images, and generated assets
+take blob references, so the upload GC and blob reference counts stay
+consistent.
+
+Products are upserted through the bulk importer (validated, search-indexed,
+keyed by slug) and posts are keyed by slug too, so rerunning with the same
+seed does not duplicate them; sections and assets have no natural key and
+are added again. Post HTML is stored unsanitized: the render endpoint and
+`python -m backend.app.db.resanitize` fill `content_html` in.
+
+Usage (from the backend/ directory):
+    python -m backend.app.db.gen_dataset --products 100000 --posts 10000
+    python -m backend.app.db.gen_dataset --products 1000000 --assets 50000 --seed 7 --ndjson datasets/seed7
+    python -m backend.app.db.gen_dataset --products 1000000 --ndjson datasets/seed7 --no-db
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+
+from faker import Faker
+from PIL import Image, ImageDraw, ImageFont
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from backend.app.core.images import extract_metadata
+from backend.app.core.storage import PUBLIC_FILE_MODE
+from backend.app.db import create_db_and_tables, engine as default_engine
+from backend.app.db.blobs import STATIC_ROOT, blob_path
+from backend.app.db.import_products import BATCH_SIZE, import_products
+from backend.app.db.versioning import bump_table_versions
+from backend.app.models import Asset, AssetBlob, PageSection, Post
+
+LOCALE = "es_ES"
+IMAGE_POOL_SIZE = 64
+IMAGE_SIZE = 800
+SECTIONS_PER_PAGE = 8
+# Timestamps are spread over the year before this date, so reruns match
+EPOCH = datetime(2025, 1, 1)
+
+_posts = Post.__table__
+_sections = PageSection.__table__
+_assets = Asset.__table__
+_blobs = AssetBlob.__table__
+
+
+@dataclass
+class PoolImage:
+    checksum: str
+    file_path: str
+    file_size: int
+    width: int
+    height: int
+    dominant_color: Optional[str]
+    placeholder: Optional[str]
+
+    @property
+    def url(self) -> str:
+        return f"/static/{self.file_path}"
+
+
+@dataclass
+class KindStats:
+    generated: int = 0
+    elapsed_seconds: float = 0.0
+
+    def summary(self, kind: str) -> str:
+        rate = self.generated / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        return f"{kind}: {self.generated} in {self.elapsed_seconds}s ({rate:.0f}/s)"
+
+
+def _faker(seed: int, kind: str) -> Faker:
+    fake = Faker(LOCALE)
+    fake.seed_instance(f"{seed}:{kind}")
+    return fake
+
+
+def _timestamp(fake: Faker) -> datetime:
+    return EPOCH - timedelta(seconds=fake.random.randrange(365 * 24 * 3600))
+
+
+def _slug(title: str, index: int) -> str:
+    words = "-".join(word.strip(".,").lower() for word in title.split())
+    return f"{words}-{index}"
+
+
+def render_placeholder(seed: int, index: int, size: int) -> bytes:
+    """PNG bytes of pool image `index`: coloured shapes and a label. Runs in a worker process."""
+    rng = random.Random(f"{seed}:image:{index}")
+    background = tuple(rng.randrange(40, 240) for _ in range(3))
+    image = Image.new("RGB", (size, size), color=background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randrange(3, 8)):
+        x0, y0 = rng.randrange(size), rng.randrange(size)
+        box = (x0, y0, x0 + rng.randrange(size // 8, size // 2), y0 + rng.randrange(size // 8, size // 2))
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=fill)
+
+    text = f"#{index + 1}"
+    try:
+        font = ImageFont.truetype("DejaVuSans-Bold.ttf", size // 8)
+    except OSError:
+        font = ImageFont.load_default(size=size // 8)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    position = ((size - (right - left)) / 2 - left, (size - (bottom - top)) / 2 - top)
+    draw.text(position, text, fill=(255, 255, 255), font=font, stroke_width=3, stroke_fill=(20, 20, 20))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _store_image(data: bytes) -> PoolImage:
+    """Write a rendered image into the content-addressed store (if new) and describe it."""
+    checksum = hashlib.sha256(data).hexdigest()
+    relative = blob_path(checksum, ".png")
+    target = STATIC_ROOT / relative
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=target.parent, prefix=".gen-")
+        os.fchmod(fd, PUBLIC_FILE_MODE)
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(temp, target)
+    metadata = extract_metadata(str(target)) or {}
+    return PoolImage(
+        checksum=checksum,
+        file_path=relative,
+        file_size=len(data),
+        width=metadata.get("width", IMAGE_SIZE),
+        height=metadata.get("height", IMAGE_SIZE),
+        dominant_color=metadata.get("dominant_color"),
+        placeholder=metadata.get("placeholder"),
+    )
+
+
+def build_image_pool(seed: int, count: int, size: int = IMAGE_SIZE, workers: Optional[int] = None) -> list[PoolImage]:
+    """Render the shared image pool in parallel and store it."""
+    if count <= 0:
+        return []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        rendered = pool.map(render_placeholder, [seed] * count, range(count), [size] * count)
+        return [_store_image(data) for data in rendered]
+
+
+def iter_products(seed: int, count: int, images: list[PoolImage]) -> Iterator[dict]:
+    """Product records in the bulk importer's format."""
+    fake = _faker(seed, "products")
+    for index in range(count):
+        title = fake.sentence(nb_words=3).rstrip(".")
+        yield {
+            "title": title,
+            "slug": _slug(title, index),
+            "description": fake.paragraph(nb_sentences=3),
+            "price": f"{fake.random.uniform(1, 500):.2f}",
+            "currency": "EUR",
+            "image": fake.random.choice(images).url if images else None,
+            "stock": 0 if fake.random.random() < 0.1 else fake.random.randrange(1, 1000),
+            "is_active": fake.random.random() < 0.95,
+        }
+
+
+def iter_posts(seed: int, count: int, images: list[PoolImage]) -> Iterator[dict]:
+    fake = _faker(seed, "posts")
+    for index in range(count):
+        title = fake.sentence(nb_words=6).rstrip(".")
+        blocks = []
+        for _ in range(fake.random.randrange(2, 7)):
+            blocks.append(f"<h2>{fake.sentence(nb_words=4)}</h2>")
+            blocks.extend(f"<p>{fake.paragraph(nb_sentences=4)}</p>" for _ in range(fake.random.randrange(1, 4)))
+            if images and fake.random.random() < 0.3:
+                blocks.append(f'<p><img src="{fake.random.choice(images).url}" alt="{fake.word()}"></p>')
+        published = fake.random.random() < 0.8
+        created_at = _timestamp(fake)
+        yield {
+            "title": title,
+            "slug": _slug(title, index),
+            "content": "\n".join(blocks),
+            "excerpt": fake.sentence(nb_words=15),
+            "featured_image": fake.random.choice(images).url if images else None,
+            "status": "published" if published else "draft",
+            "post_type": "page" if fake.random.random() < 0.1 else "post",
+            "is_published": published,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def iter_sections(seed: int, count: int, images: list[PoolImage], products: int) -> Iterator[dict]:
+    """Sections in groups of SECTIONS_PER_PAGE per page; product grids pick from the first `products` ids."""
+    fake = _faker(seed, "sections")
+    for index in range(count):
+        kind = fake.random.choice(("hero", "content_block", "product_grid"))
+        image = fake.random.choice(images).url if images else None
+        if kind == "hero":
+            content = {
+                "headline": fake.sentence(nb_words=5).rstrip("."),
+                "subheadline": fake.sentence(nb_words=8),
+                "background_image_url": image,
+                "cta_text": fake.word().capitalize(),
+                "cta_url": "/catalog",
+            }
+        elif kind == "content_block":
+            content = {
+                "title": fake.sentence(nb_words=4).rstrip("."),
+                "body": fake.paragraph(nb_sentences=5),
+                "image_url": image,
+                "image_position": fake.random.choice(("left", "right", "top", "bottom")),
+            }
+        else:
+            picks = min(products, fake.random.randrange(4, 13))
+            content = {
+                "title": fake.sentence(nb_words=3).rstrip("."),
+                "product_ids": sorted(fake.random.sample(range(1, products + 1), picks)) if picks else [],
+                "layout": fake.random.choice(("grid", "carousel")),
+                "columns": fake.random.choice((2, 3, 4)),
+                "show_add_to_cart": True,
+            }
+        created_at = _timestamp(fake)
+        yield {
+            "page": "home" if index < SECTIONS_PER_PAGE else f"page-{index // SECTIONS_PER_PAGE}",
+            "section_type": kind,
+            "order": index % SECTIONS_PER_PAGE,
+            "is_active": fake.random.random() < 0.9,
+            "content": content,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def iter_assets(seed: int, count: int, images: list[PoolImage]) -> Iterator[dict]:
+    """Asset records, each referencing a pool image blob."""
+    if not images:
+        return
+    fake = _faker(seed, "assets")
+    for index in range(count):
+        image = fake.random.choice(images)
+        yield {
+            "filename": f"{fake.word()}-{index}.png",
+            "file_path": image.file_path,
+            "file_type": "image",
+            "mime_type": "image/png",
+            "file_size": image.file_size,
+            "checksum": image.checksum,
+            "width": image.width,
+            "height": image.height,
+            "dominant_color": image.dominant_color,
+            "placeholder": image.placeholder,
+            "alt_text": fake.sentence(nb_words=5).rstrip("."),
+            "created_at": _timestamp(fake),
+        }
+
+
+def _tee(records: Iterable[dict], stream: Optional[TextIO], stats: KindStats) -> Iterator[dict]:
+    """Pass records through, counting them and writing each as one NDJSON line to `stream` (if any)."""
+    for record in records:
+        stats.generated += 1
+        if stream is not None:
+            stream.write(json.dumps(record, ensure_ascii=False, default=datetime.isoformat))
+            stream.write("\n")
+        yield record
+
+
+def _batches(records: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_ignoring_conflicts(conn: Connection, table, rows: list[dict]) -> None:
+    """Insert rows, skipping those whose unique keys already exist."""
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    conn.execute(dialect.insert(table).on_conflict_do_nothing(), rows)
+
+
+def _acquire_blobs(conn: Connection, images: dict[str, PoolImage], counts: Counter) -> None:
+    """Take `counts` references on pool blobs, creating their rows if needed."""
+    for checksum, count in counts.items():
+        result = conn.execute(
+            update(_blobs).where(_blobs.c.checksum == checksum).values(ref_count=_blobs.c.ref_count + count)
+        )
+        if result.rowcount == 0:
+            image = images[checksum]
+            conn.execute(insert(_blobs).values(
+                checksum=checksum, file_path=image.file_path, file_size=image.file_size,
+                mime_type="image/png", ref_count=count, created_at=datetime.utcnow(),
+            ))
+
+
+def _load_rows(engine: Engine, table, records: Iterable[dict], batch_size: int, images: list[PoolImage]) -> None:
+    """Insert records one transaction per batch; asset batches take their blob references in the same transaction."""
+    by_checksum = {image.checksum: image for image in images}
+    for batch in _batches(records, batch_size):
+        with engine.begin() as conn:
+            tables = [table.name]
+            if table is _assets:
+                _acquire_blobs(conn, by_checksum, Counter(row["checksum"] for row in batch))
+                tables.append(_blobs.name)
+                conn.execute(insert(table), batch)
+            elif table is _posts:
+                _insert_ignoring_conflicts(conn, table, batch)
+            else:
+                conn.execute(insert(table), batch)
+            bump_table_versions(conn, tables)
+
+
+def generate(
+    products: int = 0,
+    posts: int = 0,
+    sections: int = 0,
+    assets: int = 0,
+    seed: int = 0,
+    image_count: int = IMAGE_POOL_SIZE,
+    image_size: int = IMAGE_SIZE,
+    ndjson_dir: Optional[Path] = None,
+    engine: Optional[Engine] = default_engine,
+    batch_size: int = BATCH_SIZE,
+    workers: Optional[int] = None,
+) -> dict[str, KindStats]:
+    """
+    Generate the dataset; see the module docstring. With `engine=None`
+    nothing is written to the database (NDJSON only).
+    """
+    stats: dict[str, KindStats] = {}
+
+    started = time.perf_counter()
+    images = build_image_pool(seed, image_count, image_size, workers)
+    stats["images"] = KindStats(len(images), round(time.perf_counter() - started, 3))
+
+    kinds = [
+        ("products", products, lambda: iter_products(seed, products, images), None),
+        ("posts", posts, lambda: iter_posts(seed, posts, images), _posts),
+        ("sections", sections, lambda: iter_sections(seed, sections, images, products), _sections),
+        ("assets", assets, lambda: iter_assets(seed, assets, images), _assets),
+    ]
+    if ndjson_dir is not None:
+        ndjson_dir.mkdir(parents=True, exist_ok=True)
+
+    for kind, count, records, table in kinds:
+        if count <= 0:
+            continue
+        started = time.perf_counter()
+        kind_stats = stats[kind] = KindStats()
+        stream = open(ndjson_dir / f"{kind}.ndjson", "w", encoding="utf-8") if ndjson_dir is not None else None
+        try:
+            rows = _tee(records(), stream, kind_stats)
+            if engine is None:
+                for _ in rows:
+                    pass
+            elif table is None:
+                import_products(enumerate(rows, start=1), engine, batch_size=batch_size)
+            else:
+                _load_rows(engine, table, rows, batch_size, images)
+        finally:
+            if stream is not None:
+                stream.close()
+        kind_stats.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset for load testing.")
+    parser.add_argument("--products", type=int, default=0)
+    parser.add_argument("--posts", type=int, default=0)
+    parser.add_argument("--sections", type=int, default=0)
+    parser.add_argument("--assets", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0, help="Same seed and counts, same dataset")
+    parser.add_argument("--images", type=int, default=IMAGE_POOL_SIZE, help="Size of the shared image pool")
+    parser.add_argument("--image-size", type=int, default=IMAGE_SIZE, help="Side of the square pool images, in pixels")
+    parser.add_argument("--ndjson", type=Path, help="Also write <kind>.ndjson files to this directory")
+    parser.add_argument("--no-db", action="store_true", help="Do not write to the database (requires --ndjson)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Image render processes (default: all cores)")
+    args = parser.parse_args()
+    if args.no_db and args.ndjson is None:
+        parser.error("--no-db needs --ndjson")
+
+    engine = None
+    if not args.no_db:
+        create_db_and_tables()
+        engine = default_engine
+    stats = generate(
+        args.products, args.posts, args.sections, args.assets, args.seed, args.images, args.image_size,
+        args.ndjson, engine, args.batch_size, args.workers,
+    )
+    for kind, kind_stats in stats.items():
+        print(kind_stats.summary(kind))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Streaming bulk product import / upsert.
+
+Reads NDJSON or CSV feeds record by record, validates each row against
+`ProductCreate` and upserts by `slug` in batched transactions, so memory
+stays constant regardless of feed size. PostgreSQL batches are loaded with
+COPY into a temporary staging table (psycopg2 or psycopg 3); SQLite batches
+use a single executemany `INSERT ... ON CONFLICT`.
+
+Usage (from the backend/ directory):
+    python -m backend.app.db.import_products feed.ndjson
+    python -m backend.app.db.import_products feed.csv --batch-size 5000
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Union
+
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from backend.app.db import create_db_and_tables, engine as default_engine
+from backend.app.db.search import index_rows
+from backend.app.db.versioning import bump_table_versions
+from backend.app.models import Product
+from backend.app.schemas.product import ProductCreate, ProductImportError, ProductImportReport
+
+BATCH_SIZE = 1000
+# Keep at most this many per-row errors in the report (all are counted)
+MAX_REPORTED_ERRORS = 1000
+
+UPSERT_FIELDS = ("title", "description", "price", "currency", "image", "stock", "is_active")
+COPY_COLUMNS = ("slug",) + UPSERT_FIELDS + ("created_at", "updated_at")
+
+_products = Product.__table__
+
+Record = tuple[int, Union[dict, Exception]]
+# Called after each committed batch with the (id, slug) pairs it updated
+BatchCallback = Callable[[list[tuple[int, str]]], None]
+
+
+def iter_ndjson(stream: TextIO) -> Iterator[Record]:
+    """Yield (line number, record) for each non-blank NDJSON line."""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            yield line_no, record
+        except ValueError as exc:
+            yield line_no, exc
+
+
+def iter_csv(stream: TextIO) -> Iterator[Record]:
+    """Yield (line number, record) for each CSV row; empty cells are omitted."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Guess the feed format from a filename or content type (defaults to NDJSON)."""
+    if (filename or "").lower().endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    return "ndjson"
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Record]:
+    """Dispatch to the reader for `fmt` ("ndjson" or "csv")."""
+    return iter_csv(stream) if fmt == "csv" else iter_ndjson(stream)
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+        )
+    return str(exc)
+
+
+def _copy_value(value) -> str:
+    """Render one value for COPY ... (FORMAT csv, NULL '\\N')."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _upsert_sqlite(conn: Connection, rows: list[dict]) -> None:
+    statement = sqlite.insert(_products)
+    statement = statement.on_conflict_do_update(
+        index_elements=[_products.c.slug],
+        set_={field: statement.excluded[field] for field in UPSERT_FIELDS + ("updated_at",)},
+    )
+    conn.execute(statement, rows)
+
+
+STAGE_TABLE = "product_import_stage"
+
+
+def copy_statement() -> str:
+    """The COPY statement loading `copy_csv` output into the staging table."""
+    return f"COPY {STAGE_TABLE} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+
+def copy_csv(rows: list[dict]) -> str:
+    """Render rows as COPY csv input, one line per row in COPY_COLUMNS order."""
+    return "".join(",".join(_copy_value(row[column]) for column in COPY_COLUMNS) + "\n" for row in rows)
+
+
+def _copy_from(conn: Connection, statement: str, data: str) -> None:
+    """Run COPY ... FROM STDIN through the DBAPI driver (psycopg2 or psycopg 3)."""
+    driver = conn.dialect.driver
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        if driver == "psycopg2":
+            cursor.copy_expert(statement, io.StringIO(data))
+        elif driver == "psycopg":
+            with cursor.copy(statement) as copy:
+                copy.write(data)
+        else:
+            raise RuntimeError(
+                f"Bulk import on PostgreSQL needs the psycopg2 or psycopg (3) driver, not {driver!r}; "
+                "use a postgresql+psycopg2:// or postgresql+psycopg:// DATABASE_URL"
+            )
+    finally:
+        cursor.close()
+
+
+def _upsert_postgresql(conn: Connection, rows: list[dict]) -> None:
+    conn.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} ("
+        " slug VARCHAR(255), title VARCHAR(255), description TEXT, price NUMERIC(10, 2),"
+        " currency VARCHAR(3), image VARCHAR(500), stock INTEGER, is_active BOOLEAN,"
+        " created_at TIMESTAMP, updated_at TIMESTAMP) ON COMMIT DELETE ROWS"
+    ))
+    _copy_from(conn, copy_statement(), copy_csv(rows))
+
+    columns = ", ".join(COPY_COLUMNS)
+    updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in UPSERT_FIELDS + ("updated_at",))
+    conn.execute(text(
+        f"INSERT INTO products ({columns}) SELECT {columns} FROM {STAGE_TABLE}"
+        f" ON CONFLICT (slug) DO UPDATE SET {updates}"
+    ))
+
+
+def _write_batch(engine: Engine, batch: dict[str, dict]) -> list[tuple[int, str]]:
+    """Upsert one batch in its own transaction; return (id, slug) of updated rows."""
+    slugs = list(batch)
+    with engine.begin() as conn:
+        existing = [
+            (row.id, row.slug)
+            for row in conn.execute(select(_products.c.id, _products.c.slug).where(_products.c.slug.in_(slugs)))
+        ]
+
+        rows = list(batch.values())
+        if conn.dialect.name == "postgresql":
+            _upsert_postgresql(conn, rows)
+        else:
+            _upsert_sqlite(conn, rows)
+
+        written = conn.execute(
+            select(_products.c.id, _products.c.title, _products.c.description)
+            .where(_products.c.slug.in_(slugs))
+        )
+        index_rows(conn, [row._asdict() for row in written])
+        bump_table_versions(conn, ["products"])
+    return existing
+
+
+def import_products(
+    records: Iterable[Record],
+    engine: Engine,
+    batch_size: int = BATCH_SIZE,
+    on_batch: Optional[BatchCallback] = None,
+) -> ProductImportReport:
+    """
+    Validate and upsert product records by slug.
+
+    Invalid rows are skipped and reported; valid rows are written in
+    transactions of `batch_size`. If a slug repeats within a batch, the last
+    occurrence wins.
+    """
+    report = ProductImportReport()
+    started = time.perf_counter()
+    batch: dict[str, dict] = {}
+
+    def flush() -> None:
+        existing = _write_batch(engine, batch)
+        report.updated += len(existing)
+        report.inserted += len(batch) - len(existing)
+        batch.clear()
+        if on_batch:
+            on_batch(existing)
+
+    for line_no, record in records:
+        report.processed += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            product = ProductCreate.model_validate(record)
+        except (ValidationError, ValueError) as exc:
+            report.failed += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append(ProductImportError(
+                    line=line_no,
+                    slug=record.get("slug") if isinstance(record, dict) else None,
+                    error=_describe(exc),
+                ))
+            continue
+
+        now = datetime.utcnow()
+        batch[product.slug] = {**product.model_dump(), "created_at": now, "updated_at": now}
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    report.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import/upsert products from NDJSON or CSV.")
+    parser.add_argument("path", type=Path, help="Feed file (.ndjson/.jsonl or .csv)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Override format detection")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    fmt = args.format or detect_format(args.path.name)
+    with open(args.path, "r", encoding="utf-8-sig", newline="") as stream:
+        report = import_products(iter_records(stream, fmt), default_engine, batch_size=args.batch_size)
+
+    rate = report.processed / report.elapsed_seconds if report.elapsed_seconds else 0
+    print(
+        f"Processed {report.processed} rows in {report.elapsed_seconds}s ({rate:.0f} rows/s): "
+        f"{report.inserted} inserted, {report.updated} updated, {report.failed} failed"
+    )
+    for error in report.errors[:20]:
+        print(f"  line {error.line} ({error.slug or '-'}): {error.error}")
+    if report.failed > 20:
+        print(f"  ... and {report.failed - 20} more errors")
+
+
+if __name__ == "__main__":
+    main()
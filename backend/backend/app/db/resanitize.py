@@ -0,0 +1,203 @@
+"""
+Bulk re-sanitization of stored post HTML.
+
+After the sanitizer policy changes (see `backend.app.core.sanitize`), every
+post whose `sanitizer_version` differs from `POLICY_VERSION` is re-cleaned.
+Stale posts are read in id-ordered chunks, sanitized in a process pool and
+written back one transaction per chunk. The job is resumable: rows already
+carrying the current version are skipped, so an interrupted run simply
+continues where it stopped when started again.
+
+Usage (from the backend/ directory):
+    python -m backend.app.db.resanitize
+    python -m backend.app.db.resanitize --workers 8 --chunk-size 200
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.engine import Engine
+
+from backend.app.core.sanitize import POLICY_VERSION, clean_post_html
+from backend.app.db import create_db_and_tables, engine as default_engine
+from backend.app.db.versioning import bump_table_versions
+from backend.app.models import Post
+from backend.app.schemas.post import PostResanitizeStatus
+
+CHUNK_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+_posts = Post.__table__
+
+Chunk = list[tuple[int, str]]
+# Sanitized chunk: None where sanitizing failed
+Results = list[tuple[int, Optional[str]]]
+ProgressCallback = Callable[[PostResanitizeStatus], None]
+
+
+def _is_stale():
+    return or_(_posts.c.sanitizer_version.is_(None), _posts.c.sanitizer_version != POLICY_VERSION)
+
+
+def count_stale(engine: Engine) -> int:
+    """Number of posts whose stored HTML predates the current policy."""
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(_posts).where(_is_stale())).scalar_one()
+
+
+def iter_stale_chunks(engine: Engine, chunk_size: int = CHUNK_SIZE, after_id: int = 0) -> Iterator[Chunk]:
+    """Yield (id, content) chunks of stale posts in id order, one short query each."""
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(_posts.c.id, _posts.c.content)
+                .where(_is_stale(), _posts.c.id > after_id)
+                .order_by(_posts.c.id)
+                .limit(chunk_size)
+            ).all()
+        if not rows:
+            return
+        yield [(row.id, row.content) for row in rows]
+        after_id = rows[-1].id
+
+
+def sanitize_chunk(chunk: Chunk) -> Results:
+    """Sanitize one chunk; runs in a worker process."""
+    return [(post_id, clean_post_html(content)) for post_id, content in chunk]
+
+
+def write_chunk(engine: Engine, results: Results) -> None:
+    """
+    Store sanitized HTML for one chunk in a single transaction. Posts that
+    failed to sanitize are left stale, to be retried by the next run.
+    """
+    rows = [{"post_id": post_id, "html": html} for post_id, html in results if html is not None]
+    if not rows:
+        return
+    statement = (
+        update(_posts)
+        # Skip posts edited (and so re-sanitized) since the chunk was read
+        .where(_posts.c.id == bindparam("post_id"), _is_stale())
+        .values(content_html=bindparam("html"), sanitizer_version=POLICY_VERSION)
+    )
+    with engine.begin() as conn:
+        conn.execute(statement, rows)
+        bump_table_versions(conn, ["posts"])
+
+
+def resanitize_posts(
+    engine: Engine,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    status: Optional[PostResanitizeStatus] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> PostResanitizeStatus:
+    """
+    Re-sanitize every stale post using a pool of `workers` processes.
+
+    `status` is updated in place after each chunk, so it can be polled
+    while the job runs; `on_progress` is called with it as well.
+    """
+    status = status or PostResanitizeStatus()
+    status.state = "running"
+    status.policy_version = POLICY_VERSION
+    status.total = count_stale(engine)
+    started = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    # Keep every worker busy while bounding the number of chunks held in memory
+    window = workers * 2
+    # spawn, not fork: the API runs this from a threaded server process
+    context = multiprocessing.get_context("spawn")
+
+    def finish(results: Results) -> None:
+        write_chunk(engine, results)
+        status.processed += len(results)
+        status.failed += sum(1 for _, html in results if html is None)
+        status.last_id = results[-1][0]
+        status.elapsed_seconds = round(time.perf_counter() - started, 3)
+        status.posts_per_second = round(status.processed / status.elapsed_seconds, 1) if status.elapsed_seconds else 0.0
+        if on_progress:
+            on_progress(status)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = deque()
+            for chunk in iter_stale_chunks(engine, chunk_size):
+                pending.append(pool.submit(sanitize_chunk, chunk))
+                if len(pending) >= window:
+                    finish(pending.popleft().result())
+            while pending:
+                finish(pending.popleft().result())
+    except Exception as exc:
+        status.state = "failed"
+        status.error = str(exc)
+        raise
+
+    status.state = "finished"
+    status.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return status
+
+
+class ResanitizeJob:
+    """Single background re-sanitization run shared by the admin endpoints."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = PostResanitizeStatus(policy_version=POLICY_VERSION)
+
+    def start(self) -> bool:
+        """Reserve the job; False if a run is already in progress."""
+        with self._lock:
+            if self.status.state == "running":
+                return False
+            self.status = PostResanitizeStatus(state="running", policy_version=POLICY_VERSION)
+            return True
+
+    def run(self, engine: Engine, **kwargs) -> None:
+        """Run a job reserved with `start`, recording any failure in the status."""
+        try:
+            resanitize_posts(engine, status=self.status, **kwargs)
+        except Exception:
+            logger.exception("Post re-sanitization failed")
+
+
+resanitize_job = ResanitizeJob()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-sanitize stored post HTML after a policy change.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    last_report = 0.0
+
+    def report(status: PostResanitizeStatus) -> None:
+        nonlocal last_report
+        if time.perf_counter() - last_report >= 1 or status.processed >= status.total:
+            last_report = time.perf_counter()
+            print(
+                f"{status.processed}/{status.total} posts "
+                f"({status.posts_per_second:.0f} posts/s, last id {status.last_id})"
+            )
+
+    status = resanitize_posts(default_engine, args.workers, args.chunk_size, on_progress=report)
+    print(
+        f"Re-sanitized {status.processed - status.failed} posts in {status.elapsed_seconds}s "
+        f"with policy {status.policy_version}"
+        + (f"; {status.failed} failed and will be retried by the next run" if status.failed else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Full-text product search index.
+
+Products are indexed by title and description in a dedicated inverted index:
+an FTS5 virtual table on SQLite and a tsvector column with a GIN index on
+PostgreSQL. Text is lowercased and accent-folded before matching, so
+"camion" finds "Camión". Every query term is matched as a prefix.
+
+The index is maintained incrementally by the product write endpoints through
+`index_product` / `remove_product`; it is only built in full once, when the
+index table is first created.
+"""
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, TextualSelect, column, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, select
+
+from backend.app.models import Product
+
+FTS_TABLE = "products_fts"
+PG_TABLE = "product_search"
+
+# Title matches weigh more than description matches when ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+MAX_QUERY_TERMS = 8
+BACKFILL_BATCH_SIZE = 1000
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_text(value: Optional[str]) -> str:
+    """Lowercase and strip diacritics ("Camión" -> "camion")."""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def query_terms(q: str) -> list[str]:
+    """Split a user query into folded search terms."""
+    return _TERM_RE.findall(fold_text(q))[:MAX_QUERY_TERMS]
+
+
+def _dialect(conn: Connection) -> str:
+    return conn.dialect.name
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Create the search index if missing and populate it from existing products."""
+    with engine.begin() as conn:
+        if inspect(conn).has_table(FTS_TABLE if _dialect(conn) == "sqlite" else PG_TABLE):
+            return
+        create_search_index(conn)
+        backfill_search_index(conn)
+
+
+def create_search_index(conn: Connection) -> None:
+    """Create the dialect-specific index structures."""
+    if _dialect(conn) == "postgresql":
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+            " product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,"
+            " document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{PG_TABLE}_document ON {PG_TABLE} USING GIN (document)"
+        ))
+    else:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            " title, description,"
+            " tokenize = 'unicode61 remove_diacritics 2',"
+            " prefix = '2 3')"
+        ))
+
+
+def backfill_search_index(conn: Connection) -> None:
+    """Index every existing product, streaming them in primary key order."""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(Product.id, Product.title, Product.description)
+            .where(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        index_rows(conn, [row._asdict() for row in rows])
+        last_id = rows[-1].id
+
+
+def index_rows(conn: Connection, rows: Iterable[dict]) -> None:
+    """
+    Insert or replace index entries for a batch of products.
+
+    Each row needs `id`, `title` and `description`.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    if _dialect(conn) == "postgresql":
+        conn.execute(text(
+            f"INSERT INTO {PG_TABLE} (product_id, document) VALUES ("
+            " :id,"
+            " setweight(to_tsvector('simple', :title), 'A') ||"
+            " setweight(to_tsvector('simple', :description), 'B'))"
+            " ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+        ), [
+            {"id": row["id"], "title": fold_text(row["title"]), "description": fold_text(row["description"])}
+            for row in rows
+        ])
+    else:
+        conn.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"),
+            [{"id": row["id"]} for row in rows],
+        )
+        conn.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (:id, :title, :description)"),
+            [{"id": row["id"], "title": row["title"], "description": row["description"] or ""} for row in rows],
+        )
+
+
+def index_product(session: Session, product: Product) -> None:
+    """Insert or refresh the index entry for one product (must be flushed)."""
+    index_rows(session.connection(), [
+        {"id": product.id, "title": product.title, "description": product.description}
+    ])
+
+
+def remove_product(session: Session, product_id: int) -> None:
+    """Drop a product from the index."""
+    conn = session.connection()
+    if _dialect(conn) == "postgresql":
+        conn.execute(text(f"DELETE FROM {PG_TABLE} WHERE product_id = :id"), {"id": product_id})
+    else:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product_id})
+
+
+def _match_query(dialect: str, terms: list[str]) -> str:
+    """Build the engine query string matching all `terms` as prefixes."""
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _match_sql(dialect: str, terms: list[str]) -> tuple[str, dict]:
+    """Build the FROM/WHERE clause and params matching all `terms` as prefixes."""
+    params = {"q": _match_query(dialect, terms)}
+    if dialect == "postgresql":
+        return (
+            f"FROM {PG_TABLE} s JOIN products p ON p.id = s.product_id"
+            " WHERE s.document @@ to_tsquery('simple', :q)",
+            params,
+        )
+    return (
+        f"FROM {FTS_TABLE} JOIN products p ON p.id = {FTS_TABLE}.rowid"
+        f" WHERE {FTS_TABLE} MATCH :q",
+        params,
+    )
+
+
+def matching_ids(session: Session, q: str) -> Optional[TextualSelect]:
+    """
+    Return a subquery selecting the ids of products matching `q`.
+
+    Use it to filter other product queries (`Product.id.in_(...)`). Returns
+    None when `q` contains no searchable terms.
+    """
+    terms = query_terms(q)
+    if not terms:
+        return None
+
+    dialect = _dialect(session.connection())
+    if dialect == "postgresql":
+        sql = f"SELECT product_id FROM {PG_TABLE} WHERE document @@ to_tsquery('simple', :search_q)"
+    else:
+        sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :search_q"
+    return text(sql).bindparams(search_q=_match_query(dialect, terms)).columns(column("id", Integer))
+
+
+def search_products(session: Session, q: str, skip: int = 0, limit: int = 20) -> list[Product]:
+    """Return active products matching `q`, best matches first."""
+    terms = query_terms(q)
+    if not terms:
+        return []
+
+    dialect = _dialect(session.connection())
+    match, params = _match_sql(dialect, terms)
+    if dialect == "postgresql":
+        rank = "ts_rank_cd(s.document, to_tsquery('simple', :q)) DESC"
+    else:
+        rank = f"bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})"
+
+    statement = text(
+        f"SELECT p.* {match} AND p.is_active = :active ORDER BY {rank}, p.id LIMIT :limit OFFSET :skip"
+    ).bindparams(**params, active=True, limit=limit, skip=skip)
+    return list(session.exec(select(Product).from_statement(statement)).scalars())
@@ -3,9 +3,9 @@ Seed database with initial data from placeholders.
 """
 import json
 from pathlib import Path
-from decimal import Decimal
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select
 from backend.app.db import engine
+from backend.app.db.import_products import import_products
 from backend.app.models import Product
 
 
@@ -17,33 +17,25 @@ def seed_products_from_json():
         print("Error: products.json not found. Run scripts/gen_placeholders.py first.")
         return
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        products_data = json.load(f)
-
     with Session(engine) as session:
         # Check if products already exist
-        existing_count = len(session.exec(select(Product)).all())
+        existing_count = session.exec(select(func.count()).select_from(Product)).one()
         if existing_count > 0:
             print(f"Database already has {existing_count} products. Skipping seed.")
             return
 
-        # Add products
-        for data in products_data:
-            # Convert price to Decimal
-            product = Product(
-                title=data["title"],
-                slug=data["slug"],
-                description=data["description"],
-                price=Decimal(str(data["price"])),
-                currency=data["currency"],
-                image=data.get("image"),
-                stock=100,  # Default stock
-                is_active=True
-            )
-            session.add(product)
-
-        session.commit()
-        print(f"Successfully seeded {len(products_data)} products!")
+    with open(json_file, "r", encoding="utf-8") as f:
+        products_data = json.load(f)
+
+    # Upsert through the bulk importer (default stock, all active)
+    records = (
+        (i, {**data, "stock": data.get("stock", 100), "is_active": True})
+        for i, data in enumerate(products_data, start=1)
+    )
+    report = import_products(records, engine)
+    print(f"Successfully seeded {report.inserted} products!")
+    for error in report.errors:
+        print(f"  Skipped entry {error.line} ({error.slug}): {error.error}")
 
 
 if __name__ == "__main__":
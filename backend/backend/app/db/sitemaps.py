@@ -0,0 +1,341 @@
+"""
+Precomputed sitemaps and Atom feed.
+
+`sitemap.xml` is a sitemap index pointing at shard files of at most
+SHARD_SIZE URLs each, one series per table; a shard covers a fixed id range,
+so a changed row only ever affects one shard. `feed.xml` is an Atom feed of
+the latest published blog posts. All files are written to
+`settings.sitemap_dir` and served from disk.
+
+Regeneration is incremental. A manifest stores, per table, the table
+version, the `updated_at` watermark, the highest id and row count of the
+last run, plus the URL count of each shard. When a table version moves,
+only shards holding rows updated after the watermark are recounted and
+rewritten; every shard is recounted only when rows were deleted (the row
+count fell short of the previous count plus the rows inserted since).
+
+Requests never wait for regeneration: they are served the files of the
+last run while `refresh_in_background` brings them up to date.
+
+Usage (from the backend/ directory):
+    python -m backend.app.db.sitemaps
+    python -m backend.app.db.sitemaps --full
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+
+from backend.app.core.config import settings
+from backend.app.core.sanitize import sanitize_post_html
+from backend.app.core.storage import PUBLIC_FILE_MODE
+from backend.app.db import create_db_and_tables, engine as default_engine
+from backend.app.db.versioning import get_table_versions
+from backend.app.models import Post, Product
+
+# Sitemap protocol limit of URLs per file
+SHARD_SIZE = 50_000
+FEED_ENTRIES = 50
+# Rows committed late with an older updated_at are still picked up
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+SITEMAP_INDEX = "sitemap.xml"
+FEED = "feed.xml"
+MANIFEST = "manifest.json"
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+_products = Product.__table__
+_posts = Post.__table__
+
+# Which rows of each table are listed, and where they live on the site
+SOURCES = {
+    "products": (_products, _products.c.is_active == True, lambda: settings.product_url_path),
+    "posts": (
+        _posts,
+        (_posts.c.status == "published") & _posts.c.post_type.in_(("post", "page")),
+        lambda: settings.post_url_path,
+    ),
+}
+
+_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def _output_dir() -> Path:
+    path = Path(settings.sitemap_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Write via a temporary file and rename, so readers never see partial files."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.fchmod(fd, PUBLIC_FILE_MODE)
+    with os.fdopen(fd, "w", encoding="utf-8") as out:
+        out.write(content)
+    os.replace(tmp, path)
+
+
+def _load_manifest(directory: Path) -> dict:
+    try:
+        return json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _iso(value: datetime) -> str:
+    return value.replace(microsecond=0).isoformat() + "Z"
+
+
+def _attr(value: str) -> str:
+    return escape(value, {'"': "&quot;"})
+
+
+def _site_url(path: str) -> str:
+    return settings.site_url.rstrip("/") + path
+
+
+def shard_name(table: str, shard: int) -> str:
+    return f"sitemap-{table}-{shard}.xml"
+
+
+def _shard_of(table):
+    return ((table.c.id - 1) // SHARD_SIZE).label("shard")
+
+
+def _shard_counts(conn: Connection, table, listed) -> dict[int, int]:
+    shard = _shard_of(table)
+    rows = conn.execute(select(shard, func.count()).where(listed).group_by(shard))
+    return {int(index): count for index, count in rows}
+
+
+def _shard_count(conn: Connection, table, listed, shard: int) -> int:
+    """Listed rows of one shard: a range scan of its ids only."""
+    return conn.execute(
+        select(func.count())
+        .select_from(table)
+        .where(listed, table.c.id > shard * SHARD_SIZE, table.c.id <= (shard + 1) * SHARD_SIZE)
+    ).scalar()
+
+
+def _rows_deleted(conn: Connection, table, state: dict, total: int) -> bool:
+    """Whether rows were deleted since the last run: fewer rows than before plus those inserted since."""
+    if "rows" not in state:
+        return True
+    inserted = conn.execute(
+        select(func.count()).select_from(table).where(table.c.id > state.get("max_id", 0))
+    ).scalar()
+    return total != state["rows"] + inserted
+
+
+def _updated_shards(conn: Connection, table, since: datetime) -> set[int]:
+    shard = _shard_of(table)
+    rows = conn.execute(select(shard).where(table.c.updated_at > since - WATERMARK_OVERLAP).distinct())
+    return {int(index) for (index,) in rows}
+
+
+def _render_shard(conn: Connection, table, listed, url_path: str, shard: int) -> tuple[str, str]:
+    """Return (XML, lastmod) for one shard."""
+    rows = conn.execute(
+        select(table.c.slug, table.c.updated_at)
+        .where(listed, table.c.id > shard * SHARD_SIZE, table.c.id <= (shard + 1) * SHARD_SIZE)
+        .order_by(table.c.id)
+    )
+    lastmod = None
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<urlset xmlns="{SITEMAP_NS}">\n']
+    for slug, updated_at in rows:
+        lastmod = max(lastmod, updated_at) if lastmod else updated_at
+        loc = escape(_site_url(url_path.format(slug=quote(slug))))
+        parts.append(f"<url><loc>{loc}</loc><lastmod>{_iso(updated_at)}</lastmod></url>\n")
+    parts.append("</urlset>\n")
+    return "".join(parts), _iso(lastmod or datetime.utcnow())
+
+
+def _refresh_table(conn: Connection, directory: Path, name: str, state: dict, full: bool) -> bool:
+    """Rewrite the changed shards of one table; return True if any file changed."""
+    table, listed, url_path = SOURCES[name]
+    shards = state.setdefault("shards", {})
+    watermark, max_id, total = conn.execute(
+        select(func.max(table.c.updated_at), func.max(table.c.id), func.count()).select_from(table)
+    ).one()
+
+    if full or "watermark" not in state:
+        counts = _shard_counts(conn, table, listed)
+        stale = set(counts)
+    elif _rows_deleted(conn, table, state, total):
+        counts = _shard_counts(conn, table, listed)
+        stale = _updated_shards(conn, table, datetime.fromisoformat(state["watermark"])) | {
+            index for index, count in counts.items() if shards.get(str(index), {}).get("count") != count
+        }
+    else:
+        # Only shards with updated (or inserted) rows can have changed
+        stale = _updated_shards(conn, table, datetime.fromisoformat(state["watermark"]))
+        counts = {int(key): shard["count"] for key, shard in shards.items()}
+        for index in stale:
+            counts[index] = _shard_count(conn, table, listed, index)
+        counts = {index: count for index, count in counts.items() if count}
+
+    changed = False
+    for index in sorted(stale & set(counts)):
+        content, lastmod = _render_shard(conn, table, listed, url_path(), index)
+        _write_atomic(directory / shard_name(name, index), content)
+        shards[str(index)] = {"count": counts[index], "lastmod": lastmod}
+        changed = True
+    for key in set(shards) - {str(index) for index in counts}:
+        (directory / shard_name(name, int(key))).unlink(missing_ok=True)
+        del shards[key]
+        changed = True
+
+    if watermark is not None:
+        state["watermark"] = watermark.isoformat()
+    state["max_id"], state["rows"] = max_id or 0, total
+    return changed
+
+
+def _render_index(manifest: dict) -> str:
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<sitemapindex xmlns="{SITEMAP_NS}">\n']
+    for name in SOURCES:
+        shards = manifest.get(name, {}).get("shards", {})
+        for key in sorted(shards, key=int):
+            loc = escape(_site_url(f"/sitemaps/{shard_name(name, int(key))}"))
+            parts.append(f"<sitemap><loc>{loc}</loc><lastmod>{shards[key]['lastmod']}</lastmod></sitemap>\n")
+    parts.append("</sitemapindex>\n")
+    return "".join(parts)
+
+
+def _render_feed(conn: Connection) -> str:
+    """Atom feed of the latest published blog posts."""
+    rows = conn.execute(
+        select(
+            _posts.c.slug, _posts.c.title, _posts.c.excerpt, _posts.c.content,
+            _posts.c.content_html, _posts.c.created_at, _posts.c.updated_at,
+        )
+        .where(_posts.c.post_type == "post", _posts.c.status == "published")
+        .order_by(_posts.c.id.desc())
+        .limit(FEED_ENTRIES)
+    ).all()
+
+    updated = max((row.updated_at for row in rows), default=datetime.utcnow())
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(settings.app_name)}</title>\n",
+        f"<id>{escape(_site_url('/'))}</id>\n",
+        f'<link href="{_attr(_site_url("/"))}"/>\n',
+        f'<link rel="self" href="{_attr(_site_url("/" + FEED))}"/>\n',
+        f"<updated>{_iso(updated)}</updated>\n",
+    ]
+    for row in rows:
+        url = _attr(_site_url(settings.post_url_path.format(slug=quote(row.slug))))
+        html = row.content_html if row.content_html is not None else sanitize_post_html(row.content)
+        parts.append(
+            "<entry>"
+            f"<title>{escape(row.title)}</title>"
+            f'<link href="{url}"/><id>{url}</id>'
+            f"<published>{_iso(row.created_at)}</published><updated>{_iso(row.updated_at)}</updated>"
+            + (f"<summary>{escape(row.excerpt)}</summary>" if row.excerpt else "")
+            + f'<content type="html">{escape(html)}</content>'
+            "</entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+def refresh(engine: Engine = default_engine, full: bool = False) -> list[str]:
+    """
+    Bring the sitemap files and feed up to date; return the tables refreshed.
+
+    Cheap when nothing changed: only the table versions are read.
+    """
+    with _lock:
+        directory = _output_dir()
+        manifest = _load_manifest(directory)
+        with Session(engine) as session:
+            versions = get_table_versions(session, SOURCES)
+
+        refreshed = [
+            name for name in SOURCES
+            if full or manifest.get(name, {}).get("version") != versions[name]
+        ]
+        feed_missing = not (directory / FEED).exists()
+        index_missing = not (directory / SITEMAP_INDEX).exists()
+        if not refreshed and not feed_missing and not index_missing:
+            return []
+
+        with engine.connect() as conn:
+            index_changed = index_missing
+            for name in refreshed:
+                state = manifest.setdefault(name, {})
+                index_changed |= _refresh_table(conn, directory, name, state, full)
+                state["version"] = versions[name]
+            if index_changed:
+                _write_atomic(directory / SITEMAP_INDEX, _render_index(manifest))
+            if "posts" in refreshed or feed_missing:
+                _write_atomic(directory / FEED, _render_feed(conn))
+
+        _write_atomic(directory / MANIFEST, json.dumps(manifest, indent=2))
+        return refreshed
+
+
+def _refresh_logged(engine: Engine) -> None:
+    try:
+        refresh(engine)
+    except Exception:
+        logger.exception("Sitemap refresh failed")
+
+
+def refresh_in_background(engine: Engine = default_engine) -> bool:
+    """Start `refresh` in a daemon thread unless one is already running; True if started."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return False
+        _worker = threading.Thread(target=_refresh_logged, args=(engine,), name="sitemaps-refresh", daemon=True)
+        _worker.start()
+        return True
+
+
+def file_path(name: str) -> Optional[Path]:
+    """
+    Path of a generated file; None if it does not exist.
+
+    The last generated files are served as they are while a background
+    refresh catches up with any writes; only the very first request, before
+    anything was generated, waits for it.
+    """
+    directory = Path(settings.sitemap_dir)
+    if not (directory / SITEMAP_INDEX).exists():
+        refresh()
+    else:
+        refresh_in_background()
+    path = directory / name
+    return path if path.is_file() else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Regenerate sitemap.xml shards and the Atom feed.")
+    parser.add_argument("--full", action="store_true", help="Rewrite every shard, ignoring the manifest")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    refreshed = refresh(default_engine, full=args.full)
+    print(f"Refreshed: {', '.join(refreshed) or 'nothing changed'} ({settings.sitemap_dir})")
+
+
+if __name__ == "__main__":
+    main()
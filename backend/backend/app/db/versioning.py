@@ -0,0 +1,59 @@
+"""
+Per-table version counters.
+
+Every ORM flush that inserts, updates or deletes rows bumps the counter of
+each affected table inside the same transaction, so the counters only move
+when the write commits. Bulk Core statements bypass the ORM and must call
+`bump_table_versions` themselves.
+"""
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from backend.app.models import TableVersion
+
+_versions = TableVersion.__table__
+
+
+def bump_table_versions(conn: Connection, tables: Iterable[str]) -> None:
+    """Increment the version counter of each table, creating missing rows."""
+    tables = sorted(set(tables))
+    if not tables:
+        return
+
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    statement = insert(_versions).on_conflict_do_update(
+        index_elements=[_versions.c.table_name],
+        set_={"version": _versions.c.version + 1},
+    )
+    conn.execute(statement, [{"table_name": name, "version": 1} for name in tables])
+
+
+def get_table_versions(session: Session, tables: Iterable[str]) -> dict[str, int]:
+    """Return the current version of each table (0 if never written)."""
+    tables = sorted(set(tables))
+    rows = session.exec(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+    ).all()
+    versions = dict.fromkeys(tables, 0)
+    versions.update({name: version for name, version in rows})
+    return versions
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _bump_flushed_tables(session: OrmSession, flush_context) -> None:
+    """Bump the counters of every table touched by this flush."""
+    changed = list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    ]
+    tables = {
+        obj.__table__.name
+        for obj in changed
+        if getattr(obj, "__table__", None) is not None and obj.__table__ is not _versions
+    }
+    if tables:
+        bump_table_versions(session.connection(), tables)
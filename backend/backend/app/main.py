@@ -1,11 +1,18 @@
+import asyncio
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from backend.app.api.v1 import products, posts, design, sections, assets, menu_items
-from backend.app.db import create_db_and_tables
+from backend.app.api.v1 import products, posts, design, sections, assets, menu_items, feeds
+from backend.app.core.cache import BytesLRUCache
+from backend.app.core.compression import CompressionMiddleware
+from backend.app.core import images
+from backend.app.core.config import settings
+from backend.app.core.static import CachedStaticFiles
+from backend.app.db import create_db_and_tables, gc_uploads
 from backend.app.models import (
     User, Product, Post, SiteDesign,
-    PageSection, Asset, MenuItem  # Import CMS models to register with SQLModel
+    PageSection, Asset, AssetBlob, AssetDerivative, MenuItem,  # Import CMS models to register with SQLModel
+    TableVersion
 )
 
 app = FastAPI(title="MiEcommerce API - Admin Panel")
@@ -22,6 +29,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
+)
+
+# gzip/Brotli; compressed bodies of ETagged responses are cached by ETag
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    cache=BytesLRUCache(
+        max_size=settings.compression_cache_max_size,
+        max_bytes=settings.compression_cache_max_bytes,
+    ),
 )
 
 
@@ -31,12 +49,41 @@ def on_startup():
     create_db_and_tables()
 
 
+@app.on_event("startup")
+async def schedule_upload_gc():
+    """Start the periodic uploads garbage collector, if enabled."""
+    if settings.upload_gc_interval_hours > 0:
+        app.state.upload_gc = asyncio.create_task(gc_uploads.run_periodically(
+            settings.upload_gc_interval_hours * 3600,
+            settings.upload_gc_delete,
+            settings.upload_gc_grace_hours * 3600,
+        ))
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """Stop the image derivative worker processes and the uploads garbage collector."""
+    images.shutdown_pool()
+    upload_gc = getattr(app.state, "upload_gc", None)
+    if upload_gc is not None:
+        upload_gc.cancel()
+
+
 app.include_router(products.router, prefix="/api/v1/products", tags=["products"])
 app.include_router(posts.router, prefix="/api/v1/posts", tags=["posts"])
 app.include_router(design.router, prefix="/api/v1/design", tags=["design"])
 app.include_router(sections.router, prefix="/api/v1/sections", tags=["sections"])
 app.include_router(assets.router, prefix="/api/v1/assets", tags=["assets"])
 app.include_router(menu_items.router, prefix="/api/v1/menu-items", tags=["menu-items"])
+app.include_router(feeds.router, tags=["feeds"])
 
-# serve static assets (placeholders)
-app.mount("/static", StaticFiles(directory="backend/static"), name="static")
+# serve static assets (placeholders, uploads); content-named uploads are cached as immutable
+app.mount(
+    "/static",
+    CachedStaticFiles(
+        directory="backend/static",
+        sendfile_header=settings.static_sendfile_header,
+        sendfile_prefix=settings.static_sendfile_prefix,
+    ),
+    name="static",
+)
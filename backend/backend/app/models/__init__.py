@@ -8,7 +8,10 @@ from .post import Post
 from .site_design import SiteDesign
 from .page_section import PageSection, HeroSectionContent, ContentBlockContent, ProductGridContent
 from .asset import Asset
+from .asset_blob import AssetBlob
+from .asset_derivative import AssetDerivative
 from .menu_item import MenuItem
+from .table_version import TableVersion
 
 __all__ = [
     "TimestampModel",
@@ -21,5 +24,8 @@ __all__ = [
     "ContentBlockContent",
     "ProductGridContent",
     "Asset",
+    "AssetBlob",
+    "AssetDerivative",
     "MenuItem",
+    "TableVersion",
 ]
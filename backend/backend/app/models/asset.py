@@ -1,11 +1,13 @@
 """
 Asset model for file management (images, documents, etc.).
 
-Handles uploaded files with metadata tracking. Files are stored on disk
-and referenced by path in the database.
+Handles uploaded files with metadata tracking. Files are stored on disk,
+once per distinct content (see AssetBlob), and referenced by path in the
+database.
 """
 from datetime import datetime
 from typing import Optional, Literal
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -17,6 +19,11 @@ class Asset(SQLModel, table=True):
     Used for product images, CMS content images, downloadable files, etc.
     """
     __tablename__ = "assets"
+    __table_args__ = (
+        # Newest-first listing (keyset on created_at, id), with and without type filter
+        Index("ix_assets_created_at_id", "created_at", "id"),
+        Index("ix_assets_file_type_created_at_id", "file_type", "created_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     filename: str = Field(
@@ -25,8 +32,8 @@ class Asset(SQLModel, table=True):
     )
     file_path: str = Field(
         max_length=500,
-        unique=True,
-        description="Relative path from static root (e.g., 'uploads/2025/10/abc123.jpg')"
+        index=True,
+        description="Relative path from static root (e.g., 'uploads/cas/ab/cd/abcd....jpg'); shared by assets with identical content"
     )
     file_type: str = Field(
         default="image",
@@ -40,6 +47,24 @@ class Asset(SQLModel, table=True):
         ge=0,
         description="File size in bytes"
     )
+    checksum: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        index=True,
+        description="SHA-256 hex digest of the file contents; key of the shared AssetBlob"
+    )
+    width: Optional[int] = Field(default=None, ge=1, description="Display width in pixels (images)")
+    height: Optional[int] = Field(default=None, ge=1, description="Display height in pixels (images)")
+    dominant_color: Optional[str] = Field(
+        default=None,
+        max_length=7,
+        description="Dominant colour as #rrggbb, for a solid placeholder"
+    )
+    placeholder: Optional[str] = Field(
+        default=None,
+        max_length=1000,
+        description="Tiny blurred image as a data URI (LQIP), shown while the image loads"
+    )
     alt_text: Optional[str] = Field(
         default=None,
         max_length=500,
@@ -51,10 +76,13 @@ class Asset(SQLModel, table=True):
         "json_schema_extra": {
             "example": {
                 "filename": "product-hero.jpg",
-                "file_path": "uploads/2025/10/550e8400-e29b-41d4-a716-446655440000.jpg",
+                "file_path": "uploads/cas/9f/86/9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08.jpg",
                 "file_type": "image",
                 "mime_type": "image/jpeg",
                 "file_size": 245760,
+                "width": 1600,
+                "height": 1067,
+                "dominant_color": "#c81e1e",
                 "alt_text": "Hero image showing featured product"
             }
         }
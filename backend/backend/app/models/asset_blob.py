@@ -0,0 +1,30 @@
+"""
+AssetBlob model: one stored file, shared by every asset with the same content.
+
+Uploaded files are stored once per SHA-256 digest. Assets point at their
+blob through `Asset.checksum`, and `ref_count` tracks how many of them do,
+so the file is only removed when the last one is deleted.
+"""
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class AssetBlob(SQLModel, table=True):
+    """A content-addressed file on disk and its reference count."""
+    __tablename__ = "asset_blobs"
+
+    checksum: str = Field(
+        primary_key=True,
+        max_length=64,
+        description="SHA-256 hex digest of the file contents"
+    )
+    file_path: str = Field(
+        max_length=500,
+        unique=True,
+        description="Relative path from static root (e.g., 'uploads/cas/ab/cd/abcd....jpg')"
+    )
+    file_size: int = Field(ge=0, description="File size in bytes")
+    mime_type: str = Field(max_length=100)
+    ref_count: int = Field(default=0, ge=0, description="Assets referencing this blob")
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
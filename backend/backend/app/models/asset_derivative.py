@@ -0,0 +1,34 @@
+"""
+AssetDerivative model: a resized, re-encoded copy of a stored image.
+
+Derivatives belong to the content (AssetBlob, by checksum), so every asset
+sharing that content shares them too. They back the `srcset` of the asset
+API responses.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class AssetDerivative(SQLModel, table=True):
+    """One width and format of a stored image."""
+    __tablename__ = "asset_derivatives"
+    __table_args__ = (
+        UniqueConstraint("checksum", "width", "format", name="uq_asset_derivatives_checksum_width_format"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    checksum: str = Field(max_length=64, index=True, description="Checksum of the source AssetBlob")
+    width: int = Field(gt=0)
+    height: int = Field(gt=0)
+    format: str = Field(max_length=10, description="webp or avif")
+    mime_type: str = Field(max_length=100)
+    file_path: str = Field(max_length=500, unique=True, description="Relative path from static root")
+    file_size: int = Field(ge=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    @property
+    def url(self) -> str:
+        return f"/static/{self.file_path}"
@@ -5,6 +5,7 @@ Allows dynamic configuration of the site's navigation menu through the admin pan
 """
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -16,6 +17,10 @@ class MenuItem(SQLModel, table=True):
     determines display position (lower numbers appear first).
     """
     __tablename__ = "menu_items"
+    __table_args__ = (
+        Index("ix_menu_items_order", "order"),
+        Index("ix_menu_items_is_active_order", "is_active", "order"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     label: str = Field(
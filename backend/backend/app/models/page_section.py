@@ -6,6 +6,7 @@ The 'content' field stores section-specific data as JSON, validated by Pydantic
 """
 from datetime import datetime
 from typing import Optional, Literal
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Column, JSON
 from pydantic import BaseModel, field_validator
 
@@ -87,6 +88,11 @@ class PageSection(SQLModel, table=True):
     type-specific configuration in the 'content' JSON field.
     """
     __tablename__ = "page_sections"
+    __table_args__ = (
+        # Sections of one page in display order
+        Index("ix_page_sections_page_order", "page", "order"),
+        Index("ix_page_sections_order", "order"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     page: str = Field(
@@ -2,6 +2,7 @@
 Post/Content model for CMS functionality.
 """
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from .base import TimestampModel
 
@@ -9,11 +10,21 @@ from .base import TimestampModel
 class Post(TimestampModel, table=True):
     """Post model for content management."""
     __tablename__ = "posts"
+    __table_args__ = (
+        # Listing filtered by type and/or status, paginated by id
+        Index("ix_posts_post_type_id", "post_type", "id"),
+        Index("ix_posts_status_id", "status", "id"),
+        Index("ix_posts_post_type_status_id", "post_type", "status", "id"),
+        # Incremental sitemap/feed regeneration (updated_at watermark)
+        Index("ix_posts_updated_at_id", "updated_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(max_length=255, index=True)
     slug: str = Field(unique=True, index=True, max_length=255)
     content: str = Field(default="")  # HTML content
+    content_html: Optional[str] = Field(default=None)  # sanitized `content`, served by /render
+    sanitizer_version: Optional[str] = Field(default=None, max_length=16)  # policy that produced content_html
     excerpt: Optional[str] = Field(default=None, max_length=500)
     featured_image: Optional[str] = Field(default=None, max_length=500)
     status: str = Field(default="draft", max_length=20)  # draft, published
@@ -4,13 +4,19 @@ Product model for ecommerce catalog.
 from typing import Optional
 from decimal import Decimal
 from sqlmodel import Field, SQLModel, Column
-from sqlalchemy import Numeric
+from sqlalchemy import Index, Numeric
 from .base import TimestampModel
 
 
 class Product(TimestampModel, table=True):
     """Product model for catalog."""
     __tablename__ = "products"
+    __table_args__ = (
+        # Active catalog listing, paginated by id
+        Index("ix_products_is_active_id", "is_active", "id"),
+        # Full and incremental (updated_since) catalog export
+        Index("ix_products_updated_at_id", "updated_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(max_length=255, index=True)
@@ -0,0 +1,15 @@
+"""
+TableVersion model: per-table change counters.
+
+Each row counts committed writes to one table. Readers use the counters to
+build cheap cache validators (ETags) without touching the table itself.
+"""
+from sqlmodel import Field, SQLModel
+
+
+class TableVersion(SQLModel, table=True):
+    """Monotonic write counter for a database table."""
+    __tablename__ = "table_versions"
+
+    table_name: str = Field(primary_key=True, max_length=100)
+    version: int = Field(default=0, ge=0)
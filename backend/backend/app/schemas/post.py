@@ -44,3 +44,16 @@ class PostResponse(PostBase):
 
     class Config:
         from_attributes = True
+
+
+class PostResanitizeStatus(BaseModel):
+    """Progress of the bulk post re-sanitization job."""
+    state: str = "idle"  # idle, running, finished, failed
+    policy_version: str = ""
+    total: int = 0
+    processed: int = 0
+    failed: int = 0  # could not be sanitized; left stale for the next run
+    last_id: int = 0
+    elapsed_seconds: float = 0.0
+    posts_per_second: float = 0.0
+    error: Optional[str] = None
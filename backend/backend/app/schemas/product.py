@@ -1,10 +1,10 @@
 """
 Pydantic schemas for Product API requests/responses.
 """
-from typing import Optional
+from typing import Literal, Optional
 from decimal import Decimal
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class ProductBase(BaseModel):
@@ -36,6 +36,15 @@ class ProductUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class ProductFilters(BaseModel):
+    """Query filters for product listings."""
+    price_min: Optional[Decimal] = Field(None, ge=0, description="Minimum price (inclusive)")
+    price_max: Optional[Decimal] = Field(None, ge=0, description="Maximum price (inclusive)")
+    currency: Optional[str] = Field(None, min_length=3, max_length=3)
+    in_stock: Optional[bool] = Field(None, description="Only products with stock > 0 (or = 0 if false)")
+    q: Optional[str] = Field(None, min_length=1, max_length=200, description="Free-text filter")
+
+
 class ProductResponse(ProductBase):
     """Schema for product response."""
     id: int
@@ -44,3 +53,49 @@ class ProductResponse(ProductBase):
 
     class Config:
         from_attributes = True
+
+
+class ProductImportError(BaseModel):
+    """A feed row that could not be imported."""
+    line: int
+    slug: Optional[str] = None
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    """Summary of a bulk product import."""
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    errors: list[ProductImportError] = []
+
+
+class ProductStockUpdate(BaseModel):
+    """One item of a bulk stock/price update, identified by id or slug."""
+    id: Optional[int] = None
+    slug: Optional[str] = Field(None, max_length=255)
+    stock: Optional[int] = Field(None, ge=0)
+    price: Optional[Decimal] = Field(None, ge=0, max_digits=10, decimal_places=2)
+    is_active: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_key(self):
+        if (self.id is None) == (self.slug is None):
+            raise ValueError("Provide exactly one of 'id' or 'slug'")
+        return self
+
+
+class ProductStockResult(BaseModel):
+    """Outcome of one bulk update item."""
+    id: Optional[int] = None
+    slug: Optional[str] = None
+    status: Literal["updated", "not_found"]
+
+
+class ProductBulkUpdateReport(BaseModel):
+    """Summary of a bulk stock/price update."""
+    updated: int = 0
+    not_found: int = 0
+    results: list[ProductStockResult] = []
@@ -0,0 +1,94 @@
+"""
+Benchmark offset vs keyset (cursor) pagination for the product listing.
+
+Seeds a throwaway SQLite database and times `list_products` at increasing
+page depths using both `skip` and `cursor`. Offset latency grows with depth;
+keyset latency should stay flat from page 1 to page 1000.
+
+Usage (from the backend/ directory):
+    python bench_pagination.py --rows 100000 --limit 100
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from fastapi import Response
+from sqlmodel import Session, SQLModel, create_engine, insert, select
+
+from backend.app.api.v1.products import list_products
+from backend.app.core.pagination import encode_cursor
+from backend.app.models import Product
+from backend.app.schemas.product import ProductFilters
+
+
+def seed_products(engine, rows: int, batch_size: int = 10_000) -> None:
+    """Insert `rows` active products using batched executemany."""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, rows, batch_size):
+            conn.execute(insert(Product), [
+                {
+                    "title": f"Product {i}",
+                    "slug": f"product-{i}",
+                    "description": "Benchmark product",
+                    "price": Decimal("9.99"),
+                    "currency": "EUR",
+                    "stock": 10,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(start, min(start + batch_size, rows))
+            ])
+
+
+def time_page(engine, repeat: int, **params) -> float:
+    """Return the best-of-`repeat` latency of one list_products call in ms."""
+    best = float("inf")
+    for _ in range(repeat):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            list_products(
+                response=Response(), filters=ProductFilters(), fields=None, view=None, session=session, **params
+            )
+            best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        SQLModel.metadata.create_all(engine)
+        seed_products(engine, args.rows)
+
+        max_page = args.rows // args.limit
+        pages = [p for p in (1, 10, 100, 500, 1000) if p <= max_page]
+
+        print(f"{args.rows} products, limit={args.limit}")
+        print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+        for page in pages:
+            skip = (page - 1) * args.limit
+            cursor = None
+            if skip:
+                with Session(engine) as session:
+                    last_id = session.exec(
+                        select(Product.id).order_by(Product.id).offset(skip - 1).limit(1)
+                    ).one()
+                cursor = encode_cursor([last_id])
+
+            offset_ms = time_page(engine, args.repeat, skip=skip, limit=args.limit, cursor=None)
+            cursor_ms = time_page(engine, args.repeat, skip=0, limit=args.limit, cursor=cursor)
+            print(f"{page:>6} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
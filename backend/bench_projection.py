@@ -0,0 +1,102 @@
+"""
+Benchmark full vs projected (`view=card`) product listing pages.
+
+Seeds a throwaway SQLite database with products carrying long descriptions
+and measures, per page, the time to query and serialize it to JSON and the
+peak memory allocated while doing so. The full path builds `Product` objects
+and validates them into `ProductResponse` the way FastAPI does; the card view
+selects only the card columns and serializes rows directly.
+
+Usage (from the backend/ directory):
+    python bench_projection.py --rows 20000 --limit 100
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from fastapi import Response
+from sqlmodel import Session, SQLModel, create_engine, insert
+
+from backend.app.api.v1.products import list_products
+from backend.app.models import Product
+from backend.app.schemas.product import ProductFilters, ProductResponse
+
+
+def seed_products(engine, rows: int, description_size: int, batch_size: int = 10_000) -> None:
+    """Insert `rows` active products with `description_size`-character descriptions."""
+    now = datetime.utcnow()
+    description = "Lorem ipsum dolor sit amet. " * (description_size // 28 + 1)
+    with engine.begin() as conn:
+        for start in range(0, rows, batch_size):
+            conn.execute(insert(Product), [
+                {
+                    "title": f"Product {i}",
+                    "slug": f"product-{i}",
+                    "description": description[:description_size],
+                    "price": Decimal("9.99"),
+                    "currency": "EUR",
+                    "image": f"/static/uploads/product-{i}.webp",
+                    "stock": 10,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(start, min(start + batch_size, rows))
+            ])
+
+
+def render_page(session: Session, limit: int, view) -> bytes:
+    """Query one page and serialize it to JSON bytes."""
+    result = list_products(
+        response=Response(), filters=ProductFilters(), skip=0, limit=limit,
+        cursor=None, fields=None, view=view, session=session,
+    )
+    if isinstance(result, Response):
+        return result.body
+    payload = [ProductResponse.model_validate(product).model_dump(mode="json") for product in result]
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def measure(engine, limit: int, view, repeat: int) -> tuple[float, float, int]:
+    """Return (best ms, peak KiB, body bytes) for one page in `view`."""
+    best = float("inf")
+    peak = 0
+    size = 0
+    for _ in range(repeat):
+        with Session(engine) as session:
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = len(render_page(session, limit, view))
+            best = min(best, time.perf_counter() - start)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return best * 1000, peak / 1024, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--description-size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        SQLModel.metadata.create_all(engine)
+        seed_products(engine, args.rows, args.description_size)
+
+        print(f"{args.rows} products, limit={args.limit}, description={args.description_size} chars")
+        print(f"{'view':>6} {'ms':>8} {'peak KiB':>10} {'bytes':>9}")
+        for label, view in (("full", None), ("card", "card")):
+            ms, peak, size = measure(engine, args.limit, view, args.repeat)
+            print(f"{label:>6} {ms:>8.2f} {peak:>10.0f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
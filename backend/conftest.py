@@ -0,0 +1,52 @@
+"""
+Shared fixtures for the API behaviour tests.
+
+`api` is a TestClient for the application wired to a throwaway SQLite
+database and static root, so tests never touch ecommerce.db or the real
+uploads tree. Startup events (table creation on the default engine,
+background jobs) are not run.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from backend.app.db import blobs
+from backend.app.db.search import ensure_search_index
+from backend.app.db.session import get_session
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    ensure_search_index(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def static_root(tmp_path, monkeypatch):
+    root = tmp_path / "static"
+    root.mkdir()
+    monkeypatch.setattr(blobs, "STATIC_ROOT", root)
+    return root
+
+
+@pytest.fixture
+def api(db_engine, static_root, monkeypatch):
+    from backend.app.main import app
+
+    async def no_derivatives(checksum):
+        return None
+
+    def session_override():
+        with Session(db_engine) as session:
+            yield session
+
+    # Derivatives render in a process pool against the default engine
+    monkeypatch.setattr(blobs, "generate_derivatives", no_derivatives)
+    app.dependency_overrides[get_session] = session_override
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
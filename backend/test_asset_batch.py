@@ -0,0 +1,84 @@
+"""
+Per-file results of the batch and zip upload endpoints.
+
+Run with: pytest test_asset_batch.py
+"""
+import io
+import zipfile
+
+from PIL import Image
+from sqlmodel import Session, select
+
+from backend.app.models import Asset, AssetBlob
+
+
+def png_bytes(color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_batch_reports_each_file_in_order(api, db_engine):
+    red = png_bytes()
+    response = api.post("/api/v1/assets/upload/batch", files=[
+        ("files", ("red.png", red, "image/png")),
+        ("files", ("notes.png", b"just some text, not an image", "image/png")),
+        ("files", ("copy.png", red, "image/png")),
+        ("files", ("blue.png", png_bytes((30, 30, 200)), "image/png")),
+    ])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["rejected"]) == (3, 1)
+    assert [(result["filename"], result["status_code"]) for result in body["results"]] == [
+        ("red.png", 201), ("notes.png", 415), ("copy.png", 201), ("blue.png", 201),
+    ]
+    assert "Unsupported file type" in body["results"][1]["detail"]
+    first, copy = body["results"][0]["asset"], body["results"][2]["asset"]
+    assert first["filename"] == "red.png" and (first["width"], first["height"]) == (64, 48)
+    # Identical content is stored once and shared
+    assert first["file_path"] == copy["file_path"]
+
+    with Session(db_engine) as session:
+        assert len(session.exec(select(Asset)).all()) == 3
+        assert session.get(AssetBlob, first["checksum"]).ref_count == 2
+
+
+def test_zip_skips_metadata_and_reports_members(api, db_engine):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("photos/", "")
+        zf.writestr("photos/red.png", png_bytes())
+        zf.writestr("photos/.DS_Store", b"\x00\x00")
+        zf.writestr("__MACOSX/photos/._red.png", b"\x00\x05")
+        zf.writestr("readme.txt", "hello")
+    response = api.post(
+        "/api/v1/assets/upload/zip", files={"file": ("photos.zip", archive.getvalue(), "application/zip")}
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["rejected"]) == (1, 1)
+    assert [(result["filename"], result["status_code"]) for result in body["results"]] == [
+        ("red.png", 201), ("readme.txt", 415),
+    ]
+    with Session(db_engine) as session:
+        assert [asset.filename for asset in session.exec(select(Asset)).all()] == ["red.png"]
+
+
+def test_zip_endpoint_rejects_other_files(api):
+    response = api.post("/api/v1/assets/upload/zip", files={"file": ("photo.png", png_bytes(), "image/png")})
+    assert response.status_code == 415
+
+
+def test_asset_list_pages_with_the_cursor_header(api):
+    api.post("/api/v1/assets/upload/batch", files=[
+        ("files", (f"{n}.png", png_bytes((n * 40, 30, 30)), "image/png")) for n in range(3)
+    ])
+    first = api.get("/api/v1/assets/?limit=2")
+    assert first.json()["count"] == 2
+    assert "next_cursor" not in first.json()
+    cursor = first.headers["x-next-cursor"]
+
+    last = api.get(f"/api/v1/assets/?limit=2&cursor={cursor}")
+    pages = first.json()["assets"] + last.json()["assets"]
+    assert sorted(asset["filename"] for asset in pages) == ["0.png", "1.png", "2.png"]
+    assert "x-next-cursor" not in last.headers
@@ -0,0 +1,29 @@
+"""
+Output naming and skipping in the batch image resizer.
+
+Run with: pytest test_batch_resize.py
+"""
+from PIL import Image
+
+from backend.app.core.batch_resize import resize_tree
+
+
+def test_sources_differing_only_in_extension_do_not_collide(tmp_path):
+    source = tmp_path / "uploads"
+    (source / "nested").mkdir(parents=True)
+    Image.new("RGB", (400, 200), (200, 30, 30)).save(source / "nested" / "a.png")
+    Image.new("RGB", (200, 400), (30, 30, 200)).save(source / "nested" / "a.jpg")
+    output = tmp_path / "resized"
+
+    stats = resize_tree(source, output, [128], ["webp", "original"], workers=1)
+    assert (stats.resized, stats.failed, stats.outputs) == (2, 0, 4)
+
+    size_dir = output / "128" / "nested"
+    assert sorted(path.name for path in size_dir.iterdir()) == ["a.jpg", "a.jpg.webp", "a.png", "a.png.webp"]
+    with Image.open(size_dir / "a.png.webp") as image:
+        assert image.size == (128, 64)
+    with Image.open(size_dir / "a.jpg.webp") as image:
+        assert image.size == (64, 128)
+
+    again = resize_tree(source, output, [128], ["webp", "original"], workers=1)
+    assert (again.resized, again.skipped) == (0, 2)
@@ -0,0 +1,145 @@
+"""
+Reference counting of content-addressed upload blobs.
+
+Run with: pytest test_blobs.py
+"""
+import io
+
+import pytest
+from PIL import Image
+from sqlmodel import Session
+
+from backend.app.db import blobs
+from backend.app.models import AssetBlob
+
+
+def png_bytes(color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def upload(api, data: bytes, name: str = "image.png") -> dict:
+    response = api.post("/api/v1/assets/upload", files={"file": (name, data, "image/png")})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_shared_upload_keeps_file_until_last_reference(api, db_engine, static_root):
+    data = png_bytes()
+    first = upload(api, data, "a.png")
+    second = upload(api, data, "b.png")
+
+    assert first["file_path"] == second["file_path"]
+    path = static_root / first["file_path"]
+    assert path.read_bytes() == data
+    with Session(db_engine) as session:
+        assert session.get(AssetBlob, first["checksum"]).ref_count == 2
+
+    assert api.delete(f"/api/v1/assets/{first['id']}").status_code == 204
+    assert path.exists()
+    with Session(db_engine) as session:
+        assert session.get(AssetBlob, first["checksum"]).ref_count == 1
+
+    assert api.delete(f"/api/v1/assets/{second['id']}").status_code == 204
+    assert not path.exists()
+    with Session(db_engine) as session:
+        assert session.get(AssetBlob, first["checksum"]) is None
+
+
+def test_distinct_content_is_stored_separately(api, static_root):
+    red = upload(api, png_bytes((200, 30, 30)))
+    blue = upload(api, png_bytes((30, 30, 200)))
+    assert red["file_path"] != blue["file_path"]
+
+    api.delete(f"/api/v1/assets/{red['id']}")
+    assert not (static_root / red["file_path"]).exists()
+    assert (static_root / blue["file_path"]).exists()
+
+
+def test_release_keeps_blob_acquired_after_the_last_decrement(db_engine, static_root):
+    data = png_bytes()
+    path = static_root / blobs.blob_path("f" * 64, ".png")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(data)
+    with Session(db_engine) as session:
+        session.add(AssetBlob(
+            checksum="f" * 64, file_path=blobs.blob_path("f" * 64, ".png"),
+            file_size=len(data), mime_type="image/png", ref_count=1,
+        ))
+        session.commit()
+
+    with Session(db_engine) as session:
+        # Last reference dropped without deletion, then taken again
+        assert not blobs.release(session, "f" * 64, delete_file=False)
+        assert blobs.acquire(session, "f" * 64).ref_count == 1
+        assert not blobs.release(session, "f" * 64, delete_file=False)
+        assert blobs.acquire(session, "f" * 64) is not None
+        # Still referenced: a release with deletion only decrements
+        assert blobs.acquire(session, "f" * 64).ref_count == 2
+        assert not blobs.release(session, "f" * 64)
+    assert path.exists()
+
+    with Session(db_engine) as session:
+        assert blobs.release(session, "f" * 64)
+        assert session.get(AssetBlob, "f" * 64) is None
+    assert not path.exists()
+
+
+def test_acquire_unknown_content_returns_none(db_engine):
+    with Session(db_engine) as session:
+        assert blobs.acquire(session, "0" * 64) is None
+
+
+def stored_blob(db_engine, static_root, checksum: str = "f" * 64, ref_count: int = 1):
+    data = png_bytes()
+    relative = blobs.blob_path(checksum, ".png")
+    path = static_root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    with Session(db_engine) as session:
+        session.add(AssetBlob(
+            checksum=checksum, file_path=relative, file_size=len(data), mime_type="image/png", ref_count=ref_count,
+        ))
+        session.commit()
+    return relative, path
+
+
+def test_failed_delete_commit_keeps_the_file(db_engine, static_root, monkeypatch):
+    _, path = stored_blob(db_engine, static_root)
+
+    with Session(db_engine) as session:
+        commit = session.commit
+        calls = []
+
+        def flaky_commit():
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("database is locked")
+            commit()
+
+        monkeypatch.setattr(session, "commit", flaky_commit)
+        with pytest.raises(RuntimeError):
+            blobs.release(session, "f" * 64)
+        session.rollback()
+
+    # The deletion did not commit, so the row is back and its file was never touched
+    assert path.exists()
+    with Session(db_engine) as session:
+        assert session.get(AssetBlob, "f" * 64).ref_count == 0
+
+
+def test_files_claimed_again_after_the_delete_are_put_back(db_engine, static_root):
+    relative, path = stored_blob(db_engine, static_root)
+    orphan, orphan_path = stored_blob(db_engine, static_root, checksum="e" * 64)
+    with Session(db_engine) as session:
+        session.delete(session.get(AssetBlob, "e" * 64))
+        session.commit()
+
+    # `relative` stands for content stored again since its row was deleted
+    with Session(db_engine) as session:
+        blobs._remove_files(session, [relative, orphan])
+
+    assert path.exists()
+    assert not orphan_path.exists()
+    assert not [name for name in path.parent.iterdir() if name.name.startswith(".")]
@@ -0,0 +1,111 @@
+"""
+Behaviour tests for the gzip / Brotli compression middleware.
+
+Runs a small Starlette app (static files plus a streaming route) behind
+`CompressionMiddleware` and checks the negotiated headers and bodies.
+
+Run with: pytest test_compression.py
+"""
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from backend.app.core.cache import BytesLRUCache
+from backend.app.core.compression import CompressionMiddleware
+from backend.app.core.static import CachedStaticFiles
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+async def stream(request):
+    async def chunks():
+        for i in range(100):
+            yield json.dumps({"row": i, "padding": "x" * 50}).encode() + b"\n"
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("static")
+    data = json.dumps([{"id": i, "name": f"item {i}"} for i in range(400)]).encode()
+    (directory / "data.json").write_bytes(data)
+    cache = BytesLRUCache()
+    app = Starlette(
+        routes=[
+            Route("/stream", stream),
+            Mount("/static", CachedStaticFiles(directory=str(directory))),
+        ],
+        middleware=[Middleware(CompressionMiddleware, minimum_size=500, cache=cache)],
+    )
+    with TestClient(app) as client:
+        client.data = data
+        client.cache = cache
+        yield client
+
+
+def test_full_response_is_compressed_once_with_single_vary(client):
+    response = client.get("/static/data.json", headers=GZIP)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == client.data  # decoded by the client
+    assert response.headers["etag"].startswith("W/")
+    vary = [token.strip().lower() for token in response.headers["vary"].split(",")]
+    assert vary.count("accept-encoding") == 1
+
+
+def test_range_request_is_not_compressed(client):
+    response = client.get("/static/data.json", headers={**GZIP, "Range": "bytes=0-4999"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-range"] == f"bytes 0-4999/{len(client.data)}"
+    assert response.content == client.data[:5000]
+
+
+def test_unsatisfiable_range_is_not_compressed(client):
+    response = client.get("/static/data.json", headers={**GZIP, "Range": f"bytes={len(client.data) + 10}-"})
+    assert response.status_code == 416
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk(client):
+    with client.stream("GET", "/stream", headers=GZIP) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).splitlines()
+    assert len(lines) == 100
+    assert json.loads(lines[-1])["row"] == 99
+
+
+def test_identity_when_client_does_not_accept_gzip(client):
+    response = client.get("/static/data.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == client.data
+
+
+def test_compressed_bodies_are_cached_as_bytes(client):
+    cache = client.cache
+    before = cache.stats()["hits"]
+    first = client.get("/static/data.json", headers=GZIP)
+    second = client.get("/static/data.json", headers=GZIP)
+    assert first.content == second.content == client.data
+    assert cache.stats()["hits"] > before
+
+
+def test_bytes_cache_evicts_by_total_size():
+    cache = BytesLRUCache(max_size=10, max_bytes=10)
+    cache.set("a", b"x" * 4)
+    cache.set("b", b"y" * 4)
+    assert cache.get("a") == b"x" * 4
+    cache.set("c", b"z" * 4)
+    # "b" was least recently used
+    assert cache.get("b") is None
+    assert cache.stats()["bytes"] == 8
+    cache.set("huge", b"!" * 11)
+    assert cache.get("huge") is None
@@ -0,0 +1,56 @@
+"""
+Incremental product export: resuming with the (updated_at, id) cursor.
+
+Run with: pytest test_export.py
+"""
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+from sqlmodel import insert
+
+from backend.app.db.export_products import ExportCursor, iter_product_rows
+from backend.app.models import Product
+
+STAMP = datetime(2025, 10, 1, 12, 0)
+
+
+def seed(engine, count=50):
+    """`count` products sharing one updated_at, as a bulk update leaves them."""
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [
+            {
+                "title": f"Product {i}", "slug": f"product-{i}", "description": "",
+                "price": Decimal("1.00"), "currency": "EUR", "stock": 1, "is_active": True,
+                "created_at": STAMP, "updated_at": STAMP,
+            }
+            for i in range(count)
+        ])
+
+
+def test_interrupted_export_resumes_inside_a_timestamp_group(db_engine):
+    seed(db_engine)
+    cursor = ExportCursor()
+    first = [row["id"] for row in islice(iter_product_rows(db_engine, cursor), 20)]
+    assert (cursor.updated_at, cursor.id) == (STAMP, first[-1])
+
+    rest = [row["id"] for row in iter_product_rows(db_engine, cursor)]
+    assert len(first) + len(rest) == 50
+    assert sorted(first + rest) == first + rest  # no gaps, no repeats
+
+
+def test_completed_export_cursor_returns_only_later_changes(db_engine, api):
+    seed(db_engine, 5)
+    cursor = ExportCursor()
+    assert len(list(iter_product_rows(db_engine, cursor))) == 5
+    assert list(iter_product_rows(db_engine, cursor)) == []
+
+    response = api.patch("/api/v1/products/3", json={"stock": 7})
+    assert response.status_code == 200, response.text
+    assert [row["id"] for row in iter_product_rows(db_engine, cursor)] == [3]
+
+
+def test_timestamp_only_cursor_keeps_strictly_later_semantics(db_engine):
+    seed(db_engine, 3)
+    assert list(iter_product_rows(db_engine, ExportCursor(STAMP))) == []
+    assert len(list(iter_product_rows(db_engine, ExportCursor(datetime(2025, 1, 1))))) == 3
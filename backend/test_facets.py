@@ -0,0 +1,85 @@
+"""
+Facet counts of the catalog endpoint.
+
+Run with: pytest test_facets.py
+"""
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session
+
+from backend.app.db import facets, search
+from backend.app.models import Product
+
+CATALOG = [
+    # slug, price, currency, stock
+    ("mug", "5.00", "EUR", 3),
+    ("plate", "12.00", "EUR", 0),
+    ("bowl", "30.00", "EUR", 1),
+    ("cup", "8.00", "USD", 2),
+    ("vase", "300.00", "USD", 0),
+]
+
+
+@pytest.fixture
+def catalog(api, db_engine):
+    facets._cubes.clear()
+    with Session(db_engine) as session:
+        for slug, price, currency, stock in CATALOG:
+            product = Product(title=slug.title(), slug=slug, price=Decimal(price), currency=currency, stock=stock)
+            session.add(product)
+            session.flush()
+            search.index_product(session, product)
+        session.add(Product(title="Gone", slug="gone", price=Decimal("1.00"), is_active=False))
+        session.commit()
+    yield api
+    facets._cubes.clear()
+
+
+def price_counts(body: dict) -> list[int]:
+    return [bucket["count"] for bucket in body["facets"]["price"]]
+
+
+def test_unfiltered_counts_cover_the_active_catalog(catalog):
+    body = catalog.get("/api/v1/products/catalog").json()
+    assert price_counts(body) == [2, 1, 1, 0, 0, 1]
+    assert body["facets"]["stock"] == {"in_stock": 3, "out_of_stock": 2}
+    assert body["facets"]["currency"] == {"EUR": 3, "USD": 2}
+
+
+def test_counts_follow_the_other_filters(catalog):
+    body = catalog.get("/api/v1/products/catalog?currency=eur&in_stock=true").json()
+    assert body["count"] == 2
+    # Each facet applies every filter but its own
+    assert price_counts(body) == [1, 0, 1, 0, 0, 0]
+    assert body["facets"]["stock"] == {"in_stock": 2, "out_of_stock": 1}
+    assert body["facets"]["currency"] == {"EUR": 2, "USD": 1}
+
+    # Price filters select whole buckets: 20..40 overlaps 10-25 and 25-50
+    body = catalog.get("/api/v1/products/catalog?price_min=20&price_max=40").json()
+    assert [product["slug"] for product in body["products"]] == ["bowl"]
+    assert body["facets"]["currency"] == {"EUR": 2}
+    assert body["facets"]["stock"] == {"in_stock": 1, "out_of_stock": 1}
+
+
+def test_text_query_counts_only_matches(catalog):
+    body = catalog.get("/api/v1/products/catalog?q=mug").json()
+    assert [product["slug"] for product in body["products"]] == ["mug"]
+    assert body["facets"]["currency"] == {"EUR": 1}
+    assert sum(price_counts(body)) == 1
+
+
+def test_writes_serve_the_last_cube_until_the_background_refresh(catalog):
+    first = catalog.get("/api/v1/products/catalog")
+    assert "etag" in first.headers
+
+    catalog.patch("/api/v1/products/1", json={"currency": "USD"})
+    stale = catalog.get("/api/v1/products/catalog")
+    assert stale.json()["facets"]["currency"] == {"EUR": 3, "USD": 2}
+    assert stale.headers["cache-control"] == "no-store"
+    assert "etag" not in stale.headers
+
+    facets._worker.join(timeout=10)
+    fresh = catalog.get("/api/v1/products/catalog")
+    assert fresh.json()["facets"]["currency"] == {"EUR": 2, "USD": 3}
+    assert "etag" in fresh.headers
@@ -0,0 +1,140 @@
+"""
+Merge of the uploads tree with the database in the upload garbage collector.
+
+Run with: pytest test_gc_uploads.py
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, select
+
+from backend.app.db import gc_uploads
+from backend.app.models import Asset, AssetBlob, Product
+
+OLD = time.time() - 2 * 3600
+OLD_AT = datetime.utcnow() - timedelta(hours=2)
+
+
+@pytest.fixture
+def uploads(static_root, monkeypatch):
+    monkeypatch.setattr(gc_uploads, "STATIC_ROOT", static_root)
+    root = static_root / "uploads"
+    root.mkdir()
+    return root
+
+
+def write(root, relative: str, mtime: float = OLD) -> None:
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * 10)
+    os.utime(path, (mtime, mtime))
+
+
+def asset(file_path: str, checksum=None, created_at=OLD_AT) -> Asset:
+    return Asset(
+        filename=os.path.basename(file_path), file_path=file_path, mime_type="image/png", file_size=10,
+        checksum=checksum, created_at=created_at,
+    )
+
+
+def blob(checksum: str, file_path: str, ref_count: int = 0) -> AssetBlob:
+    return AssetBlob(
+        checksum=checksum, file_path=file_path, file_size=10, mime_type="image/png",
+        ref_count=ref_count, created_at=OLD_AT,
+    )
+
+
+def seed(db_engine, uploads) -> None:
+    # "-" and "." sort before "/", so a naive per-directory walk would yield a/x.png first
+    for relative in ("a/x.png", "a.b.png", "a-c.png", "linked.png"):
+        write(uploads, relative)
+    write(uploads, "recent.png", mtime=time.time())
+    with Session(db_engine) as session:
+        session.add_all([
+            asset("uploads/a/x.png", checksum="c" * 64),
+            asset("uploads/a.b.png"),
+            asset("uploads/a/gone.png"),
+            # A blob and an asset sharing one path
+            blob("c" * 64, "uploads/a/x.png", ref_count=1),
+            Product(title="Linked", slug="linked", price=Decimal("1.00"), image="/static/uploads/linked.png"),
+        ])
+        session.commit()
+
+
+def test_report_merges_files_and_rows_in_path_order(db_engine, uploads):
+    seed(db_engine, uploads)
+
+    report = gc_uploads.collect(db_engine, grace_seconds=3600, list_orphans=True)
+
+    assert report.orphans == ["uploads/a-c.png"]
+    assert (report.scanned_files, report.referenced_files, report.recent_files) == (5, 3, 1)
+    assert report.dangling_records == {"assets": 1, "asset_blobs": 0, "asset_derivatives": 0}
+    # Report only: nothing removed
+    assert (uploads / "a-c.png").exists()
+    with Session(db_engine) as session:
+        assert len(session.exec(select(Asset)).all()) == 3
+
+
+def test_delete_removes_orphans_and_dangling_rows_only(db_engine, uploads):
+    seed(db_engine, uploads)
+
+    report = gc_uploads.collect(db_engine, delete_files=True, grace_seconds=3600)
+
+    assert report.orphan_files == 1
+    assert not (uploads / "a-c.png").exists()
+    for kept in ("a/x.png", "a.b.png", "linked.png", "recent.png"):
+        assert (uploads / kept).exists()
+    with Session(db_engine) as session:
+        paths = sorted(row.file_path for row in session.exec(select(Asset)).all())
+    assert paths == ["uploads/a.b.png", "uploads/a/x.png"]
+
+    again = gc_uploads.collect(db_engine, grace_seconds=3600)
+    assert again.orphan_files == 0
+    assert sum(again.dangling_records.values()) == 0
+
+
+def test_recent_rows_and_referenced_blobs_are_never_deleted(db_engine, uploads):
+    with Session(db_engine) as session:
+        session.add_all([
+            # Committed during the scan, before its file landed
+            asset("uploads/new.png", created_at=datetime.utcnow()),
+            # Still referenced, but the file is gone
+            blob("d" * 64, "uploads/cas/live.png", ref_count=2),
+            blob("e" * 64, "uploads/cas/dead.png"),
+        ])
+        session.commit()
+
+    report = gc_uploads.collect(db_engine, delete_files=True, grace_seconds=3600)
+
+    assert report.recent_records == 1
+    assert report.missing_live_blobs == ["uploads/cas/live.png"]
+    assert report.dangling_records == {"assets": 0, "asset_blobs": 1, "asset_derivatives": 0}
+    with Session(db_engine) as session:
+        assert [row.file_path for row in session.exec(select(Asset)).all()] == ["uploads/new.png"]
+        assert session.get(AssetBlob, "d" * 64).ref_count == 2
+        assert session.get(AssetBlob, "e" * 64) is None
+
+
+def test_rows_are_rechecked_before_deletion(db_engine, uploads):
+    with Session(db_engine) as session:
+        session.add_all([blob("d" * 64, "uploads/cas/d.png"), blob("e" * 64, "uploads/cas/e.png")])
+        session.commit()
+    cutoff = datetime.utcnow() - timedelta(hours=1)
+    dangling = {"assets": [], "asset_blobs": [("d" * 64, "uploads/cas/d.png"), ("e" * 64, "uploads/cas/e.png")], "asset_derivatives": []}
+
+    # Since the scan: d was stored again (file back), e was re-stored under a new row
+    write(uploads, "cas/d.png")
+    with Session(db_engine) as session:
+        session.delete(session.get(AssetBlob, "e" * 64))
+        session.commit()
+        session.add(AssetBlob(checksum="e" * 64, file_path="uploads/cas/e.png", file_size=10, mime_type="image/png", ref_count=1))
+        session.commit()
+
+    gc_uploads._delete_dangling(db_engine, dangling, cutoff)
+
+    with Session(db_engine) as session:
+        assert session.get(AssetBlob, "d" * 64) is not None
+        assert session.get(AssetBlob, "e" * 64).ref_count == 1
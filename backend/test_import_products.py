@@ -0,0 +1,46 @@
+"""
+COPY staging input of the PostgreSQL product import.
+
+Run with: pytest test_import_products.py
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.app.db.import_products import COPY_COLUMNS, _copy_from, copy_csv, copy_statement
+
+
+def test_statement_lists_the_staged_columns():
+    statement = copy_statement()
+    assert statement.startswith(f"COPY product_import_stage ({', '.join(COPY_COLUMNS)}) FROM STDIN")
+    assert "FORMAT csv" in statement and "NULL '\\N'" in statement
+
+
+def test_csv_quotes_text_and_marks_nulls():
+    now = datetime(2026, 10, 18, 12, 30)
+    row = {
+        "slug": "mug", "title": 'The "big", mug', "description": "line one\nline two", "price": Decimal("9.50"),
+        "currency": "EUR", "image": None, "stock": 3, "is_active": False, "created_at": now, "updated_at": now,
+    }
+    data = copy_csv([row, {**row, "slug": "cup", "is_active": True}])
+
+    assert data.endswith("\n")
+    # NULL stays unquoted so it is not read as the string "\N"
+    assert ',\\N,' in data
+    lines = list(csv.reader(io.StringIO(data, newline="")))
+    assert len(lines) == 2
+    first = dict(zip(COPY_COLUMNS, lines[0]))
+    assert first["title"] == 'The "big", mug'
+    assert first["description"] == "line one\nline two"
+    assert (first["price"], first["stock"], first["is_active"]) == ("9.50", "3", "f")
+    assert first["created_at"] == "2026-10-18 12:30:00"
+    assert dict(zip(COPY_COLUMNS, lines[1]))["is_active"] == "t"
+
+
+def test_copy_requires_a_psycopg_driver(db_engine):
+    with db_engine.connect() as conn:
+        with pytest.raises(RuntimeError, match="psycopg2 or psycopg"):
+            _copy_from(conn, copy_statement(), "")
@@ -0,0 +1,79 @@
+"""
+Post HTML sanitization failures are never stored as sanitized.
+
+Run with: pytest test_posts_sanitize.py
+"""
+import pytest
+from sqlmodel import Session
+
+from backend.app.core import sanitize
+from backend.app.core.sanitize import POLICY_VERSION
+from backend.app.db.resanitize import sanitize_chunk, write_chunk
+from backend.app.models import Post
+
+CONTENT = "<p>Hola <script>alert(1)</script><b>mundo</b></p>"
+
+
+@pytest.fixture
+def broken_bleach(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("bleach exploded")
+
+    monkeypatch.setattr(sanitize.bleach, "clean", fail)
+
+
+def create_post(api) -> dict:
+    response = api.post("/api/v1/posts/", json={"title": "Hola", "slug": "hola", "content": CONTENT})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_failed_sanitization_is_left_for_retry(api, db_engine, broken_bleach, monkeypatch):
+    post = create_post(api)
+    with Session(db_engine) as session:
+        stored = session.get(Post, post["id"])
+        assert stored.content_html is None and stored.sanitizer_version is None
+
+    response = api.get(f"/api/v1/posts/{post['id']}/render")
+    assert response.status_code == 200
+    assert response.text == ""
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+
+    # Once sanitizing works again, the next render stores the result
+    monkeypatch.undo()
+    response = api.get(f"/api/v1/posts/{post['id']}/render")
+    assert "<b>mundo</b>" in response.text and "<script>" not in response.text
+    with Session(db_engine) as session:
+        assert session.get(Post, post["id"]).sanitizer_version == POLICY_VERSION
+
+
+def test_resanitize_job_skips_failures(api, db_engine, broken_bleach, monkeypatch):
+    post = create_post(api)
+    results = sanitize_chunk([(post["id"], CONTENT)])
+    assert results == [(post["id"], None)]
+    write_chunk(db_engine, results)
+    with Session(db_engine) as session:
+        assert session.get(Post, post["id"]).sanitizer_version is None
+
+    monkeypatch.undo()
+    write_chunk(db_engine, sanitize_chunk([(post["id"], CONTENT)]))
+    with Session(db_engine) as session:
+        assert session.get(Post, post["id"]).sanitizer_version == POLICY_VERSION
+
+
+def test_lazy_resanitize_returns_the_etag_of_the_write(api, db_engine):
+    post = create_post(api)
+    with Session(db_engine) as session:
+        stored = session.get(Post, post["id"])
+        stored.sanitizer_version = "older-policy"
+        session.add(stored)
+        session.commit()
+
+    first = api.get(f"/api/v1/posts/{post['id']}/render")
+    assert first.status_code == 200
+    with Session(db_engine) as session:
+        assert session.get(Post, post["id"]).sanitizer_version == POLICY_VERSION
+
+    again = api.get(f"/api/v1/posts/{post['id']}/render", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,168 @@
+"""
+Behaviour tests for the product endpoints: the single-product cache,
+conditional GETs, bulk import and bulk update reports.
+
+Run with: pytest test_products.py
+"""
+import json
+
+import pytest
+
+from backend.app.api.v1 import products
+
+
+@pytest.fixture(autouse=True)
+def product_api(api, db_engine, monkeypatch):
+    # The cache is module-global and the import writes through the module's engine
+    products.product_cache.clear()
+    monkeypatch.setattr(products, "engine", db_engine)
+    yield api
+    products.product_cache.clear()
+
+
+def create_product(api, slug: str = "mug", **fields) -> dict:
+    body = {"title": "Mug", "slug": slug, "price": "9.50", "stock": 3, **fields}
+    response = api.post("/api/v1/products/", json=body)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_update_invalidates_cached_product_by_id_and_both_slugs(product_api):
+    product = create_product(product_api)
+    # Warm the cache under the id and the slug
+    assert product_api.get(f"/api/v1/products/{product['id']}").json()["title"] == "Mug"
+    assert product_api.get("/api/v1/products/slug/mug").json()["title"] == "Mug"
+
+    response = product_api.patch(f"/api/v1/products/{product['id']}", json={"title": "Big mug", "slug": "big-mug"})
+    assert response.status_code == 200
+
+    assert product_api.get(f"/api/v1/products/{product['id']}").json()["title"] == "Big mug"
+    assert product_api.get("/api/v1/products/slug/big-mug").json()["title"] == "Big mug"
+    assert product_api.get("/api/v1/products/slug/mug").status_code == 404
+
+
+def test_delete_invalidates_cached_product(product_api):
+    product = create_product(product_api)
+    assert product_api.get(f"/api/v1/products/{product['id']}").json()["is_active"] is True
+    assert product_api.get("/api/v1/products/slug/mug").status_code == 200
+
+    assert product_api.delete(f"/api/v1/products/{product['id']}").status_code == 204
+
+    assert product_api.get(f"/api/v1/products/{product['id']}").json()["is_active"] is False
+    assert product_api.get("/api/v1/products/slug/mug").json()["is_active"] is False
+
+
+def test_bulk_update_invalidates_cached_products(product_api):
+    product = create_product(product_api)
+    assert product_api.get(f"/api/v1/products/{product['id']}").json()["stock"] == 3
+
+    response = product_api.patch("/api/v1/products/bulk", json=[{"slug": "mug", "stock": 7}])
+    assert response.status_code == 200
+    assert product_api.get(f"/api/v1/products/{product['id']}").json()["stock"] == 7
+
+
+def test_conditional_get_returns_304_until_products_change(product_api):
+    product = create_product(product_api)
+    first = product_api.get(f"/api/v1/products/{product['id']}")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    cached = product_api.get(f"/api/v1/products/{product['id']}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+    # Weak and list forms match too
+    assert product_api.get(
+        f"/api/v1/products/{product['id']}", headers={"If-None-Match": f'"other", W/{etag}'}
+    ).status_code == 304
+
+    # The ETag covers the path and query, not only the table version
+    listing = product_api.get("/api/v1/products/")
+    assert listing.headers["etag"] != etag
+    assert product_api.get("/api/v1/products/?limit=5").headers["etag"] != listing.headers["etag"]
+
+    product_api.patch(f"/api/v1/products/{product['id']}", json={"stock": 4})
+    changed = product_api.get(f"/api/v1/products/{product['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["stock"] == 4
+
+
+def test_import_reports_inserts_updates_and_invalid_rows(product_api):
+    create_product(product_api)
+    assert product_api.get("/api/v1/products/slug/mug").json()["stock"] == 3
+    feed = "\n".join([
+        json.dumps({"title": "Mug", "slug": "mug", "price": "9.50", "stock": 12}),
+        json.dumps({"title": "Plate", "slug": "plate", "price": "4.00"}),
+        json.dumps({"title": "No price", "slug": "broken"}),
+        "{not json",
+    ])
+
+    response = product_api.post(
+        "/api/v1/products/import", files={"file": ("feed.ndjson", feed.encode(), "application/x-ndjson")}
+    )
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["processed"], report["inserted"], report["updated"], report["failed"]) == (4, 1, 1, 2)
+    assert [(error["line"], error["slug"]) for error in report["errors"]] == [(3, "broken"), (4, None)]
+    assert "price" in report["errors"][0]["error"]
+
+    # Upserted rows are visible through the cache
+    assert product_api.get("/api/v1/products/slug/mug").json()["stock"] == 12
+    assert product_api.get("/api/v1/products/slug/plate").json()["title"] == "Plate"
+
+
+def test_bulk_update_reports_each_item(product_api):
+    mug = create_product(product_api)
+    plate = create_product(product_api, slug="plate", title="Plate")
+
+    response = product_api.patch("/api/v1/products/bulk", json=[
+        {"id": mug["id"], "price": "11.00"},
+        {"slug": "plate", "is_active": False},
+        {"slug": "missing", "stock": 1},
+        {"id": 999, "stock": 1},
+    ])
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["updated"], report["not_found"]) == (2, 2)
+    assert [(result.get("id"), result.get("slug"), result["status"]) for result in report["results"]] == [
+        # Updated items are reported with both keys
+        (mug["id"], "mug", "updated"),
+        (plate["id"], "plate", "updated"),
+        (None, "missing", "not_found"),
+        (999, None, "not_found"),
+    ]
+
+    assert product_api.patch("/api/v1/products/bulk", json=[{"id": 1, "slug": "mug", "stock": 1}]).status_code == 422
+
+
+def test_bulk_update_applies_one_item_per_product(product_api):
+    mug = create_product(product_api)
+
+    response = product_api.patch("/api/v1/products/bulk", json=[
+        {"id": mug["id"], "stock": 5, "price": "12.00"},
+        {"slug": "mug", "stock": 9},
+        {"slug": "missing", "stock": 1},
+        {"slug": "missing", "stock": 2},
+    ])
+    report = response.json()
+    assert (report["updated"], report["not_found"]) == (1, 1)
+    assert [(result.get("id"), result.get("slug"), result["status"]) for result in report["results"]] == [
+        (mug["id"], "mug", "updated"),
+        (None, "missing", "not_found"),
+    ]
+    # The last item wins as a whole; fields it leaves out keep their stored value
+    product = product_api.get(f"/api/v1/products/{mug['id']}").json()
+    assert (product["stock"], product["price"]) == (9, "9.50")
+
+
+def test_catalog_pages_with_the_cursor_header(product_api):
+    for slug in ("a", "b", "c"):
+        create_product(product_api, slug=slug)
+    first = product_api.get("/api/v1/products/catalog?limit=2")
+    assert [product["slug"] for product in first.json()["products"]] == ["a", "b"]
+    assert "next_cursor" not in first.json()
+
+    last = product_api.get(f"/api/v1/products/catalog?limit=2&cursor={first.headers['x-next-cursor']}")
+    assert [product["slug"] for product in last.json()["products"]] == ["c"]
+    assert "x-next-cursor" not in last.headers
@@ -0,0 +1,179 @@
+"""
+Query-plan regression tests for the list endpoints.
+
+Seeds a throwaway SQLite database with a large dataset, calls each router
+function directly while capturing the SQL it emits, and runs
+EXPLAIN QUERY PLAN on every captured SELECT. A test fails if a statement
+falls back to a full table scan or sorts rows in a temporary B-tree instead
+of reading them in index order.
+
+Run with: pytest test_query_plans.py
+"""
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine, insert
+
+from backend.app.api.v1.assets import list_assets
+from backend.app.api.v1.menu_items import list_menu_items
+from backend.app.api.v1.posts import list_posts
+from backend.app.api.v1.products import get_product_by_slug, list_products
+from backend.app.api.v1.sections import list_sections
+from backend.app.core.pagination import encode_cursor
+from backend.app.db.export_products import ExportCursor, iter_product_rows
+from backend.app.db.search import ensure_search_index
+from backend.app.models import Asset, MenuItem, PageSection, Post, Product
+from backend.app.schemas.product import ProductFilters
+
+ROWS = 20_000
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """SQLite database seeded with ROWS rows per large table, then ANALYZEd."""
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    ensure_search_index(engine)
+
+    now = datetime(2025, 10, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [
+            {
+                "title": f"Product {i}", "slug": f"product-{i}", "description": "",
+                "price": Decimal("9.99"), "currency": "EUR", "stock": i % 5,
+                "is_active": i % 10 != 0, "created_at": now, "updated_at": now,
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(Post), [
+            {
+                "title": f"Post {i}", "slug": f"post-{i}", "content": "",
+                "status": ("draft", "published")[i % 2],
+                "post_type": ("post", "page", "banner", "faq")[i % 4],
+                "is_published": i % 2 == 1, "created_at": now, "updated_at": now,
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(Asset), [
+            {
+                "filename": f"{i}.png", "file_path": f"uploads/2025/10/{i}.png",
+                "file_type": ("image", "video", "document")[i % 3], "mime_type": "image/png",
+                "file_size": 1024, "created_at": now + timedelta(seconds=i),
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(PageSection), [
+            {
+                "page": f"page-{i % 200}", "section_type": "content_block", "order": i % 50,
+                "is_active": True, "content": {"body": "x"}, "created_at": now, "updated_at": now,
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(MenuItem), [
+            {
+                "label": f"Item {i}", "url": f"/item-{i}", "order": i, "is_active": i % 2 == 0,
+                "opens_new_tab": False, "created_at": now, "updated_at": now,
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(text("ANALYZE"))
+
+    yield engine
+    engine.dispose()
+
+
+def captured_plans(engine, call):
+    """Run `call(session)` and return (sql, plan lines) for every SELECT it executed."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as session:
+            call(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements, "endpoint did not run any SELECT"
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+
+def assert_indexed(engine, call):
+    """Fail if any statement emitted by `call` scans a whole table or sorts."""
+    for statement, plan in captured_plans(engine, call):
+        for line in plan:
+            assert not FULL_SCAN.match(line), f"full table scan ({line}) in:\n{statement}\n{plan}"
+            assert TEMP_SORT not in line, f"unindexed sort ({line}) in:\n{statement}\n{plan}"
+
+
+# Unfiltered offset pages ordered by primary key ("SCAN posts" in rowid
+# order, stopping at LIMIT) are not table scans and are left out below.
+CASES = {
+    "products: first page": lambda s: list_products(
+        response=Response(), filters=ProductFilters(), skip=0, limit=20, cursor=None,
+        fields=None, view=None, session=s),
+    "products: deep offset page": lambda s: list_products(
+        response=Response(), filters=ProductFilters(), skip=5000, limit=20, cursor=None,
+        fields=None, view=None, session=s),
+    "products: cursor page": lambda s: list_products(
+        response=Response(), filters=ProductFilters(), skip=0, limit=20,
+        cursor=encode_cursor([15000]), fields=None, view=None, session=s),
+    "products: filtered cursor page": lambda s: list_products(
+        response=Response(), filters=ProductFilters(price_min=5, price_max=50, in_stock=True, currency="EUR"),
+        skip=0, limit=20, cursor=encode_cursor([15000]), fields=None, view=None, session=s),
+    "products: card view cursor page": lambda s: list_products(
+        response=Response(), filters=ProductFilters(), skip=0, limit=20,
+        cursor=encode_cursor([15000]), fields=None, view="card", session=s),
+    "products: full export": lambda s: list(iter_product_rows(s.get_bind())),
+    "products: incremental export": lambda s: list(iter_product_rows(
+        s.get_bind(), ExportCursor(datetime(2025, 9, 1)), include_inactive=True)),
+    "products: resumed export": lambda s: list(iter_product_rows(
+        s.get_bind(), ExportCursor(datetime(2025, 10, 1), 15000), include_inactive=True)),
+    "products: by slug": lambda s: get_product_by_slug(slug="product-123", session=s),
+    "posts: cursor page": lambda s: list_posts(
+        response=Response(), skip=0, limit=20, cursor=encode_cursor([15000]),
+        post_type=None, status=None, session=s),
+    "posts: by type": lambda s: list_posts(
+        response=Response(), skip=0, limit=20, cursor=None, post_type="faq", status=None, session=s),
+    "posts: by status": lambda s: list_posts(
+        response=Response(), skip=0, limit=20, cursor=None, post_type=None, status="published", session=s),
+    "posts: by type and status, cursor": lambda s: list_posts(
+        response=Response(), skip=0, limit=20, cursor=encode_cursor([100]),
+        post_type="page", status="draft", session=s),
+    "assets: newest first": lambda s: list_assets(
+        response=Response(), file_type=None, limit=20, offset=0, cursor=None, session=s),
+    "assets: cursor page": lambda s: list_assets(
+        response=Response(), file_type=None, limit=20, offset=0,
+        cursor=encode_cursor([datetime(2025, 10, 1, 2), 7200]), session=s),
+    "assets: by type, cursor page": lambda s: list_assets(
+        response=Response(), file_type="image", limit=20, offset=0,
+        cursor=encode_cursor([datetime(2025, 10, 1, 2), 7200]), session=s),
+    "sections: by page": lambda s: list_sections(
+        page="page-7", is_active=None, section_type=None, session=s),
+    "sections: by page, active only": lambda s: list_sections(
+        page="page-7", is_active=True, section_type=None, session=s),
+    "sections: all": lambda s: list_sections(
+        page=None, is_active=None, section_type=None, session=s),
+    "menu items: all": lambda s: list_menu_items(is_active=None, session=s),
+    "menu items: active only": lambda s: list_menu_items(is_active=True, session=s),
+}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_list_query_uses_index(engine, name):
+    assert_indexed(engine, CASES[name])
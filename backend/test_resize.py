@@ -0,0 +1,64 @@
+"""
+On-demand image resizes: allowed sizes and serving under cache eviction.
+
+Run with: pytest test_resize.py
+"""
+import io
+
+import pytest
+from PIL import Image
+
+from backend.app.api.v1 import assets
+from backend.app.core import images
+from backend.app.core.cache import DiskLRUCache
+
+
+@pytest.fixture
+def image_asset(api, tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "_image_cache", DiskLRUCache(tmp_path / "cache", 10 * 1024 * 1024))
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (10, 120, 200)).save(buffer, format="PNG")
+    response = api.post("/api/v1/assets/upload", files={"file": ("photo.png", buffer.getvalue(), "image/png")})
+    assert response.status_code == 201, response.text
+    yield response.json()
+    images.shutdown_pool()
+
+
+def test_allowed_size_is_rendered_and_cached(api, image_asset):
+    response = api.get(f"/api/v1/assets/{image_asset['id']}/image", params={"w": 160, "format": "png"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert Image.open(io.BytesIO(response.content)).size == (160, 120)
+
+    again = api.get(f"/api/v1/assets/{image_asset['id']}/image", params={"w": 160, "format": "png"})
+    assert again.content == response.content
+    assert assets._image_cache.stats()["hits"] >= 1
+
+
+def test_sizes_outside_the_configured_list_are_rejected(api, image_asset):
+    response = api.get(f"/api/v1/assets/{image_asset['id']}/image", params={"w": 161})
+    assert response.status_code == 400
+    assert "Allowed sizes" in response.json()["detail"]
+
+
+def test_file_evicted_between_lookup_and_serving_is_rendered_again(api, image_asset, monkeypatch):
+    url = f"/api/v1/assets/{image_asset['id']}/image"
+    first = api.get(url, params={"w": 240, "format": "png"})
+    assert first.status_code == 200
+
+    open_file = assets._open_or_none
+    calls = []
+
+    def evict_then_open(path):
+        # A concurrent put evicts the file right after the cache lookup
+        if not calls:
+            path.unlink()
+        calls.append(path)
+        return open_file(path)
+
+    monkeypatch.setattr(assets, "_open_or_none", evict_then_open)
+    response = api.get(url, params={"w": 240, "format": "png"})
+    assert response.status_code == 200
+    assert response.content == first.content
+    assert len(calls) == 2
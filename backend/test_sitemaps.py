@@ -0,0 +1,103 @@
+"""
+Incremental sitemap regeneration.
+
+Run with: pytest test_sitemaps.py
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, insert
+
+from backend.app.core.config import settings
+from backend.app.core.storage import PUBLIC_FILE_MODE
+from backend.app.db import sitemaps
+from backend.app.models import Product
+
+STAMP = datetime(2025, 10, 1)
+
+
+@pytest.fixture
+def sitemap_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sitemap_dir", str(tmp_path / "feeds"))
+    monkeypatch.setattr(sitemaps, "SHARD_SIZE", 10)
+    return tmp_path / "feeds"
+
+
+def seed(engine, count=35):
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [
+            {
+                "title": f"Product {i}", "slug": f"product-{i}", "description": "",
+                "price": Decimal("1.00"), "currency": "EUR", "stock": 1, "is_active": True,
+                "created_at": STAMP, "updated_at": STAMP,
+            }
+            for i in range(1, count + 1)
+        ])
+
+
+def shard_urls(directory, shard):
+    return (directory / sitemaps.shard_name("products", shard)).read_text().count("<url>")
+
+
+def test_update_rewrites_only_its_shard_without_full_recount(db_engine, sitemap_dir, monkeypatch):
+    seed(db_engine)
+    assert "products" in sitemaps.refresh(db_engine)
+    assert [shard_urls(sitemap_dir, shard) for shard in range(4)] == [10, 10, 10, 5]
+
+    def no_full_recount(*args):
+        raise AssertionError("full GROUP BY recount")
+
+    def deactivate(product_id):
+        with Session(db_engine) as session:
+            product = session.get(Product, product_id)
+            product.is_active = False
+            product.updated_at = datetime.utcnow()
+            session.add(product)
+            session.commit()
+
+    monkeypatch.setattr(sitemaps, "_shard_counts", no_full_recount)
+    # Moves the watermark past the seeded rows (within the overlap, all shards are rechecked)
+    deactivate(25)
+    assert sitemaps.refresh(db_engine) == ["products"]
+    assert shard_urls(sitemap_dir, 2) == 9
+    untouched = (sitemap_dir / sitemaps.shard_name("products", 1)).stat().st_mtime_ns
+
+    deactivate(5)
+    assert sitemaps.refresh(db_engine) == ["products"]
+    assert shard_urls(sitemap_dir, 0) == 9
+    assert (sitemap_dir / sitemaps.shard_name("products", 1)).stat().st_mtime_ns == untouched
+
+
+def test_deleted_rows_are_detected(db_engine, sitemap_dir):
+    seed(db_engine)
+    sitemaps.refresh(db_engine)
+
+    with Session(db_engine) as session:
+        for product_id in range(31, 36):
+            session.delete(session.get(Product, product_id))
+        session.commit()
+
+    sitemaps.refresh(db_engine)
+    assert not (sitemap_dir / sitemaps.shard_name("products", 3)).exists()
+    assert "sitemap-products-3.xml" not in (sitemap_dir / sitemaps.SITEMAP_INDEX).read_text()
+
+
+def test_requests_serve_last_files_and_refresh_in_background(db_engine, sitemap_dir, monkeypatch):
+    seed(db_engine)
+    sitemaps.refresh(db_engine)
+    started = []
+    monkeypatch.setattr(sitemaps, "refresh", lambda *args, **kwargs: pytest.fail("refresh on the request path"))
+    monkeypatch.setattr(sitemaps, "refresh_in_background", lambda *args: started.append(True))
+
+    assert sitemaps.file_path(sitemaps.SITEMAP_INDEX) == sitemap_dir / sitemaps.SITEMAP_INDEX
+    assert started == [True]
+
+
+def test_published_files_are_readable_by_other_users(db_engine, sitemap_dir):
+    seed(db_engine)
+    sitemaps.refresh(db_engine)
+    files = list(sitemap_dir.iterdir())
+    assert files
+    # mkstemp creates 0600; a proxy serving /static runs as another user
+    assert all(path.stat().st_mode & 0o777 == PUBLIC_FILE_MODE for path in files)
@@ -17,8 +17,10 @@ def make_img(name, size=(800,800), bg=(245,244,250)):
         font = ImageFont.truetype("DejaVuSans-Bold.ttf", 40)
     except Exception:
         font = ImageFont.load_default()
-    w,h = d.textsize(text, font=font)
-    d.text(((size[0]-w)/2,(size[1]-h)/2), text, fill=(30,30,30), font=font)
+    # textsize() was removed in Pillow 10
+    l,t,r,b = d.textbbox((0,0), text, font=font)
+    w,h = r-l, b-t
+    d.text(((size[0]-w)/2-l,(size[1]-h)/2-t), text, fill=(30,30,30), font=font)
     filename = OUT_DIR / f"{name.replace(' ','_')}.png"
     img.save(filename)
     return str(filename)